@@ -0,0 +1,150 @@
+"""Throughput and latency benchmarks for Microdot.
+
+This script starts the benchmark application under each of the selected
+servers and runs a series of load test scenarios against it, using the
+asyncio load generator in *loadgen.py*. For each scenario it reports the
+requests per second and the 50th, 90th and 99th latency percentiles.
+
+Example::
+
+    python bench.py --servers native uvicorn --concurrency 1 10 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from loadgen import run_load
+from bench_app import ROUTE_COUNT, FILE_NAME
+
+SERVERS = {
+    'native': (
+        [sys.executable, 'bench_app.py', '{port}'],
+        {'PYTHONPATH': '../../src'},
+    ),
+    'micropython': (
+        ['micropython', 'bench_app.py', '{port}'],
+        {'MICROPYPATH': ':.frozen:../../src:../../libs/micropython'},
+    ),
+    'uvicorn': (
+        ['uvicorn', '--workers', '1', '--port', '{port}', '--log-level',
+         'warning', 'bench_asgi:app'],
+        {'PYTHONPATH': '../../src'},
+    ),
+    'gunicorn': (
+        ['gunicorn', '--workers', '1', '--bind', ':{port}', '--log-level',
+         'warning', 'bench_wsgi:app'],
+        {'PYTHONPATH': '../../src'},
+    ),
+}
+
+UPLOAD_BOUNDARY = 'benchmarkboundary'
+UPLOAD_BODY = (
+    '--{b}\r\nContent-Disposition: form-data; name="description"\r\n\r\n'
+    'benchmark upload\r\n--{b}\r\nContent-Disposition: form-data; '
+    'name="file"; filename="data.bin"\r\nContent-Type: '
+    'application/octet-stream\r\n\r\n'.format(b=UPLOAD_BOUNDARY).encode()
+    + b'x' * (256 * 1024)
+    + '\r\n--{b}--\r\n'.format(b=UPLOAD_BOUNDARY).encode())
+
+SCENARIOS = {
+    'hello': {'path': '/'},
+    'json': {'path': '/json'},
+    'routing': {'path': '/route{}/42'.format(ROUTE_COUNT - 1)},
+    'send_file': {'path': '/file'},
+    'upload': {
+        'method': 'POST', 'path': '/upload', 'body': UPLOAD_BODY,
+        'headers': {
+            'Content-Type': 'multipart/form-data; boundary='
+            + UPLOAD_BOUNDARY}},
+    'sse': {'path': '/sse', 'sse': True},
+    'websocket': {'path': '/ws', 'websocket': b'x' * 128},
+}
+
+UNSUPPORTED = {
+    # the sync WSGI workers cannot hold WebSocket connections
+    'gunicorn': ['websocket'],
+}
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def start_server(name, port):
+    cmd, env = SERVERS[name]
+    cmd = [arg.format(port=port) for arg in cmd]
+    p = subprocess.Popen(
+        cmd, env={**os.environ, 'PATH': os.environ['PATH'] + ':../../bin',
+                  **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_for_port(port):
+        p.terminate()
+        raise RuntimeError('server {} did not start'.format(name))
+    return p
+
+
+def print_result(server, scenario, concurrency, result):
+    print('{:<12}{:<11}{:>5}{:>10.1f}{:>10.2f}{:>10.2f}{:>10.2f}{:>8}'.format(
+        server, scenario, concurrency, result['rps'], result['p50'] * 1000,
+        result['p90'] * 1000, result['p99'] * 1000, result['errors']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--servers', nargs='+', default=['native'],
+                        choices=SERVERS.keys())
+    parser.add_argument('--scenarios', nargs='+', default=SCENARIOS.keys(),
+                        choices=SCENARIOS.keys())
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[10],
+                        help='number of concurrent connections (several '
+                        'values can be given to measure scaling)')
+    parser.add_argument('--duration', type=float, default=5,
+                        help='duration of each test in seconds')
+    parser.add_argument('--no-keep-alive', action='store_true',
+                        help='open a new connection for each request')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--json', help='save the results to a JSON file')
+    args = parser.parse_args()
+
+    results = []
+    print('{:<12}{:<11}{:>5}{:>10}{:>10}{:>10}{:>10}{:>8}'.format(
+        'server', 'scenario', 'conc', 'req/s', 'p50 ms', 'p90 ms', 'p99 ms',
+        'errors'))
+    for server in args.servers:
+        p = start_server(server, args.port)
+        try:
+            for scenario in args.scenarios:
+                if scenario in UNSUPPORTED.get(server, []):
+                    continue
+                for concurrency in args.concurrency:
+                    stats = asyncio.run(run_load(
+                        '127.0.0.1', args.port, SCENARIOS[scenario],
+                        concurrency=concurrency, duration=args.duration,
+                        keep_alive=not args.no_keep_alive))
+                    result = stats.to_dict()
+                    print_result(server, scenario, concurrency, result)
+                    results.append({'server': server, 'scenario': scenario,
+                                    'concurrency': concurrency, **result})
+        finally:
+            p.terminate()
+            p.wait()
+    if os.path.exists(FILE_NAME):
+        os.remove(FILE_NAME)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import sys
+from microdot import send_file
+from microdot.multipart import FormDataIter, FileUpload
+from microdot.sse import with_sse
+
+#: size of the file served by the ``/file`` route
+FILE_SIZE = 1024 * 1024
+#: name of the file served by the ``/file`` route
+FILE_NAME = 'bench_data.bin'
+#: number of dynamic routes registered for the routing scenario
+ROUTE_COUNT = 50
+#: number of events sent to each client in the SSE scenario
+SSE_EVENTS = 10
+
+
+def create_file():
+    try:
+        with open(FILE_NAME, 'rb') as f:
+            if len(f.read()) == FILE_SIZE:
+                return
+    except OSError:
+        pass
+    chunk = b'x' * 1024
+    with open(FILE_NAME, 'wb') as f:
+        for i in range(FILE_SIZE // len(chunk)):
+            f.write(chunk)
+
+
+def create_app(microdot_class, with_websocket=None):
+    """Create the benchmark application.
+
+    :param microdot_class: the ``Microdot`` class to use, which allows the
+                           ASGI and WSGI variants to be created.
+    :param with_websocket: the ``with_websocket`` decorator that matches the
+                           ``Microdot`` class. If not given, the WebSocket
+                           route is not registered.
+    """
+    create_file()
+    app = microdot_class()
+
+    @app.route('/')
+    async def hello(request):
+        return 'Hello, World!'
+
+    @app.route('/json')
+    async def json(request):
+        return {'hello': 'world', 'numbers': list(range(10))}
+
+    def add_route(i):
+        async def route(request, id):
+            return 'route {} {}'.format(i, id)
+
+        app.route('/route{}/<int:id>'.format(i))(route)
+
+    for i in range(ROUTE_COUNT):
+        add_route(i)
+
+    @app.route('/file')
+    async def file(request):
+        return send_file(FILE_NAME, content_type='application/octet-stream')
+
+    @app.post('/upload')
+    async def upload(request):
+        size = 0
+        async for name, value in FormDataIter(request):
+            if isinstance(value, FileUpload):
+                while True:
+                    data = await value.read(4096)
+                    if not data:
+                        break
+                    size += len(data)
+            else:
+                size += len(value)
+        return {'size': size}
+
+    @app.route('/sse')
+    @with_sse
+    async def sse(request, sse):
+        for i in range(SSE_EVENTS):
+            await sse.send({'counter': i})
+
+    if with_websocket:
+        @app.route('/ws')
+        @with_websocket
+        async def ws(request, ws):
+            while True:
+                data = await ws.receive()
+                await ws.send(data)
+
+    return app
+
+
+if __name__ == '__main__':
+    from microdot import Microdot, Request
+    from microdot.websocket import with_websocket
+
+    Request.max_content_length = 16 * 1024 * 1024
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    create_app(Microdot, with_websocket).run(port=port)
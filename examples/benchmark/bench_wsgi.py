@@ -0,0 +1,6 @@
+from microdot import Request
+from microdot.wsgi import Microdot
+from bench_app import create_app
+
+Request.max_content_length = 16 * 1024 * 1024
+app = create_app(Microdot)
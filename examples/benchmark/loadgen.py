@@ -0,0 +1,272 @@
+"""A small asyncio HTTP and WebSocket load generator.
+
+The load generator opens a configurable number of concurrent connections to a
+server and sends requests for a fixed duration, optionally reusing
+connections when the server allows it. It reports the number of completed
+requests per second and the latency distribution.
+"""
+import asyncio
+import base64
+import os
+import time
+
+
+class LoadError(Exception):
+    pass
+
+
+class Stats:
+    """Latency and throughput statistics collected during a load test."""
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.bytes = 0
+        self.events = 0
+        self.connections = 0
+        self.elapsed = 0
+
+    def percentile(self, p):
+        if not self.latencies:
+            return 0
+        latencies = sorted(self.latencies)
+        index = min(int(len(latencies) * p / 100), len(latencies) - 1)
+        return latencies[index]
+
+    @property
+    def requests(self):
+        return len(self.latencies)
+
+    @property
+    def rps(self):
+        return self.requests / self.elapsed if self.elapsed else 0
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'rps': self.rps,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'bytes': self.bytes,
+            'events': self.events,
+            'connections': self.connections,
+        }
+
+
+class HTTPConnection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port)
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+            self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=b'',
+                      keep_alive=True, on_data=None):
+        """Send a request and read the complete response.
+
+        Returns a tuple with the status code, the size of the body and a flag
+        that indicates if the connection can be reused.
+        """
+        if self.writer is None:
+            await self.connect()
+        lines = ['{} {} HTTP/1.1'.format(method, path),
+                 'Host: {}:{}'.format(self.host, self.port),
+                 'Connection: ' + ('keep-alive' if keep_alive else 'close')]
+        for name, value in (headers or {}).items():
+            lines.append('{}: {}'.format(name, value))
+        if body:
+            lines.append('Content-Length: {}'.format(len(body)))
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise LoadError('connection closed by server')
+        http_version, status = status_line.decode().split(' ', 2)[:2]
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, value = line.decode().split(':', 1)
+            response_headers[name.strip().lower()] = value.strip()
+
+        size = 0
+        reusable = keep_alive and http_version == 'HTTP/1.1' and \
+            response_headers.get('connection', '').lower() != 'close'
+        if 'content-length' in response_headers:
+            remaining = int(response_headers['content-length'])
+            while remaining:
+                data = await self.reader.read(min(remaining, 65536))
+                if not data:
+                    raise LoadError('incomplete response')
+                remaining -= len(data)
+                size += len(data)
+                if on_data:
+                    on_data(data)
+        elif response_headers.get('transfer-encoding') == 'chunked':
+            while True:
+                chunk_size = int((await self.reader.readline()).strip(), 16)
+                data = await self.reader.readexactly(chunk_size + 2)
+                if chunk_size == 0:
+                    break
+                size += chunk_size
+                if on_data:
+                    on_data(data[:-2])
+        else:
+            # the body extends until the server closes the connection
+            while True:
+                data = await self.reader.read(65536)
+                if not data:
+                    break
+                size += len(data)
+                if on_data:
+                    on_data(data)
+            reusable = False
+        if not reusable:
+            await self.close()
+        return int(status), size
+
+
+class WebSocketConnection:
+    def __init__(self, host, port, path):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((
+            'GET {} HTTP/1.1\r\nHost: {}:{}\r\nUpgrade: websocket\r\n'
+            'Connection: Upgrade\r\nSec-WebSocket-Key: {}\r\n'
+            'Sec-WebSocket-Version: 13\r\n\r\n').format(
+                self.path, self.host, self.port, key).encode())
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if b' 101 ' not in status_line:
+            raise LoadError('websocket handshake failed')
+        while (await self.reader.readline()) not in (b'\r\n', b''):
+            pass
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+            self.reader = self.writer = None
+
+    async def echo(self, payload):
+        if self.writer is None:
+            await self.connect()
+        mask = os.urandom(4)
+        header = bytearray([0x82])
+        if len(payload) < 126:
+            header.append(0x80 | len(payload))
+        elif len(payload) < (1 << 16):
+            header.append(0x80 | 126)
+            header.extend(len(payload).to_bytes(2, 'big'))
+        else:
+            header.append(0x80 | 127)
+            header.extend(len(payload).to_bytes(8, 'big'))
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        self.writer.write(bytes(header) + mask + masked)
+        await self.writer.drain()
+        header = await self.reader.readexactly(2)
+        length = header[1] & 0x7f
+        if length == 126:
+            length = int.from_bytes(await self.reader.readexactly(2), 'big')
+        elif length == 127:
+            length = int.from_bytes(await self.reader.readexactly(8), 'big')
+        data = await self.reader.readexactly(length)
+        if data != payload:
+            raise LoadError('websocket echo mismatch')
+        return length
+
+
+async def run_load(host, port, scenario, concurrency=10, duration=5,
+                   keep_alive=True):
+    """Run a load test.
+
+    :param host: the server host.
+    :param port: the server port.
+    :param scenario: a dictionary that describes the requests to send, with
+                     ``method``, ``path``, ``headers`` and ``body`` keys for
+                     HTTP requests, or a ``websocket`` key with the payload to
+                     echo for WebSocket scenarios. A ``sse`` key set to
+                     ``True`` counts server-sent events in the response.
+    :param concurrency: the number of concurrent connections.
+    :param duration: the duration of the test in seconds.
+    :param keep_alive: whether to reuse connections when the server allows
+                       it.
+    """
+    stats = Stats()
+    deadline = time.perf_counter() + duration
+
+    def count_events(data):
+        stats.events += data.count(b'\n\n')
+
+    async def http_worker():
+        conn = HTTPConnection(host, port)
+        on_data = count_events if scenario.get('sse') else None
+        while time.perf_counter() < deadline:
+            new_connection = conn.writer is None
+            start = time.perf_counter()
+            try:
+                status, size = await conn.request(
+                    scenario.get('method', 'GET'), scenario['path'],
+                    headers=scenario.get('headers'),
+                    body=scenario.get('body', b''), keep_alive=keep_alive,
+                    on_data=on_data)
+            except (OSError, LoadError, ValueError):
+                stats.errors += 1
+                await conn.close()
+                continue
+            stats.latencies.append(time.perf_counter() - start)
+            stats.bytes += size
+            stats.connections += new_connection
+            if status >= 400:
+                stats.errors += 1
+        await conn.close()
+
+    async def websocket_worker():
+        conn = WebSocketConnection(host, port, scenario['path'])
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if conn.writer is None:
+                    await conn.connect()
+                    stats.connections += 1
+                size = await conn.echo(scenario['websocket'])
+            except (OSError, LoadError, asyncio.IncompleteReadError):
+                stats.errors += 1
+                await conn.close()
+                continue
+            stats.latencies.append(time.perf_counter() - start)
+            stats.bytes += size
+        await conn.close()
+
+    worker = websocket_worker if 'websocket' in scenario else http_worker
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    stats.elapsed = time.perf_counter() - start
+    return stats
@@ -0,0 +1,286 @@
+"""Per-request memory benchmark for Microdot.
+
+This script measures the memory used by the application while it handles
+requests of different types, and the memory held by idle connections. It runs
+on MicroPython, where memory is measured with ``gc.mem_alloc()``, and on
+CPython, where it is measured with ``tracemalloc``. Requests are handled in
+process with in-memory streams, so the numbers do not include the memory used
+by sockets.
+
+For each scenario two values are reported, in bytes per request:
+
+- peak: the highest amount of memory allocated while the request was handled.
+  On MicroPython the garbage collector is disabled during the request, so this
+  is the total amount of memory allocated by it.
+- retained: the memory that was still in use after the requests ended and a
+  garbage collection was performed, averaged over all the requests.
+
+For idle connections, the retained value is the memory held by each connection
+that has been accepted but has not sent a request yet.
+
+Usage::
+
+    MICROPYPATH=:.frozen:../../src:../../libs/micropython \\
+        ../../bin/micropython membench.py
+    PYTHONPATH=../../src python membench.py
+
+The optional ``--budget <file>`` argument gives a JSON file with the maximum
+values allowed for each implementation and scenario. The default is
+*membench_budget.json*. The script exits with status 1 if any of the budgets
+is exceeded. The ``--count <n>`` argument sets the number of requests measured
+in each scenario.
+"""
+import asyncio
+import gc
+import io
+import json
+import sys
+from microdot import Microdot
+from microdot.multipart import FormDataIter
+from microdot.websocket import with_websocket
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+IDLE_CONNECTIONS = 20
+WEBSOCKET_MESSAGES = 10
+
+app = Microdot()
+
+
+@app.get('/')
+async def index(request):
+    return 'Hello, World!'
+
+
+@app.post('/json')
+async def json_echo(request):
+    return request.json
+
+
+@app.post('/upload')
+async def upload(request):
+    size = 0
+    async for name, value in FormDataIter(request):
+        if not isinstance(value, str):
+            while True:
+                chunk = await value.read(512)
+                if not chunk:
+                    break
+                size += len(chunk)
+    return {'size': size}
+
+
+@app.route('/ws')
+@with_websocket
+async def ws_echo(request, ws):
+    while True:
+        data = await ws.receive()
+        await ws.send(data)
+
+
+class BytesReader:
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+    async def readline(self):
+        return self.stream.readline()
+
+    async def read(self, n=-1):
+        return self.stream.read(n)
+
+    async def readexactly(self, n):
+        return self.stream.read(n)
+
+
+class IdleReader:
+    """Input stream of a connection that does not send anything until the
+    given event is set."""
+    def __init__(self, event):
+        self.event = event
+
+    async def readline(self):
+        await self.event.wait()
+        return b''
+
+
+class NullWriter:
+    """Output stream that only keeps the status code of the response."""
+    def __init__(self):
+        self.status = None
+
+    def get_extra_info(self, name):
+        return ('127.0.0.1', 1234)
+
+    async def awrite(self, data):
+        if self.status is None:
+            self.status = int(data.split(b' ', 2)[1])
+
+    async def aclose(self):
+        pass
+
+
+def memory_in_use():
+    """Return the memory in use after a garbage collection."""
+    gc.collect()
+    if tracemalloc:
+        return tracemalloc.get_traced_memory()[0]
+    return gc.mem_alloc()
+
+
+async def peak_memory(coro):
+    """Run a coroutine and return the peak memory it allocated."""
+    base = memory_in_use()
+    gc.disable()
+    try:
+        if tracemalloc:
+            tracemalloc.reset_peak()
+        await coro
+        if tracemalloc:
+            return tracemalloc.get_traced_memory()[1] - base
+        return gc.mem_alloc() - base
+    finally:
+        gc.enable()
+
+
+def http_request(method, path, headers=None, body=b''):
+    lines = ['{} {} HTTP/1.1'.format(method, path), 'Host: localhost']
+    for name, value in (headers or {}).items():
+        lines.append('{}: {}'.format(name, value))
+    if body:
+        lines.append('Content-Length: {}'.format(len(body)))
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode() + body
+
+
+def websocket_frame(opcode, payload):
+    mask = b'\x01\x02\x03\x04'
+    frame = bytearray([0x80 | opcode, 0x80 | len(payload)])
+    frame.extend(mask)
+    frame.extend(bytes(b ^ mask[i % 4] for i, b in enumerate(payload)))
+    return bytes(frame)
+
+
+def upload_request():
+    boundary = 'membenchboundary'
+    body = (
+        '--{b}\r\nContent-Disposition: form-data; name="description"\r\n\r\n'
+        'memory benchmark\r\n--{b}\r\nContent-Disposition: form-data; '
+        'name="file"; filename="data.bin"\r\nContent-Type: '
+        'application/octet-stream\r\n\r\n'.format(b=boundary).encode()
+        + b'x' * 8192 + '\r\n--{b}--\r\n'.format(b=boundary).encode())
+    return http_request('POST', '/upload', {
+        'Content-Type': 'multipart/form-data; boundary=' + boundary}, body)
+
+
+def websocket_request():
+    data = http_request('GET', '/ws', {
+        'Connection': 'Upgrade', 'Upgrade': 'websocket',
+        'Sec-WebSocket-Key': 'dGhlIHNhbXBsZSBub25jZQ==',
+        'Sec-WebSocket-Version': '13'})
+    for i in range(WEBSOCKET_MESSAGES):
+        data += websocket_frame(1, 'message {}'.format(i).encode())
+    return data + websocket_frame(8, b'')
+
+
+SCENARIOS = [
+    ('get', http_request('GET', '/'), 200),
+    ('json_post', http_request(
+        'POST', '/json', {'Content-Type': 'application/json'},
+        b'{"name": "susan", "tags": ["a", "b", "c"], "count": 42}'), 200),
+    ('multipart_upload', upload_request(), 200),
+    ('websocket', websocket_request(), 101),
+]
+
+
+async def measure_request(data, status, count):
+    for _ in range(2):
+        # the first requests warm up caches
+        await app.handle_request(BytesReader(data), NullWriter())
+
+    # the peak is measured for each request separately
+    peak = 0
+    for _ in range(count):
+        reader = BytesReader(data)
+        writer = NullWriter()
+        peak = max(peak, await peak_memory(
+            app.handle_request(reader, writer)))
+        if writer.status != status:
+            raise RuntimeError('unexpected status code {}'.format(
+                writer.status))
+
+    # the retained memory is measured across all the requests, so that
+    # objects that are freed late by the garbage collector are not counted
+    base = memory_in_use()
+    for _ in range(count):
+        await app.handle_request(BytesReader(data), NullWriter())
+    return peak, max(memory_in_use() - base, 0) // count
+
+
+async def measure_idle_connections(count):
+    event = asyncio.Event()
+    base = memory_in_use()
+    tasks = [asyncio.create_task(app.handle_request(
+        IdleReader(event), NullWriter())) for _ in range(count)]
+    await asyncio.sleep(0)
+    retained = memory_in_use() - base
+    event.set()
+    for task in tasks:
+        await task
+    return retained // count
+
+
+def check_budget(budget, name, peak, retained):
+    errors = []
+    limits = budget.get(name, {})
+    if 'peak' in limits and peak > limits['peak']:
+        errors.append('{}: peak {} > {}'.format(name, peak, limits['peak']))
+    if 'retained' in limits and retained > limits['retained']:
+        errors.append('{}: retained {} > {}'.format(
+            name, retained, limits['retained']))
+    return errors
+
+
+async def run(count, budget):
+    errors = []
+    print('{:<20}{:>12}{:>12}'.format('scenario', 'peak', 'retained'))
+    for name, data, status in SCENARIOS:
+        peak, retained = await measure_request(data, status, count)
+        print('{:<20}{:>12}{:>12}'.format(name, peak, retained))
+        errors += check_budget(budget, name, peak, retained)
+    retained = await measure_idle_connections(IDLE_CONNECTIONS)
+    print('{:<20}{:>12}{:>12}'.format('idle_connection', '-', retained))
+    errors += check_budget(budget, 'idle_connection', 0, retained)
+    return errors
+
+
+def main():
+    args = sys.argv[1:]
+    count = 10
+    budget_file = 'membench_budget.json'
+    while args:
+        arg = args.pop(0)
+        if arg == '--count':
+            count = int(args.pop(0))
+        elif arg == '--budget':
+            budget_file = args.pop(0)
+        else:
+            print('usage: membench.py [--count <n>] [--budget <file>]')
+            sys.exit(2)
+    try:
+        with open(budget_file) as f:
+            budget = json.load(f).get(sys.implementation.name, {})
+    except OSError:
+        budget = {}
+    if tracemalloc:
+        tracemalloc.start()
+    errors = asyncio.run(run(count, budget))
+    for error in errors:
+        print('Budget exceeded: ' + error)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
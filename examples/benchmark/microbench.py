@@ -0,0 +1,494 @@
+"""Micro-benchmarks for the Microdot hot paths.
+
+Each benchmark runs a small operation from the framework's inner loops many
+times and reports the time per operation in nanoseconds, plus the memory
+allocated while the operation runs, as measured by ``tracemalloc``. The peak
+column is the highest amount of memory in use during one operation, and the
+retained column is the memory that was still allocated after the operation
+completed. The garbage collector is disabled while memory is measured, so
+objects that are only freed by a collection, such as reference cycles, show
+as retained memory. The overhead of the measurement itself is subtracted from
+both columns.
+
+Coroutines are driven directly without an event loop, using in-memory streams
+that never block, so that only the framework code is measured.
+
+Usage::
+
+    PYTHONPATH=../../src python -m microbench
+    PYTHONPATH=../../src python -m microbench --save baseline.json
+    PYTHONPATH=../../src python -m microbench --compare baseline.json
+
+When comparing against a baseline, benchmarks that are slower or allocate
+more than the given threshold are flagged, and the exit status is 1.
+"""
+import argparse
+import gc
+import io
+import json
+import sys
+import time
+import tracemalloc
+from microdot import Microdot, Request, Response
+from microdot.microdot import URLPattern, NoCaseDict, Headers, urldecode
+from microdot.multipart import FormDataIter
+from microdot.websocket import WebSocket
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark.
+
+    The decorated function performs any setup work and returns a function
+    without arguments that runs one operation.
+    """
+    def decorator(f):
+        BENCHMARKS[name] = f
+        return f
+    return decorator
+
+
+def run_sync(coro):
+    """Run a coroutine that does not need to wait on I/O to completion."""
+    try:
+        coro.send(None)
+    except StopIteration as exc:
+        return exc.value
+    coro.close()
+    raise RuntimeError('coroutine did not complete synchronously')
+
+
+class BytesReader:
+    """In-memory input stream that can be rewound between operations."""
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+    def rewind(self):
+        self.stream.seek(0)
+
+    async def readline(self):
+        return self.stream.readline()
+
+    async def read(self, n=-1):
+        return self.stream.read(n)
+
+    async def readexactly(self, n):
+        return self.stream.read(n)
+
+
+class NullWriter:
+    """Output stream that discards all the data written to it."""
+    async def awrite(self, data):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+class RouteRequest:
+    """Minimal request object with the attributes used by the router."""
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.url_args = None
+
+
+def route_app(count):
+    app = Microdot()
+    for i in range(count):
+        app.route('/route{}/<int:id>'.format(i))(lambda request, id: '')
+    return app
+
+
+@benchmark('url_pattern_static')
+def bench_url_pattern_static():
+    pattern = URLPattern('/api/users')
+    return lambda: pattern.match('/api/users')
+
+
+@benchmark('url_pattern_dynamic')
+def bench_url_pattern_dynamic():
+    pattern = URLPattern('/users/<int:id>/<name>')
+    return lambda: pattern.match('/users/42/susan')
+
+
+@benchmark('url_pattern_path')
+def bench_url_pattern_path():
+    pattern = URLPattern('/static/<path:path>')
+    return lambda: pattern.match('/static/css/site/main.css')
+
+
+@benchmark('find_route_first')
+def bench_find_route_first():
+    app = route_app(200)
+    req = RouteRequest('GET', '/route0/42')
+    return lambda: app.find_route(req)
+
+
+@benchmark('find_route_last')
+def bench_find_route_last():
+    app = route_app(200)
+    req = RouteRequest('GET', '/route199/42')
+    return lambda: app.find_route(req)
+
+
+@benchmark('find_route_404')
+def bench_find_route_404():
+    app = route_app(200)
+    req = RouteRequest('GET', '/missing')
+    return lambda: app.find_route(req)
+
+
+@benchmark('nocasedict_get')
+def bench_nocasedict_get():
+    d = NoCaseDict({'Content-Type': 'text/plain', 'Content-Length': '12',
+                    'Host': 'example.com', 'User-Agent': 'bench'})
+    return lambda: d.get('Content-Type')
+
+
+@benchmark('nocasedict_get_other_case')
+def bench_nocasedict_get_other_case():
+    d = NoCaseDict({'Content-Type': 'text/plain', 'Content-Length': '12',
+                    'Host': 'example.com', 'User-Agent': 'bench'})
+    return lambda: d.get('content-type')
+
+
+@benchmark('nocasedict_set')
+def bench_nocasedict_set():
+    d = NoCaseDict({'Content-Type': 'text/plain', 'Content-Length': '12'})
+
+    def op():
+        d['content-type'] = 'text/html'
+
+    return op
+
+
+@benchmark('headers_get')
+def bench_headers_get():
+    h = Headers({'Content-Type': 'text/plain', 'Content-Length': '12',
+                 'Host': 'example.com', 'User-Agent': 'bench'})
+    return lambda: h.get('Content-Type')
+
+
+@benchmark('headers_get_other_case')
+def bench_headers_get_other_case():
+    h = Headers({'Content-Type': 'text/plain', 'Content-Length': '12',
+                 'Host': 'example.com', 'User-Agent': 'bench'})
+    return lambda: h.get('content-type')
+
+
+@benchmark('headers_set')
+def bench_headers_set():
+    h = Headers({'Content-Type': 'text/plain', 'Content-Length': '12'})
+
+    def op():
+        h['Content-Type'] = 'text/html'
+
+    return op
+
+
+ASGI_HEADERS = [(b'host', b'example.com'), (b'user-agent', b'bench'),
+                (b'accept', b'*/*'), (b'content-type', b'text/plain'),
+                (b'content-length', b'12')]
+
+
+@benchmark('headers_from_asgi')
+def bench_headers_from_asgi():
+    def op():
+        h = Headers()
+        for key, value in ASGI_HEADERS:
+            h[key.decode()] = value.decode()
+
+    return op
+
+
+@benchmark('nocasedict_from_asgi')
+def bench_nocasedict_from_asgi():
+    def op():
+        d = NoCaseDict()
+        for key, value in ASGI_HEADERS:
+            d[key.decode().title()] = value.decode()
+        return d
+
+    return op
+
+
+@benchmark('urldecode_plain')
+def bench_urldecode_plain():
+    return lambda: urldecode('hello_world')
+
+
+@benchmark('urldecode_escaped')
+def bench_urldecode_escaped():
+    return lambda: urldecode('caf%C3%A9+au+lait%21')
+
+
+@benchmark('urldecode_bytes')
+def bench_urldecode_bytes():
+    return lambda: urldecode(b'caf%C3%A9+au+lait%21')
+
+
+@benchmark('parse_urlencoded')
+def bench_parse_urlencoded():
+    req = Request(None, None, 'GET', '/', '1.0', NoCaseDict())
+    query = 'name=susan&city=San+Francisco&drink=caf%C3%A9&page=2&flag'
+    return lambda: req._parse_urlencoded(query)
+
+
+@benchmark('request_create_get')
+def bench_request_create_get():
+    reader = BytesReader(
+        b'GET /users/42?page=2&sort=name HTTP/1.1\r\n'
+        b'Host: example.com\r\n'
+        b'User-Agent: Mozilla/5.0 (X11; Linux x86_64)\r\n'
+        b'Accept: text/html,application/xhtml+xml\r\n'
+        b'Accept-Encoding: gzip, deflate\r\n'
+        b'Accept-Language: en-US,en;q=0.5\r\n'
+        b'Cookie: session=abc123; theme=dark\r\n'
+        b'Connection: keep-alive\r\n'
+        b'\r\n')
+    writer = NullWriter()
+
+    def op():
+        reader.rewind()
+        return run_sync(Request.create(None, reader, writer, ('addr', 0)))
+
+    return op
+
+
+@benchmark('request_create_post')
+def bench_request_create_post():
+    body = b'name=susan&city=San+Francisco&drink=caf%C3%A9'
+    reader = BytesReader(
+        b'POST /form HTTP/1.1\r\n'
+        b'Host: example.com\r\n'
+        b'Content-Type: application/x-www-form-urlencoded\r\n'
+        b'Content-Length: ' + str(len(body)).encode() + b'\r\n'
+        b'\r\n' + body)
+    writer = NullWriter()
+
+    def op():
+        reader.rewind()
+        return run_sync(Request.create(None, reader, writer, ('addr', 0)))
+
+    return op
+
+
+@benchmark('response_write_text')
+def bench_response_write_text():
+    res = Response('Hello, World!')
+    writer = NullWriter()
+    return lambda: run_sync(res.write(writer))
+
+
+@benchmark('response_write_json')
+def bench_response_write_json():
+    writer = NullWriter()
+    return lambda: run_sync(Response(
+        {'id': 42, 'name': 'susan', 'tags': ['a', 'b', 'c']}).write(writer))
+
+
+@benchmark('websocket_encode_text')
+def bench_websocket_encode_text():
+    return lambda: WebSocket._encode_websocket_frame(
+        WebSocket.TEXT, 'hello websocket')
+
+
+@benchmark('websocket_encode_binary_64k')
+def bench_websocket_encode_binary_64k():
+    payload = b'x' * 65536
+    return lambda: WebSocket._encode_websocket_frame(
+        WebSocket.BINARY, payload)
+
+
+def websocket_reader(payload, masked):
+    frame = bytearray(WebSocket._encode_websocket_frame(
+        WebSocket.BINARY, payload))
+    if masked:
+        mask = b'\x01\x02\x03\x04'
+        offset = len(frame) - len(payload)
+        frame[1] |= 0x80
+        frame[offset:] = mask + bytes(
+            b ^ mask[i % 4] for i, b in enumerate(payload))
+    reader = BytesReader(bytes(frame))
+    req = Request(None, None, 'GET', '/ws', '1.1', NoCaseDict(),
+                  sock=(reader, NullWriter()))
+    return reader, WebSocket(req)
+
+
+@benchmark('websocket_read_frame')
+def bench_websocket_read_frame():
+    reader, ws = websocket_reader(b'x' * 128, False)
+
+    def op():
+        reader.rewind()
+        return run_sync(ws._read_frame())
+
+    return op
+
+
+@benchmark('websocket_read_frame_masked')
+def bench_websocket_read_frame_masked():
+    reader, ws = websocket_reader(b'x' * 128, True)
+
+    def op():
+        reader.rewind()
+        return run_sync(ws._read_frame())
+
+    return op
+
+
+@benchmark('formdata_iter')
+def bench_formdata_iter():
+    boundary = 'benchmarkboundary'
+    body = (
+        '--{b}\r\nContent-Disposition: form-data; name="name"\r\n\r\n'
+        'susan\r\n--{b}\r\nContent-Disposition: form-data; name="city"\r\n'
+        '\r\nSan Francisco\r\n--{b}\r\nContent-Disposition: form-data; '
+        'name="file"; filename="data.bin"\r\nContent-Type: '
+        'application/octet-stream\r\n\r\n'.format(b=boundary).encode()
+        + b'x' * 4096 + '\r\n--{b}--\r\n'.format(b=boundary).encode())
+    reader = BytesReader(body)
+    req = Request(None, None, 'POST', '/upload', '1.1', NoCaseDict({
+        'Content-Type': 'multipart/form-data; boundary=' + boundary,
+        'Content-Length': str(len(body))}), stream=reader)
+
+    async def parse():
+        async for name, value in FormDataIter(req):
+            if not isinstance(value, str):
+                await value.read()
+
+    def op():
+        reader.rewind()
+        run_sync(parse())
+
+    return op
+
+
+def measure_time(op, min_time, repeat=5):
+    """Return the best time per operation in nanoseconds."""
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            op()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time * 1e9 / repeat:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            op()
+        best = min(best, time.perf_counter_ns() - start)
+    return best / number
+
+
+def measure_memory(op, number=200):
+    """Return the average peak and retained bytes per operation."""
+    op()  # warm up any caches
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        peak = 0
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(number):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            op()
+            peak += tracemalloc.get_traced_memory()[1] - current
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+    return peak / number, retained / number
+
+
+def run(names, min_time):
+    results = {}
+    null_peak, null_retained = measure_memory(lambda: None)
+    for name in names:
+        op = BENCHMARKS[name]()
+        ns = measure_time(op, min_time)
+        peak, retained = measure_memory(op)
+        results[name] = {'ns': ns,
+                         'peak_bytes': max(peak - null_peak, 0),
+                         'retained_bytes': max(retained - null_retained, 0)}
+    return results
+
+
+def change(new, old):
+    if old == 0:
+        return 0 if new == 0 else float('inf')
+    return (new - old) * 100 / old
+
+
+def report(results, baseline=None, threshold=10):
+    """Print the results, compared against a baseline if given.
+
+    Returns the names of the benchmarks that regressed.
+    """
+    regressions = []
+    header = '{:<30}{:>12}{:>12}{:>12}'.format(
+        'benchmark', 'ns/op', 'peak B/op', 'kept B/op')
+    if baseline is not None:
+        header += '{:>10}{:>10}'.format('time', 'memory')
+    print(header)
+    for name, result in results.items():
+        line = '{:<30}{:>12.1f}{:>12.1f}{:>12.1f}'.format(
+            name, result['ns'], result['peak_bytes'],
+            result['retained_bytes'])
+        if baseline is not None and name in baseline:
+            time_change = change(result['ns'], baseline[name]['ns'])
+            memory_change = change(result['peak_bytes'],
+                                   baseline[name]['peak_bytes'])
+            line += '{:>+9.1f}%{:>+9.1f}%'.format(time_change, memory_change)
+            if time_change > threshold or memory_change > threshold:
+                line += '  <-- regression'
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('names', nargs='*',
+                        help='benchmarks to run (default: all)')
+    parser.add_argument('--list', action='store_true',
+                        help='list the available benchmarks')
+    parser.add_argument('--min-time', type=float, default=0.5,
+                        help='minimum time spent timing each benchmark, in '
+                        'seconds')
+    parser.add_argument('--save', help='save the results to a JSON file')
+    parser.add_argument('--compare',
+                        help='compare the results against a JSON file saved '
+                        'with --save')
+    parser.add_argument('--threshold', type=float, default=10,
+                        help='percentage increase in time or memory that is '
+                        'reported as a regression')
+    args = parser.parse_args()
+
+    if args.list:
+        print('\n'.join(BENCHMARKS))
+        return
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error('unknown benchmark: ' + name)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    results = run(args.names or list(BENCHMARKS), args.min_time)
+    regressions = report(results, baseline, args.threshold)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""Long running memory soak test for Microdot.
+
+This script handles a large number of requests in process, cycling through a
+mix of request types, and periodically reports the free memory and the size of
+the largest block of memory that can be allocated. When the largest block is
+much smaller than the free memory, the heap is fragmented, and large
+allocations may fail even though there is enough free memory for them.
+
+The test is designed to run on MicroPython with a small heap, to reproduce the
+conditions of a microcontroller::
+
+    MICROPYPATH=:.frozen:../../src:../../libs/micropython \\
+        ../../bin/micropython -X heapsize=256K soak.py
+
+Compiling the Microdot source files needs a large amount of memory, so to test
+with smaller heaps a bundle of precompiled modules built with
+*tools/bundle.py* can be added to ``MICROPYPATH`` instead of the *src*
+directory.
+
+The optional arguments are:
+
+- ``--requests <n>``: the number of requests to handle (default: 20000).
+- ``--report <n>``: how often to report the memory state (default: 2000).
+- ``--pool``: stream files with a preallocated
+  :class:`BufferPool <microdot.buffer_pool.BufferPool>`.
+- ``--min-block <ratio>``: the minimum size of the largest allocatable block
+  at the end of the test, as a fraction of its size at the start (default:
+  0.75). The script exits with status 1 if the heap has become more
+  fragmented than that.
+
+The script also runs on CPython, but there the free memory is not limited and
+only the number of requests per second is meaningful.
+"""
+import asyncio
+import gc
+import io
+import os
+import sys
+import time
+from microdot import Microdot, Response
+from microdot.buffer_pool import BufferPool
+from microdot.microdot import default_buffer_size
+
+FILE_NAME = 'soak.bin'
+FILE_SIZE = 8192
+
+app = Microdot()
+
+
+@app.get('/')
+async def index(request):
+    return 'Hello, World!'
+
+
+@app.post('/json')
+async def json_echo(request):
+    return request.json
+
+
+@app.get('/file')
+async def file(request):
+    return Response.send_file(FILE_NAME)
+
+
+@app.get('/query')
+async def query(request):
+    return {'a': request.args.get('a'), 'b': request.args.getlist('b')}
+
+
+class BytesReader:
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+    async def readline(self):
+        return self.stream.readline()
+
+    async def read(self, n=-1):
+        return self.stream.read(n)
+
+    async def readexactly(self, n):
+        return self.stream.read(n)
+
+
+class NullWriter:
+    """Output stream that only keeps the status code of the response."""
+    def __init__(self):
+        self.status = None
+
+    def get_extra_info(self, name):
+        return ('127.0.0.1', 1234)
+
+    async def awrite(self, data):
+        if self.status is None:
+            self.status = int(bytes(data[9:12]))
+
+    async def aclose(self):
+        pass
+
+
+def http_request(method, path, headers=None, body=b''):
+    lines = ['{} {} HTTP/1.1'.format(method, path), 'Host: localhost',
+             'User-Agent: soak-test', 'Accept: */*']
+    for name, value in (headers or {}).items():
+        lines.append('{}: {}'.format(name, value))
+    if body:
+        lines.append('Content-Length: {}'.format(len(body)))
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode() + body
+
+
+REQUESTS = [
+    http_request('GET', '/'),
+    http_request('POST', '/json', {'Content-Type': 'application/json'},
+                 b'{"name": "susan", "tags": ["a", "b", "c"], "count": 42}'),
+    http_request('GET', '/file'),
+    http_request('GET', '/query?a=1&b=2&b=3'),
+]
+
+
+def largest_block(limit):
+    """Return the size of the largest block of memory that can be allocated,
+    up to the given limit."""
+    gc.collect()
+    low, high = 0, limit
+    while high - low > 64:
+        size = (low + high) // 2
+        try:
+            bytearray(size)
+        except MemoryError:
+            high = size
+        else:
+            low = size
+    return low
+
+
+def memory_state():
+    gc.collect()
+    if hasattr(gc, 'mem_free'):
+        free = gc.mem_free()
+        return free, largest_block(free)
+    return 0, 0
+
+
+def report(count, elapsed):
+    free, block = memory_state()
+    print('{:>10}{:>12}{:>14}{:>10.2f}{:>10.0f}'.format(
+        count, free, block, block / free if free else 1,
+        count / elapsed if elapsed else 0))
+    return block
+
+
+async def handle(data):
+    writer = NullWriter()
+    await app.handle_request(BytesReader(data), writer)
+    if writer.status != 200:
+        raise RuntimeError('unexpected status code {}'.format(writer.status))
+
+
+async def run(total, every):
+    # modules and caches that are loaded on first use are initialized
+    # before the initial measurement
+    for data in REQUESTS:
+        await handle(data)
+    print('{:>10}{:>12}{:>14}{:>10}{:>10}'.format(
+        'requests', 'free', 'largest block', 'ratio', 'req/s'))
+    initial = report(0, 0)
+    block = initial
+    start = time.time()
+    for i in range(total):
+        await handle(REQUESTS[i % len(REQUESTS)])
+        if (i + 1) % every == 0:
+            block = report(i + 1, time.time() - start)
+    return block / initial if initial else 1
+
+
+def main():
+    args = sys.argv[1:]
+    total = 20000
+    every = 2000
+    min_block = 0.75
+    while args:
+        arg = args.pop(0)
+        if arg == '--requests':
+            total = int(args.pop(0))
+        elif arg == '--report':
+            every = int(args.pop(0))
+        elif arg == '--pool':
+            Response.buffer_pool = BufferPool(
+                size=Response.send_file_buffer_size or default_buffer_size(),
+                count=2)
+        elif arg == '--min-block':
+            min_block = float(args.pop(0))
+        else:
+            print('usage: soak.py [--requests <n>] [--report <n>] [--pool] '
+                  '[--min-block <ratio>]')
+            sys.exit(2)
+    with open(FILE_NAME, 'wb') as f:
+        for _ in range(FILE_SIZE // 1024):
+            f.write(b'x' * 1024)
+    try:
+        ratio = asyncio.run(run(total, every))
+    finally:
+        os.remove(FILE_NAME)
+    if ratio < min_block:
+        print('Heap fragmented: largest block is {:.0f}% of its initial '
+              'size'.format(ratio * 100))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Import time and startup memory benchmark for Microdot.
+
+This script starts a new interpreter for each test, imports Microdot modules
+or starts a small application, and reports how long that took and how much
+memory was allocated, measured with ``tracemalloc`` on CPython and with
+``gc.mem_alloc()`` on MicroPython. The total time taken by the interpreter
+process, including its own start up, is also reported.
+
+Each test is repeated several times and the median values are reported. The
+optional arguments are the number of repetitions (default: 10) and the
+runtimes to test (``cpython``, ``micropython`` or both).
+
+Example::
+
+    python startup.py 20 cpython micropython
+"""
+import os
+import subprocess
+import sys
+import time
+
+RUNTIMES = {
+    'cpython': ([sys.executable], {'PYTHONPATH': '../../src'}),
+    'micropython': (
+        ['../../bin/micropython'],
+        {'MICROPYPATH': ':.frozen:../../src:../../libs/micropython'},
+    ),
+}
+
+HARNESS = '''
+import gc
+try:
+    from time import ticks_us, ticks_diff
+except ImportError:
+    from time import perf_counter_ns
+
+    def ticks_us():
+        return perf_counter_ns() // 1000
+
+    def ticks_diff(a, b):
+        return a - b
+try:
+    import tracemalloc
+    tracemalloc.start()
+
+    def memory():
+        return tracemalloc.get_traced_memory()[0]
+except ImportError:
+    memory = gc.mem_alloc
+gc.collect()
+m0 = memory()
+t0 = ticks_us()
+{code}
+t1 = ticks_us()
+gc.collect()
+print(ticks_diff(t1, t0), memory() - m0)
+'''
+
+HELLO_APP = '''
+import asyncio
+from microdot import Microdot, AsyncBytesIO
+
+app = Microdot()
+
+
+@app.route('/')
+async def index(request):
+    return {'hello': 'world'}
+
+
+class Writer(AsyncBytesIO):
+    def get_extra_info(self, name):
+        return ('127.0.0.1', 1234)
+
+
+asyncio.run(app.handle_request(
+    AsyncBytesIO(b'GET / HTTP/1.0\\r\\n\\r\\n'), Writer(b'')))
+'''
+
+TESTS = [
+    ('import microdot', 'import microdot', None),
+    ('import session', 'import microdot.session', None),
+    ('import sse', 'import microdot.sse', None),
+    ('import websocket', 'import microdot.websocket', None),
+    ('import asgi', 'import microdot.asgi', 'cpython'),
+    ('import wsgi', 'import microdot.wsgi', 'cpython'),
+    ('first request', HELLO_APP, None),
+]
+
+
+def run_test(runtime, code):
+    cmd, env = RUNTIMES[runtime]
+    start = time.perf_counter()
+    output = subprocess.check_output(
+        cmd + ['-c', HARNESS.format(code=code)],
+        env={**os.environ, **env})
+    elapsed = time.perf_counter() - start
+    us, mem = output.decode().split()[-2:]
+    return int(us), int(mem), elapsed
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    count = 10
+    runtimes = []
+    for arg in sys.argv[1:]:
+        if arg in RUNTIMES:
+            runtimes.append(arg)
+        else:
+            count = int(arg)
+    runtimes = runtimes or list(RUNTIMES)
+    print('{:<14}{:<18}{:>10}{:>12}{:>12}'.format(
+        'runtime', 'test', 'time ms', 'memory', 'process ms'))
+    for runtime in runtimes:
+        for name, code, only in TESTS:
+            if only and only != runtime:
+                continue
+            results = [run_test(runtime, code) for _ in range(count)]
+            print('{:<14}{:<18}{:>10.2f}{:>12}{:>12.1f}'.format(
+                runtime, name, median([r[0] for r in results]) / 1000,
+                median([r[1] for r in results]),
+                median([r[2] for r in results]) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 from microdot.microdot import Microdot, Request, Response, abort, redirect, \
-    send_file, URLPattern, AsyncBytesIO, iscoroutine  # noqa: F401
+    send_file, URLPattern, AsyncBytesIO, Headers, \
+    iscoroutine  # noqa: F401
 
 __version__ = '2.6.2'
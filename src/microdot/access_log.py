@@ -0,0 +1,220 @@
+import asyncio
+import sys
+from time import gmtime, time
+from microdot import microdot
+from microdot.microdot import ticks_diff
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct',
+          'Nov', 'Dec']
+
+
+class AccessLog:
+    """Buffered access log.
+
+    :param app: The application instance.
+    :param format: The format of the log lines. Supported formats are
+                   ``'common'`` (the Common Log Format), ``'combined'`` (the
+                   Combined Log Format) and ``'json'``. In the ``common`` and
+                   ``combined`` formats the request latency is appended at the
+                   end of the line, in microseconds. The default is
+                   ``'common'``.
+    :param stream: The file-like object where the log is written. The default
+                   is ``sys.stdout``.
+    :param buffer_size: The maximum number of log records that are held in
+                        memory while they wait to be written. When the buffer
+                        is full, new records are dropped. The default is 128.
+    :param flush_interval: The interval in seconds at which buffered records
+                           are written. The default is 1 second.
+    :param use_thread: If ``True``, log records are written from a thread, so
+                       that a slow log stream does not block the server. If
+                       ``False``, records are written directly from a
+                       background task. The default is ``None``, which uses a
+                       thread when the platform supports it.
+
+    Log records are added to an in-memory buffer when a response has been
+    sent, and a background task writes them in batches. Records are never
+    allowed to delay requests. If the buffer is full when a request ends, the
+    record for the request is dropped and the :attr:`dropped` counter is
+    incremented. The records that are still in the buffer when the web server
+    shuts down are written before it stops.
+    """
+    formats = ['common', 'combined', 'json']
+
+    def __init__(self, app=None, format='common', stream=None,
+                 buffer_size=128, flush_interval=1, use_thread=None):
+        if format not in self.formats:
+            raise ValueError('invalid access log format')
+        self.format = format
+        self.stream = stream or sys.stdout
+        self.buffer = [None] * buffer_size
+        self.start = 0
+        self.count = 0
+        self.flush_interval = flush_interval
+        self.use_thread = use_thread
+        #: The number of log records that were dropped because the buffer was
+        #: full.
+        self.dropped = 0
+        #: The number of log records that were written.
+        self.written = 0
+        self.task = None
+        if app is not None:
+            self.initialize(app)
+
+    def initialize(self, app):
+        """Initialize the access log.
+
+        :param app: The application instance.
+        """
+        app.profile(self._profile)
+        app.after_request(self._capture_response)
+        app.after_error_request(self._capture_response)
+        app.on_shutdown(self.close)
+
+    def _capture_response(self, request, response):
+        request.g._access_log_response = response
+
+    def _profile(self, request, phase, ticks):
+        if phase == 'start':
+            request.g._access_log_start = ticks
+        elif phase == 'write':
+            response = getattr(request.g, '_access_log_response', None)
+            start = getattr(request.g, '_access_log_start', ticks)
+            status = size = '-'
+            if response:
+                status = response.status_code
+                size = response.headers.get('Content-Length', '-')
+            elif request.method in ('GET', 'HEAD'):
+                # constant responses are sent without running the after
+                # request handlers, so their details are taken from the
+                # serialized response
+                static = request.app.static_responses.get(request.path)
+                if static:
+                    status = static[2]
+                    size = len(static[0]) - len(static[1])
+            version = request.http_version
+            if version.startswith('HTTP/'):
+                # the ASGI and WSGI adapters include the protocol name
+                version = version[5:]
+            self.log(
+                (request.client_addr[0] if request.client_addr else '-',
+                 time(), request.method, request.url, version,
+                 status, size,
+                 request.headers.get('Referer', '-'),
+                 request.headers.get('User-Agent', '-'),
+                 ticks_diff(ticks, start)))
+
+    def log(self, record):
+        """Add a record to the log buffer.
+
+        :param record: A tuple with the client address, timestamp, method,
+                       URL, HTTP version, status code, response size, referer,
+                       user agent and latency in microseconds.
+
+        This method is called automatically at the end of each request, so
+        applications do not normally need to call it.
+        """
+        size = len(self.buffer)
+        if self.count == size:
+            self.dropped += 1
+            return
+        self.buffer[(self.start + self.count) % size] = record
+        self.count += 1
+        if self.task is None:
+            if hasattr(asyncio, 'get_running_loop'):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    # the event loop is not running, which happens when the
+                    # request ends under a WSGI server, so the records are
+                    # written directly
+                    self._write_records()
+                    return
+            self.task = asyncio.create_task(self._flush_task())
+
+    def format_record(self, record):
+        """Format a log record as a line of text.
+
+        :param record: The log record to format.
+        """
+        addr, timestamp, method, url, version, status, size, referer, \
+            user_agent, latency = record
+        t = gmtime(int(timestamp))
+        if self.format == 'json':
+            line = (microdot.json or microdot.import_json()).dumps({
+                'remote_addr': addr,
+                'time': '{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}Z'.format(
+                    *t[:6]),
+                'method': method, 'url': url, 'http_version': version,
+                'status': status, 'bytes': size, 'referer': referer,
+                'user_agent': user_agent, 'latency_us': latency})
+            if isinstance(line, bytes):
+                line = line.decode()
+            return line
+        line = '{} - - [{:02d}/{}/{:04d}:{:02d}:{:02d}:{:02d} +0000] ' \
+            '"{} {} HTTP/{}" {} {}'.format(
+                addr, t[2], MONTHS[t[1] - 1], t[0], t[3], t[4], t[5], method,
+                url, version, status, size)
+        if self.format == 'combined':
+            line += ' "{}" "{}"'.format(referer, user_agent)
+        return line + ' {}'.format(latency)
+
+    async def flush(self):
+        """Write all the buffered records to the log stream.
+
+        This method is a coroutine.
+        """
+        lines = self._pop_lines()
+        if not lines:
+            return
+        data = '\n'.join(lines) + '\n'
+        loop = asyncio.get_running_loop() \
+            if hasattr(asyncio, 'get_running_loop') else None
+        use_thread = self.use_thread
+        if use_thread is None:
+            use_thread = hasattr(loop, 'run_in_executor')
+        if use_thread:
+            await loop.run_in_executor(None, self._write, data)
+        else:
+            self._write(data)
+        self.written += len(lines)
+
+    async def close(self):
+        """Write the buffered records and stop the background task that
+        writes them.
+
+        This method is a coroutine. It is called automatically when the web
+        server shuts down, so that the records of the last requests are not
+        lost.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        await self.flush()
+
+    def _pop_lines(self):
+        lines = []
+        size = len(self.buffer)
+        while self.count:
+            lines.append(self.format_record(self.buffer[self.start]))
+            self.buffer[self.start] = None
+            self.start = (self.start + 1) % size
+            self.count -= 1
+        return lines
+
+    def _write_records(self):
+        lines = self._pop_lines()
+        self._write('\n'.join(lines) + '\n')
+        self.written += len(lines)
+
+    def _write(self, data):
+        self.stream.write(data)
+        if hasattr(self.stream, 'flush'):
+            self.stream.flush()
+
+    async def _flush_task(self):
+        try:
+            while self.count:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+        finally:
+            self.task = None
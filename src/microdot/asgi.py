@@ -3,8 +3,7 @@ import os
 import signal
 from microdot import *  # noqa: F401, F403
 from microdot.microdot import Microdot as BaseMicrodot, Request, Response, \
-    NoCaseDict, abort
-from microdot.websocket import WebSocket as BaseWebSocket, websocket_wrapper
+    Headers, abort, invoke_handler, ticks_us
 
 
 class _BodyStream:  # pragma: no cover
@@ -67,6 +66,8 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
             message = await receive()
             if message['type'] == 'lifespan.startup':
                 try:
+                    if self.route_index is None:
+                        self.compile()
                     if self.lifespan_startup:
                         await self.lifespan_startup(scope)
                 except Exception as e:
@@ -76,6 +77,10 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
                     await send({'type': 'lifespan.startup.complete'})
             elif message['type'] == 'lifespan.shutdown':  # pragma: no branch
                 try:
+                    if self.background_tasks is not None:
+                        await self.background_tasks.shutdown()
+                    for handler in self.shutdown_handlers:
+                        await invoke_handler(handler)
                     if self.lifespan_shutdown:
                         await self.lifespan_shutdown(scope)
                 except Exception as e:
@@ -91,28 +96,24 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
             return await self.handle_lifespan(scope, receive, send)
         if scope['type'] not in ['http', 'websocket']:  # pragma: no cover
             return
+        if self.profile_handlers:
+            start = ticks_us()
         path = scope['path']
         if 'query_string' in scope and scope['query_string']:
             path += '?' + scope['query_string'].decode()
-        headers = NoCaseDict()
-        content_length = 0
-        for key, value in scope.get('headers', []):
-            key = key.decode().title()
-            headers[key] = value.decode()
-            if key == 'Content-Length':
-                content_length = int(value)
-
-        if content_length and content_length <= Request.max_body_length:
-            body = b''
-            more = True
-            while more:
-                packet = await receive()
-                body += packet.get('body', b'')
-                more = packet.get('more_body', False)
-            stream = None
-        else:
-            body = b''
-            stream = _BodyStream(receive)
+        headers = Headers()
+        for name, value in scope.get('headers', []):
+            # repeated headers are combined as in the Microdot web server
+            name = name.decode()
+            if name in headers:
+                headers._combine(name, value.decode())
+            else:
+                headers[name] = value.decode()
+        content_length = int(headers.get('Content-Length', 0))
+
+        # the body is read once the request is routed
+        body = None if content_length else b''
+        stream = _BodyStream(receive)
 
         req = Request(
             self,
@@ -126,6 +127,9 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
             sock=(receive, send),
             scheme=scope.get('scheme'))
         req.asgi_scope = scope
+        if self.profile_handlers:
+            self.profile_request(req, 'start', start)
+            self.profile_request(req, 'parse')
 
         res = await self.dispatch_request(req)
         res.complete()
@@ -165,6 +169,10 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
                 res_body = await body_iter.__anext__()
                 if isinstance(res_body, str):
                     res_body = res_body.encode()
+                elif not isinstance(res_body, bytes):
+                    # memory mapped files and buffer pools return
+                    # memoryview and bytearray chunks
+                    res_body = bytes(res_body)
                 await send({'type': 'http.response.body',
                             'body': res_body,
                             'more_body': True})
@@ -177,6 +185,9 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
             await body_iter.aclose()
         cancelled = True
         await monitor_task
+        if self.profile_handlers:
+            self.profile_request(req, 'write')
+        self.submit_background_tasks(req)
 
     async def __call__(self, scope, receive, send):
         return await self.asgi_app(scope, receive, send)
@@ -198,36 +209,50 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
         super().run(host=host, port=port, debug=debug, **options)
 
 
-class WebSocket(BaseWebSocket):  # pragma: no cover
-    async def handshake(self):
-        connect = await self.request.sock[0]()
-        if connect['type'] != 'websocket.connect':
-            abort(400)
-        await self.request.sock[1]({'type': 'websocket.accept'})
-
-    async def receive(self):
-        message = await self.request.sock[0]()
-        if message['type'] == 'websocket.disconnect':
-            raise OSError(32, 'Websocket connection closed')
-        elif message['type'] != 'websocket.receive':
-            raise OSError(32, 'Websocket message type not supported')
-        return message.get('bytes', message.get('text'))
-
-    async def send(self, data):
-        if isinstance(data, str):
-            await self.request.sock[1](
-                {'type': 'websocket.send', 'text': data})
-        else:
-            await self.request.sock[1](
-                {'type': 'websocket.send', 'bytes': data})
+def __getattr__(name):  # pragma: no cover
+    # the WebSocket support is imported when it is first used, so that
+    # applications that do not need it start faster
+    if name != 'WebSocket':
+        raise AttributeError('module {!r} has no attribute {!r}'.format(
+            __name__, name))
+    if 'WebSocket' in globals():
+        return globals()['WebSocket']
+    from microdot.websocket import WebSocket as BaseWebSocket
+
+    class WebSocket(BaseWebSocket):
+        async def handshake(self):
+            connect = await self.request.sock[0]()
+            if connect['type'] != 'websocket.connect':
+                abort(400)
+            await self.request.sock[1]({'type': 'websocket.accept'})
+
+        async def receive(self):
+            message = await self.request.sock[0]()
+            if message['type'] == 'websocket.disconnect':
+                raise OSError(32, 'Websocket connection closed')
+            elif message['type'] != 'websocket.receive':
+                raise OSError(32, 'Websocket message type not supported')
+            return message.get('bytes', message.get('text'))
+
+        async def send(self, data):
+            if isinstance(data, str):
+                await self.request.sock[1](
+                    {'type': 'websocket.send', 'text': data})
+            else:
+                await self.request.sock[1](
+                    {'type': 'websocket.send', 'bytes': data})
+
+        async def close(self):
+            if not self.closed:
+                self.closed = True
+                try:
+                    await self.request.sock[1]({'type': 'websocket.close'})
+                except:  # noqa E722
+                    pass
 
-    async def close(self):
-        if not self.closed:
-            self.closed = True
-            try:
-                await self.request.sock[1]({'type': 'websocket.close'})
-            except:  # noqa E722
-                pass
+    WebSocket.__qualname__ = 'WebSocket'
+    globals()['WebSocket'] = WebSocket
+    return WebSocket
 
 
 async def websocket_upgrade(request):  # pragma: no cover
@@ -246,8 +271,9 @@ async def websocket_upgrade(request):  # pragma: no cover
                 message = await ws.receive()
                 await ws.send(message)
     """
-    ws = WebSocket(request) if not request.app.embedded_server else \
-        BaseWebSocket(request)
+    from microdot.websocket import WebSocket as BaseWebSocket
+    ws = __getattr__('WebSocket')(request) \
+        if not request.app.embedded_server else BaseWebSocket(request)
     await ws.handshake()
 
     @request.after_request
@@ -271,4 +297,5 @@ def with_websocket(f):  # pragma: no cover
                 message = await ws.receive()
                 await ws.send(message)
     """
+    from microdot.websocket import websocket_wrapper
     return websocket_wrapper(f, websocket_upgrade)
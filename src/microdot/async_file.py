@@ -0,0 +1,90 @@
+import asyncio
+
+
+class AsyncFile:
+    """An asynchronous wrapper for a file object.
+
+    :param file: The file object to wrap.
+
+    On CPython, the reads and writes run in a thread pool that is dedicated to
+    file operations, so that a slow disk does not block the event loop. After
+    a read that returns the requested number of bytes, the next chunk of the
+    same size is read in the background. Writes that are smaller than
+    :attr:`min_thread_size <AsyncFile.min_thread_size>` are done directly,
+    because for them the hop to the thread pool costs more than the write
+    itself. On MicroPython, which does not have threads that can be used for
+    this, the file is always accessed directly.
+    """
+    #: The maximum number of threads used for file operations.
+    max_workers = 4
+
+    #: The minimum size of a write that runs in the thread pool.
+    min_thread_size = 16 * 1024
+
+    _executor = None
+
+    def __init__(self, file):
+        self.file = file
+        self._ahead = None
+        self._extra = b''
+
+    @classmethod
+    def threaded(cls):
+        """Return ``True`` if file operations run in a thread pool."""
+        if cls._executor is None:
+            try:
+                from concurrent.futures import ThreadPoolExecutor
+            except ImportError:  # pragma: no cover
+                cls._executor = False
+            else:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=cls.max_workers,
+                    thread_name_prefix='microdot-io')
+        return cls._executor is not False
+
+    async def _run(self, func, *args):
+        if not self.threaded():  # pragma: no cover
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, func, *args)
+
+    async def _wait(self):
+        # wait for a background read to end and return its data
+        data = self._extra
+        self._extra = b''
+        if self._ahead is not None:
+            ahead = self._ahead
+            self._ahead = None
+            data += await ahead
+        return data
+
+    async def read(self, n=-1):
+        data = await self._wait()
+        if n is None or n < 0:
+            return data + await self._run(self.file.read)
+        if len(data) > n:
+            self._extra = data[n:]
+            return data[:n]
+        if len(data) < n:
+            data += await self._run(self.file.read, n - len(data))
+        if len(data) == n and n > 0 and self.threaded():
+            # read the next chunk while this one is being used
+            self._ahead = asyncio.get_running_loop().run_in_executor(
+                self._executor, self.file.read, n)
+        return data
+
+    async def write(self, data):
+        if len(data) < self.min_thread_size:
+            return self.file.write(data)
+        return await self._run(self.file.write, data)
+
+    async def seek(self, offset, whence=0):
+        await self._wait()
+        return await self._run(self.file.seek, offset, whence)
+
+    async def close(self):
+        try:
+            await self._wait()
+        except Exception:  # pragma: no cover
+            pass
+        await self._run(self.file.close)
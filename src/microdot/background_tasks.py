@@ -0,0 +1,103 @@
+import asyncio
+from microdot.microdot import invoke_handler, print_exception, ticks_us, \
+    ticks_diff
+
+
+class BackgroundTasks:
+    """A bounded pool of workers that run tasks in the background.
+
+    :param max_workers: The maximum number of tasks that run at the same
+                        time.
+    :param max_queue: The maximum number of tasks that can wait for a worker.
+                      Tasks that are submitted while the queue is full are
+                      dropped.
+
+    Each application has an instance of this class in its
+    ``background_tasks`` attribute, which runs the functions registered with
+    :meth:`Request.after_response() <microdot.Request.after_response>`. The
+    instance is created when the first task is submitted, unless the
+    application assigns one earlier. The ``queued``, ``running``,
+    ``completed``, ``failed`` and ``dropped`` attributes can be used to
+    monitor the pool.
+    """
+    #: The number of seconds the web server waits for the background tasks to
+    #: end when it shuts down.
+    shutdown_timeout = 10
+
+    def __init__(self, max_workers=2, max_queue=64):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue = []
+        self.workers = []
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def queued(self):
+        """The number of tasks that are waiting for a worker."""
+        return len(self.queue)
+
+    @property
+    def running(self):
+        """The number of active workers."""
+        return len(self.workers)
+
+    def submit(self, f, *args, **kwargs):
+        """Submit a task.
+
+        :param f: The function to run. It can be a regular function or a
+                  coroutine function. Regular functions run in a thread on
+                  CPython, as route functions do.
+        :param args: Positional arguments for the function.
+        :param kwargs: Keyword arguments for the function.
+
+        Returns ``True`` if the task was queued, or ``False`` if it was
+        dropped because the queue is full. This method must be called while
+        the event loop is running.
+        """
+        if len(self.queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+        self.queue.append((f, args, kwargs))
+        if len(self.workers) < self.max_workers:
+            self.workers.append(asyncio.create_task(self._worker()))
+        return True
+
+    async def _worker(self):
+        try:
+            while self.queue:
+                f, args, kwargs = self.queue.pop(0)
+                try:
+                    await invoke_handler(f, *args, **kwargs)
+                    self.completed += 1
+                except Exception as exc:
+                    print_exception(exc)
+                    self.failed += 1
+        finally:
+            self.workers.remove(asyncio.current_task())
+
+    async def drain(self, timeout=None):
+        """Wait for the queued and running tasks to end.
+
+        :param timeout: The maximum number of seconds to wait, or ``None`` to
+                        wait for as long as necessary.
+
+        Returns ``True`` if all the tasks ended, or ``False`` if the timeout
+        expired first.
+        """
+        start = ticks_us()
+        while self.workers:
+            if timeout is not None and \
+                    ticks_diff(ticks_us(), start) >= timeout * 1000000:
+                return False
+            await asyncio.sleep(0.01)
+        return True
+
+    async def shutdown(self):
+        """Wait for the queued and running tasks to end, for up to
+        :attr:`shutdown_timeout` seconds.
+
+        This method is called by the web server when it shuts down.
+        """
+        return await self.drain(self.shutdown_timeout)
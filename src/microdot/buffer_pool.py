@@ -0,0 +1,30 @@
+class BufferPool:
+    """A pool of reusable buffers.
+
+    :param size: The size of each buffer, in bytes.
+    :param count: The number of buffers to preallocate. This is also the
+                  maximum number of free buffers kept in the pool.
+
+    The buffers are allocated when the pool is created, which should be done
+    early, while the memory is not fragmented. When all the buffers are in
+    use, new ones are allocated, and are kept when released if there is room
+    for them in the pool.
+    """
+    def __init__(self, size=1024, count=2):
+        self.size = size
+        self.count = count
+        self.free = [bytearray(size) for _ in range(count)]
+
+    def acquire(self):
+        """Return a buffer from the pool."""
+        if self.free:
+            return self.free.pop()
+        return bytearray(self.size)
+
+    def release(self, buf):
+        """Return a buffer to the pool.
+
+        :param buf: The buffer, which must not be used after it is returned.
+        """
+        if len(self.free) < self.count and len(buf) == self.size:
+            self.free.append(buf)
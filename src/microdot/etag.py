@@ -0,0 +1,159 @@
+import binascii
+try:
+    from hashlib import sha1 as _hash
+except ImportError:  # pragma: no cover
+    from hashlib import sha256 as _hash
+from microdot import Response
+from microdot.microdot import invoke_handler
+from microdot.helpers import wraps
+
+
+class ETag:
+    """Add ``ETag`` headers to responses and answer conditional requests.
+
+    :param app: The application to add ETags to.
+    :param weak: If set to ``True``, weak ETags are generated.
+
+    The ETag of a response is calculated from a hash of its body. When the
+    ``If-None-Match`` header of the request includes the ETag of the response,
+    the body is dropped and a 304 response is sent to the client instead.
+    Only ``GET`` and ``HEAD`` requests that return a 200 response with a body
+    that is given as bytes, a string, or a dictionary or list that is encoded
+    as JSON are handled. Responses that already have an ``ETag`` header are
+    not hashed, but are still compared against ``If-None-Match``.
+
+    Example::
+
+        from microdot.etag import ETag
+
+        app = Microdot()
+        etag = ETag(app)
+    """
+    def __init__(self, app=None, weak=False):
+        self.weak = weak
+        if app is not None:
+            self.initialize(app)
+
+    def initialize(self, app):
+        """Initialize the ETag object for the given application.
+
+        :param app: The application to add ETags to.
+        """
+        app.after_request(self.after_request)
+
+    def make_etag(self, value):
+        """Return an ETag for the given value.
+
+        :param value: The value to include in the ETag, as bytes or string.
+                      The value must not contain double quotes.
+        """
+        if isinstance(value, bytes):
+            value = value.decode()
+        etag = '"' + value + '"'
+        return 'W/' + etag if self.weak else etag
+
+    def hash(self, body):
+        """Return the ETag for a response body.
+
+        :param body: The body of the response, as bytes.
+        """
+        return self.make_etag(binascii.hexlify(_hash(body).digest()))
+
+    def matches(self, request, etag):
+        """Check if an ETag is included in the ``If-None-Match`` header of a
+        request.
+
+        :param request: The request object.
+        :param etag: The ETag to check.
+
+        The weak comparison function is used, so a weak ETag matches a strong
+        ETag with the same value.
+        """
+        if_none_match = request.headers.get('If-None-Match')
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        etag = etag[2:] if etag.startswith('W/') else etag
+        for value in if_none_match.split(','):
+            value = value.strip()
+            if value.startswith('W/'):
+                value = value[2:]
+            if value == etag:
+                return True
+        return False
+
+    def not_modified(self, etag, response=None):
+        """Return a 304 response for the given ETag.
+
+        :param etag: The ETag of the resource.
+        :param response: The response that is replaced, from which the
+                         headers are copied.
+        """
+        res = Response(None, 304, response.headers if response else None)
+        if 'Content-Length' in res.headers:
+            del res.headers['Content-Length']
+        res.headers['ETag'] = etag
+        return res
+
+    def after_request(self, request, response):
+        if request.method not in ('GET', 'HEAD') or \
+                response.status_code != 200 or \
+                response is Response.already_handled:
+            return
+        etag = response.headers.get('ETag')
+        if etag is None:
+            if not isinstance(response.body, bytes):
+                return
+            etag = self.hash(response.body)
+            response.headers['ETag'] = etag
+        if self.matches(request, etag):
+            return self.not_modified(etag, response)
+
+    def version(self, key):
+        """Decorator that generates the ETag of a route from a version key,
+        before the route runs.
+
+        :param key: A function that returns the version of the resource. This
+                    function takes the same arguments as the route, and can be
+                    a coroutine. It can return ``None`` to skip the check.
+
+        When the version matches the ``If-None-Match`` header of the request,
+        a 304 response is returned and the route is not invoked. This saves
+        the work of generating a response that the client already has, which
+        is not possible when the ETag is calculated from the body of the
+        response. Example::
+
+            @app.get('/sensors/<int:id>')
+            @etag.version(lambda request, id: str(sensors[id].updated_at))
+            async def get_sensor(request, id):
+                return sensors[id].to_dict()
+        """
+        def decorated(f):
+            @wraps(f)
+            async def wrapper(request, *args, **kwargs):
+                version = await invoke_handler(key, request, *args, **kwargs)
+                if version is None or request.method not in ('GET', 'HEAD'):
+                    return await invoke_handler(f, request, *args, **kwargs)
+                etag = self.make_etag(str(version))
+                if self.matches(request, etag):
+                    return self.not_modified(etag)
+                ret = await invoke_handler(f, request, *args, **kwargs)
+                if not isinstance(ret, Response):
+                    if not isinstance(ret, tuple):
+                        ret = (ret,)
+                    if isinstance(ret[0], int):
+                        ret = ('',) + ret
+                    status_code = 200
+                    headers = None
+                    for value in ret[1:]:
+                        if isinstance(value, int):
+                            status_code = value
+                        else:
+                            headers = value
+                    ret = Response(ret[0], status_code, headers)
+                if ret.status_code == 200:
+                    ret.headers['ETag'] = etag
+                return ret
+            return wrapper
+        return decorated
@@ -58,9 +58,28 @@ class Template:
     def generate_async(self, *args, **kwargs):
         """Return an asynchronous generator that renders the template in
         chunks, using the given arguments."""
-        return self.template.generate_async(*args, **kwargs)
+        return _BufferedAsyncIter(
+            self.template.generate_async(*args, **kwargs))
 
     async def render_async(self, *args, **kwargs):
         """Render the template with the given arguments asynchronously and
         return it as a string."""
         return await self.template.render_async(*args, **kwargs)
+
+
+class _BufferedAsyncIter:
+    # Jinja produces the chunks without waiting, so they can be combined into
+    # larger writes
+    buffered = True
+
+    def __init__(self, iter):
+        self.iter = iter
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return self.iter.__anext__()
+
+    async def aclose(self):
+        await self.iter.aclose()
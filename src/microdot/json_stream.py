@@ -0,0 +1,290 @@
+from microdot import microdot, abort
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson',
+                'application/jsonl', 'application/x-jsonlines')
+
+
+class JSONStreamIter:
+    """Asynchronous iterator that parses a JSON array or an NDJSON (newline
+    delimited JSON) request body and returns its records as they are
+    received.
+
+    :param request: the request object to parse.
+    :param ndjson: ``True`` to parse the body as NDJSON, ``False`` to parse it
+                   as a JSON array, or ``None`` to decide based on the content
+                   type of the request.
+
+    Example usage::
+
+        from microdot.json_stream import JSONStreamIter
+
+        @app.post('/ingest')
+        async def ingest(request):
+            count = 0
+            async for record in JSONStreamIter(request):
+                store(record)
+                count += 1
+            return {'count': count}
+
+    The request body is read in chunks of size
+    :attr:`buffer_size <JSONStreamIter.buffer_size>`, and only the record that
+    is being parsed is kept in memory, so bodies of any size can be processed,
+    as long as the application allows them with
+    :attr:`Request.max_content_length <microdot.Request.max_content_length>`.
+    A request that has a record that is larger than
+    :attr:`max_record_size <JSONStreamIter.max_record_size>` is aborted with a
+    413 error, and a request with invalid JSON is aborted with a 400 error.
+    """
+    #: The size of the chunks in which the request body is read.
+    buffer_size = 1024
+
+    #: The maximum size of a single record, in bytes.
+    max_record_size = 16 * 1024
+
+    def __init__(self, request, ndjson=None):
+        self.stream = request.stream
+        self.remaining = request.content_length
+        if ndjson is None:
+            ndjson = (request.content_type or '').split(';', 1)[0].strip() \
+                in NDJSON_TYPES
+        self.ndjson = ndjson
+        self.buffer = b''
+        self.start = 0  # the start of the current record in the buffer
+        self.pos = 0  # the position where the scan of the buffer continues
+        self.depth = 0
+        self.in_string = False
+        self.started = ndjson  # JSON arrays start when "[" is found
+        self.ended = False  # JSON arrays end when the closing "]" is found
+        self.separated = False  # a comma was found after the last element
+        self.done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.done:
+            if self.ndjson:
+                record = self._next_line()
+            else:
+                record = self._next_element()
+            if record is not None:
+                if record.strip():
+                    return self._loads(record)
+                continue
+            if not await self._fill_buffer():
+                self.done = True
+                if not self.ndjson and not self.ended:
+                    # the body ended before the end of the array
+                    abort(400)
+                # the last line does not need to end with a newline
+                record = self.buffer[self.start:]
+                if record.strip():
+                    return self._loads(record)
+        raise StopAsyncIteration
+
+    async def _fill_buffer(self):
+        if self.remaining <= 0:
+            return False
+        if len(self.buffer) - self.start > self.max_record_size:
+            abort(413, 'Record too large')
+        data = await self.stream.read(min(self.buffer_size, self.remaining))
+        if not data:
+            self.remaining = 0
+            return False
+        self.remaining -= len(data)
+        if self.start:
+            # discard the records that were already returned
+            self.buffer = self.buffer[self.start:] + data
+            self.pos -= self.start
+            self.start = 0
+        else:
+            self.buffer += data
+        return True
+
+    def _loads(self, record):
+        try:
+            return (microdot.json or microdot.import_json()).loads(record)
+        except ValueError:
+            abort(400)
+
+    def _next_line(self):
+        i = self.buffer.find(b'\n', self.pos)
+        if i < 0:
+            self.pos = len(self.buffer)
+            return None
+        record = self.buffer[self.start:i]
+        self.start = self.pos = i + 1
+        return record
+
+    def _next_element(self):
+        buffer = self.buffer
+        i = self.pos
+        end = len(buffer)
+        if self.ended:
+            # only whitespace is allowed after the end of the array
+            if buffer[i:].strip():
+                abort(400)
+            self.start = self.pos = end
+            return None
+        if not self.started:
+            while i < end and buffer[i] in b' \t\r\n':
+                i += 1
+            if i == end:
+                self.start = self.pos = i
+                return None
+            if buffer[i] != 91:  # [
+                abort(400)
+            self.started = True
+            i += 1
+            self.start = i
+        depth = self.depth
+        while i < end:
+            if self.in_string:
+                # skip to the end of the string
+                j = buffer.find(b'"', i)
+                if j < 0:
+                    i = end
+                    break
+                k = j
+                while buffer[k - 1] == 92:  # \
+                    k -= 1
+                i = j + 1
+                if (j - k) % 2 == 0:
+                    # the quote is not escaped
+                    self.in_string = False
+                continue
+            c = buffer[i]
+            if c == 34:  # "
+                self.in_string = True
+            elif c == 123 or c == 91:  # { [
+                depth += 1
+            elif c == 125 or c == 93:  # } ]
+                depth -= 1
+                if depth < 0:
+                    # the end of the array
+                    record = buffer[self.start:i]
+                    if self.separated and not record.strip():
+                        abort(400)
+                    self.ended = True
+                    self.start = self.pos = i + 1
+                    self.depth = 0
+                    return record
+            elif c == 44 and depth == 0:  # ,
+                record = buffer[self.start:i]
+                if not record.strip():
+                    abort(400)
+                self.separated = True
+                self.start = self.pos = i + 1
+                self.depth = 0
+                return record
+            i += 1
+        self.pos = i
+        self.depth = depth
+        return None
+
+
+class JSONStreamEncoder:
+    """Asynchronous iterator that encodes the items of an iterable as a JSON
+    array or as NDJSON, one item at a time.
+
+    :param items: a regular or asynchronous iterable with the items to encode.
+    :param ndjson: ``True`` to encode the items as NDJSON, or ``False`` to
+                   encode them as a JSON array.
+
+    The encoded items are collected and returned in chunks of at least
+    :attr:`buffer_size <JSONStreamEncoder.buffer_size>` bytes, so that the
+    response is written to the client in a small number of writes. In general
+    the :func:`json_stream_response` function should be used instead of this
+    class.
+    """
+    #: The minimum size of the chunks returned by the iterator, except for the
+    #: last one.
+    buffer_size = 1024
+
+    def __init__(self, items, ndjson=False):
+        self.items = items
+        self.is_async = hasattr(items, '__aiter__')
+        self.iter = items.__aiter__() if self.is_async else iter(items)
+        self.ndjson = ndjson
+        self.first = True
+        self.done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.done:
+            raise StopAsyncIteration
+        dumps = (microdot.json or microdot.import_json()).dumps
+        chunks = []
+        size = 0
+        if self.first and not self.ndjson:
+            chunks.append(b'[')
+        while size < self.buffer_size:
+            try:
+                if self.is_async:
+                    item = await self.iter.__anext__()
+                else:
+                    item = next(self.iter)
+            except (StopIteration, StopAsyncIteration):
+                self.done = True
+                if not self.ndjson:
+                    chunks.append(b']')
+                break
+            data = dumps(item)
+            if isinstance(data, str):
+                data = data.encode()
+            if self.ndjson:
+                chunks.append(data)
+                chunks.append(b'\n')
+            else:
+                if not self.first:
+                    chunks.append(b',')
+                chunks.append(data)
+            self.first = False
+            size += len(data) + 1
+        if not chunks:
+            raise StopAsyncIteration
+        return b''.join(chunks)
+
+    async def aclose(self):
+        if hasattr(self.items, 'aclose'):
+            await self.items.aclose()
+        elif hasattr(self.items, 'close'):
+            self.items.close()
+
+
+def json_stream_response(items, status_code=200, headers=None, ndjson=False):
+    """Return a response that streams the items of an iterable as JSON.
+
+    :param items: a regular or asynchronous iterable with the items to send,
+                  such as a list, a generator or an async generator.
+    :param status_code: the status code of the response. The default is 200.
+    :param headers: a dictionary with additional headers to include in the
+                    response.
+    :param ndjson: ``True`` to send the items as NDJSON, with a content type
+                   of ``application/x-ndjson``, or ``False`` to send them as a
+                   JSON array, with a content type of ``application/json``.
+
+    Each item is serialized to JSON separately, with ``orjson`` if it is
+    installed, so the complete response is never held in memory, and the
+    client starts receiving it as soon as the first items are encoded.
+
+    Example::
+
+        from microdot.json_stream import json_stream_response
+
+        @app.get('/readings')
+        async def readings(request):
+            async def generate():
+                for reading in await get_readings():
+                    yield {'time': reading.time, 'value': reading.value}
+
+            return json_stream_response(generate())
+    """
+    response = microdot.Response(
+        JSONStreamEncoder(items, ndjson=ndjson), status_code, headers)
+    if 'Content-Type' not in response.headers:
+        response.headers['Content-Type'] = 'application/x-ndjson' \
+            if ndjson else 'application/json; charset=UTF-8'
+    return response
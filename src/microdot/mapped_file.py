@@ -0,0 +1,136 @@
+import time
+
+
+class _Mapping:
+    def __init__(self, map, key):
+        self.map = map
+        self.key = key
+        self.refs = 0
+        self.last_used = time.time()
+
+    def unmap(self):
+        try:
+            self.map.close()
+        except BufferError:
+            # a chunk of the file is still held by the transport
+            return False
+        return True
+
+
+class MappedFile:
+    """A read-only file object backed by a memory map.
+
+    :param mapping: The shared mapping of the file.
+    :param offset: The position in the file where the data starts.
+    :param length: The number of bytes to read from ``offset``.
+
+    The chunks returned by :meth:`read` are ``memoryview`` slices of the
+    mapping, so they are given to the network transport without being
+    copied, and the responses that send the same file share a single
+    mapping. Mappings are reference counted, and are closed when they have
+    not been used for :attr:`idle_timeout <MappedFile.idle_timeout>`
+    seconds, or when the file is modified. Use :meth:`open` to create these
+    objects.
+
+    A file that is mapped should be updated by replacing it with a new file,
+    for example with ``os.rename()``, and not by writing over it, because
+    the responses that are in progress would send the new contents.
+    """
+    #: The number of seconds a mapping that is not used by any response is
+    #: kept open.
+    idle_timeout = 60
+
+    _mappings = {}
+    _stale = []
+
+    def __init__(self, mapping, offset, length):
+        self.mapping = mapping
+        self.pos = offset
+        self.end = offset + length
+        self.view = memoryview(mapping.map)
+        mapping.refs += 1
+
+    @classmethod
+    def open(cls, filename, offset=0, length=None, min_size=0):
+        """Return a mapped file object for a file, or a part of it.
+
+        :param filename: The path of the file.
+        :param offset: The position in the file where the data starts.
+        :param length: The number of bytes to include, or ``None`` to include
+                       the rest of the file.
+        :param min_size: The minimum size of the file. Smaller files are not
+                         mapped.
+
+        Returns ``None`` if the file cannot be mapped, which is always the
+        case on MicroPython, and also when the file is empty or smaller than
+        ``min_size``. The caller should then open the file normally.
+        """
+        try:
+            import mmap
+            import os
+        except ImportError:  # pragma: no cover
+            return None
+        st = os.stat(filename)
+        if st.st_size == 0 or st.st_size < min_size:
+            return None
+        key = (st.st_mtime, st.st_size)
+        mapping = cls._mappings.get(filename)
+        if mapping is None or mapping.key != key:
+            if mapping is not None:
+                # the file was modified, so the old mapping is closed once the
+                # responses that use it end
+                cls._stale.append(mapping)
+            with open(filename, 'rb') as f:
+                mapping = _Mapping(
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), key)
+            cls._mappings[filename] = mapping
+        offset = min(offset, st.st_size)
+        if length is None or offset + length > st.st_size:
+            length = st.st_size - offset
+        # the mapping is referenced before the idle mappings are purged, so
+        # that it is not closed even if it has been idle for too long
+        f = cls(mapping, offset, length)
+        cls.purge()
+        return f
+
+    @classmethod
+    def purge(cls, idle_timeout=None):
+        """Close the mappings that are not in use and have been idle for
+        longer than the given timeout.
+
+        :param idle_timeout: The timeout in seconds. If not given, the
+                             :attr:`idle_timeout <MappedFile.idle_timeout>`
+                             attribute is used.
+        """
+        if idle_timeout is None:
+            idle_timeout = cls.idle_timeout
+        now = time.time()
+        for filename, mapping in list(cls._mappings.items()):
+            if mapping.refs == 0 \
+                    and now - mapping.last_used >= idle_timeout \
+                    and mapping.unmap():
+                del cls._mappings[filename]
+        cls._stale = [mapping for mapping in cls._stale
+                      if mapping.refs > 0 or not mapping.unmap()]
+
+    def __len__(self):
+        return self.end - self.pos
+
+    def read(self, n=-1):
+        if self.view is None:
+            return b''
+        end = self.end if n is None or n < 0 else min(self.end, self.pos + n)
+        data = self.view[self.pos:end]
+        self.pos = end
+        return data
+
+    def close(self):
+        if self.view is not None:
+            try:
+                self.view.release()
+            except BufferError:  # pragma: no cover
+                pass
+            self.view = None
+            self.mapping.refs -= 1
+            self.mapping.last_used = time.time()
+            self.purge()
@@ -6,14 +6,21 @@ The ``microdot`` module defines a few classes that help implement HTTP-based
 servers for MicroPython and standard Python.
 """
 import asyncio
-import io
-import re
 import time
 
-try:
-    import orjson as json  # type: ignore[import-not-found]
-except ImportError:
-    import json
+# the JSON module is imported on first use, to reduce the startup time and
+# the memory footprint of applications that do not need it
+json = None
+
+
+def import_json():
+    global json
+    try:
+        import orjson as json  # type: ignore[import-not-found]
+    except ImportError:
+        import json
+    return json
+
 
 try:
     from inspect import iscoroutinefunction, iscoroutine
@@ -53,6 +60,22 @@ except ImportError:  # pragma: no cover
     def print_exception(exc):
         traceback.print_exc()
 
+try:
+    from gc import mem_free  # type: ignore[attr-defined]
+except ImportError:
+    mem_free = None
+
+try:
+    from time import ticks_us, ticks_diff  # type: ignore[attr-defined]
+except ImportError:
+    from time import perf_counter_ns
+
+    def ticks_us():
+        return perf_counter_ns() // 1000
+
+    def ticks_diff(end, start):
+        return end - start
+
 MUTED_SOCKET_ERRORS = [
     32,  # Broken pipe
     54,  # Connection reset by peer
@@ -61,22 +84,56 @@ MUTED_SOCKET_ERRORS = [
 ]
 
 
+def default_buffer_size():
+    """Return the size of the buffers used to read and write files.
+
+    The size is 64KB on CPython. On MicroPython it is the largest power of
+    two between 512 bytes and 4KB that does not exceed 1/16 of the free
+    memory, so that devices with little memory use small buffers.
+    """
+    if mem_free is not None:  # pragma: no cover
+        size = 512
+        while size < 4096 and size * 32 <= mem_free():
+            size *= 2
+        return size
+    return 64 * 1024
+
+
+# value of each hexadecimal digit, indexed by its character code, with 255
+# for the characters that are not hexadecimal digits
+_HEX_VALUES = bytearray(b'\xff' * 256)
+for i, c in enumerate(b'0123456789abcdefABCDEF'):
+    _HEX_VALUES[c] = i if i < 16 else i - 6
+del i, c
+
+
 def urldecode(s):
     if isinstance(s, str):
+        if '%' not in s:
+            return s.replace('+', ' ') if '+' in s else s
         s = s.encode()
-    s = s.replace(b'+', b' ')
-    parts = s.split(b'%')
-    if len(parts) == 1:
-        return s.decode()
-    result = [parts[0]]
-    for item in parts[1:]:
-        if item == b'':
-            result.append(b'%')
-        else:
-            code = item[:2]
-            result.append(bytes([int(code, 16)]))
-            result.append(item[2:])
-    return b''.join(result).decode()
+    elif b'%' not in s:
+        return s.replace(b'+', b' ').decode()
+    if b'+' in s:
+        s = s.replace(b'+', b' ')
+    result = bytearray()
+    n = len(s)
+    i = 0
+    pos = s.find(b'%')
+    while pos >= 0:
+        if pos + 2 < n:
+            hi = _HEX_VALUES[s[pos + 1]]
+            lo = _HEX_VALUES[s[pos + 2]]
+            if hi < 16 and lo < 16:
+                result += s[i:pos]
+                result.append(hi * 16 + lo)
+                i = pos + 3
+                pos = s.find(b'%', i)
+                continue
+        # a "%" that is not followed by two hexadecimal digits is kept as is
+        pos = s.find(b'%', pos + 1)
+    result += s[i:]
+    return result.decode()
 
 
 def urlencode(s):
@@ -137,6 +194,98 @@ class NoCaseDict(dict):
             self[key] = value
 
 
+class Headers(NoCaseDict):
+    """A case-insensitive dictionary of HTTP headers.
+
+    :param initial_dict: an initial dictionary of headers to initialize this
+                         object with.
+
+    Headers that can appear multiple times, such as ``Set-Cookie``, are
+    stored as lists, and are written as separate header lines. Use
+    :meth:`add` to add a value to one of these headers, and :meth:`getlist`
+    to retrieve all of its values.
+
+    Example::
+
+        >>> h = Headers({'Content-Type': 'text/html'})
+        >>> h['content-type']
+        'text/html'
+        >>> h.add('Set-Cookie', 'foo=1')
+        >>> h.add('Set-Cookie', 'bar=2')
+        >>> h.getlist('set-cookie')
+        ['foo=1', 'bar=2']
+    """
+    def __init__(self, initial_dict=None):
+        super().__init__()
+        if initial_dict:
+            self.update(initial_dict)
+
+    def __setitem__(self, key, value):
+        # the key map has an entry for every header, so that a lowercase name
+        # is never stored twice with different spellings
+        super(NoCaseDict, self).__setitem__(
+            self.keymap.setdefault(key.lower(), key), value)
+
+    def __delitem__(self, key):
+        super(NoCaseDict, self).__delitem__(self.keymap.pop(key.lower()))
+
+    def _combine(self, key, value):
+        # a request header that is received more than once is stored as a
+        # single comma separated value, or semicolon separated for cookies,
+        # except for the single valued content headers, where the last
+        # value wins
+        kl = key.lower()
+        if kl != 'content-type' and kl != 'content-length':
+            value = self[key] + (';' if kl == 'cookie' else ',') + ' ' + value
+        self[key] = value
+
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def clear(self):
+        super().clear()
+        self.keymap.clear()
+
+    def add(self, key, value):
+        """Add a value to a header that can have multiple values.
+
+        :param key: The header name.
+        :param value: The value to add.
+
+        The values of the header are stored in a list.
+        """
+        values = self.get(key)
+        if values is None:
+            self[key] = [value]
+        elif isinstance(values, list):
+            values.append(value)
+        else:
+            self[key] = [values, value]
+
+    def getlist(self, key):
+        """Return a list with all the values of a header.
+
+        :param key: The header name.
+
+        An empty list is returned if the header does not exist.
+        """
+        values = self.get(key)
+        if values is None:
+            return []
+        return values if isinstance(values, list) else [values]
+
+
 def mro(cls):  # pragma: no cover
     """Return the method resolution order of a class.
 
@@ -170,6 +319,12 @@ def mro(cls):  # pragma: no cover
     return mro_pruned
 
 
+class _MultiDictValues(list):
+    """The list of values of a key that appears more than once in a
+    :class:`MultiDict`."""
+    pass
+
+
 class MultiDict(dict):
     """A subclass of dictionary that can hold multiple values for the same
     key. It is used to hold key/value pairs decoded from query strings and
@@ -195,12 +350,21 @@ class MultiDict(dict):
                 self[key] = value
 
     def __setitem__(self, key, value):
-        if key not in self:
-            super().__setitem__(key, [])
-        super().__getitem__(key).append(value)
+        if key in self:
+            values = super().__getitem__(key)
+            if isinstance(values, _MultiDictValues):
+                values.append(value)
+            else:
+                super().__setitem__(key, _MultiDictValues((values, value)))
+        else:
+            # a key with a single value stores it directly, without a list
+            super().__setitem__(key, value)
 
     def __getitem__(self, key):
-        return super().__getitem__(key)[0]
+        value = super().__getitem__(key)
+        if isinstance(value, _MultiDictValues):
+            return value[0]
+        return value
 
     def get(self, key, default=None, type=None):
         """Return the value for a given key.
@@ -256,6 +420,8 @@ class MultiDict(dict):
         if key not in self:
             return []
         values = super().__getitem__(key)
+        if not isinstance(values, _MultiDictValues):
+            values = [values]
         if type is not None:
             values = [type(value) for value in values]
         return values
@@ -264,6 +430,7 @@ class MultiDict(dict):
 class AsyncBytesIO:
     """An async wrapper for BytesIO."""
     def __init__(self, data):
+        import io
         self.stream = io.BytesIO(data)
 
     async def read(self, n=-1):
@@ -286,7 +453,24 @@ class AsyncBytesIO:
 
 
 class Request:
-    """An HTTP request."""
+    """An HTTP request.
+
+    .. attribute:: args
+
+       The parsed query string, as a :class:`MultiDict <microdot.MultiDict>`
+       object.
+
+    .. attribute:: cookies
+
+       A dictionary with the cookies included in the request.
+
+    .. attribute:: g
+
+       A general purpose container for applications to store data during the
+       life of the request.
+
+    These three attributes are created the first time they are used.
+    """
     #: Specify the maximum payload size that is accepted. Requests with larger
     #: payloads will be rejected with a 413 status code. Applications can
     #: change this maximum as necessary.
@@ -316,9 +500,41 @@ class Request:
     #:    Request.max_readline = 16 * 1024  # 16KB lines allowed
     max_readline = 2 * 1024
 
+    #: A directory where request bodies that are larger than
+    #: ``max_body_length`` are stored as temporary files. When this is
+    #: ``None``, which is the default, large bodies are not read by Microdot,
+    #: and must be read by the application from the ``stream`` attribute.
+    #:
+    #: Example::
+    #:
+    #:    Request.spool_directory = '/tmp'
+    spool_directory = None
+
+    #: Whether the ``100 Continue`` response for clients that send an
+    #: ``Expect: 100-continue`` header is delayed until the before request
+    #: handlers accept the request. This is ``True`` by default, so that a
+    #: before request handler can reject a request before the client sends
+    #: the body. The body of these requests is not available to the before
+    #: request handlers unless they call :meth:`read_body` first, and
+    #: accessing it without doing so raises a ``RuntimeError`` exception.
+    #: Set to ``False`` to read the body before the before request handlers
+    #: run.
+    defer_continue = True
+
     class G:
         pass
 
+    # the attributes of a request are stored in slots on runtimes that
+    # support them, and a dictionary is still available for attributes added
+    # by applications and extensions
+    __slots__ = ('app', 'client_addr', 'method', 'scheme', 'url',
+                 'url_prefix', 'subapp', 'route', 'path', 'query_string',
+                 'headers', 'content_length', 'content_type', 'http_version',
+                 'url_args', 'args', 'cookies', 'g', '_body', 'body_used',
+                 '_stream', 'sock', '_json', '_form', '_files',
+                 'after_request_handlers', '_after_response',
+                 '_expect_continue', '_spool', '__dict__')
+
     def __init__(self, app, client_addr, method, url, http_version, headers,
                  body=None, stream=None, sock=None, url_prefix='',
                  subapp=None, scheme=None, route=None):
@@ -345,43 +561,39 @@ class Request:
         self.path = url
         #: The query string portion of the URL.
         self.query_string = None
-        #: The parsed query string, as a
-        #: :class:`MultiDict <microdot.MultiDict>` object.
-        self.args = {}
         #: A dictionary with the headers included in the request.
         self.headers = headers
-        #: A dictionary with the cookies included in the request.
-        self.cookies = {}
         #: The parsed ``Content-Length`` header.
         self.content_length = 0
         #: The parsed ``Content-Type`` header.
         self.content_type = None
-        #: A general purpose container for applications to store data during
-        #: the life of the request.
-        self.g = Request.G()
 
         self.http_version = http_version
         if '?' in self.path:
             self.path, self.query_string = self.path.split('?', 1)
-            self.args = self._parse_urlencoded(self.query_string)
 
         if 'Content-Length' in self.headers:
             self.content_length = int(self.headers['Content-Length'])
         if 'Content-Type' in self.headers:
             self.content_type = self.headers['Content-Type']
-        if 'Cookie' in self.headers:
-            for cookie in self.headers['Cookie'].split(';'):
-                c = cookie.strip().split('=', 1)
-                self.cookies[c[0]] = c[1] if len(c) > 1 else ''
+
+        # the empty tuple is shared, a list is created when a request
+        # specific after request handler is registered
+        self.after_request_handlers = ()
+        self._after_response = None
+
+        # set by the web server when the client is waiting for a
+        # "100 Continue" response before it sends the body
+        self._expect_continue = False
 
         self._body = body
         self.body_used = False
         self._stream = stream
+        self._spool = None
         self.sock = sock
         self._json = None
         self._form = None
         self._files = None
-        self.after_request_handlers = []
 
     @staticmethod
     async def create(app, client_reader, client_writer, client_addr,
@@ -407,55 +619,147 @@ class Request:
         http_version = http_version.split('/', 1)[1]
 
         # headers
-        headers = NoCaseDict()
+        headers = Headers()
         content_length = 0
         while True:
             line = (await Request._safe_readline(
                 client_reader)).strip().decode()
             if line == '':
                 break
-            header, value = line.split(':', 1)
-            value = value.strip()
-            headers[header] = value
-            if header.lower() == 'content-length':
+            i = line.find(':')
+            if i < 0:
+                raise ValueError('invalid header')
+            header = line[:i]
+            value = line[i + 1:].strip()
+            if header in headers:
+                headers._combine(header, value)
+            else:
+                headers[header] = value
+            # only lowercase the header name when it has the right length
+            if len(header) == 14 and header.lower() == 'content-length':
                 content_length = int(value)
 
-        # body
-        body = b''
-        if content_length and content_length <= Request.max_body_length:
-            body = await client_reader.readexactly(content_length)
-            stream = None
-        else:
-            body = b''
-            stream = client_reader
-
-        return Request(app, client_addr, method, url, http_version, headers,
-                       body=body, stream=stream,
-                       sock=(client_reader, client_writer), scheme=scheme)
+        # the body is read by read_body() once the request is routed
+        req = Request(app, client_addr, method, url, http_version, headers,
+                      body=None if content_length else b'',
+                      stream=client_reader,
+                      sock=(client_reader, client_writer), scheme=scheme)
+        if content_length and 'Expect' in headers and \
+                headers['Expect'].lower() == '100-continue':
+            req._expect_continue = True
+        return req
+
+    async def read_body(self):
+        """Read the body of the request.
+
+        Microdot does not read the body of the request until the request is
+        routed, so that requests that are rejected before they reach a route,
+        for example with a 404 or 405 error, do not need to read and store
+        their bodies. Microdot calls this method before the before request
+        handlers and the route handler are invoked, so applications do not
+        normally need to call it. For requests from clients that wait for a
+        ``100 Continue`` response, this method is called after the before
+        request handlers, so that they can reject the request before the body
+        is sent, unless :attr:`defer_continue` is set to ``False``. A before
+        request handler that needs the body of one of these requests can
+        await this method to receive it.
+
+        If the client sent an ``Expect: 100-continue`` header, this method
+        sends the ``100 Continue`` response that the client waits for before
+        it sends the body. This applies also to bodies that are too large to
+        be read into memory, which the application reads from ``stream``.
+
+        Bodies that are larger than ``max_body_length`` are not read, unless
+        ``spool_directory`` is set, in which case they are written to a
+        temporary file in that directory as they are received.
+
+        This method is a coroutine. Calling it more than once has no effect.
+        """
+        if self._expect_continue:
+            self._expect_continue = False
+            await self.sock[1].awrite(b'HTTP/1.1 100 Continue\r\n\r\n')
+        if self._body is None:
+            if self._stream is None or not self.content_length:
+                self._body = b''
+            elif self.content_length <= self.max_body_length:
+                self._body = await self._stream.readexactly(
+                    self.content_length)
+                self._stream = None
+            else:
+                if self.spool_directory is not None:
+                    from microdot.spooled_body import SpooledBody
+                    self._spool = await SpooledBody.receive(
+                        self._stream, self.content_length,
+                        self.spool_directory)
+                    self._stream = self._spool
+                self._body = b''
+        return self._body
 
     def _parse_urlencoded(self, urlencoded):
         data = MultiDict()
         if len(urlencoded) > 0:  # pragma: no branch
-            if isinstance(urlencoded, str):
-                for kv in [pair.split('=', 1)
-                           for pair in urlencoded.split('&') if pair]:
-                    data[urldecode(kv[0])] = urldecode(kv[1]) \
-                        if len(kv) > 1 else ''
-            elif isinstance(urlencoded, bytes):  # pragma: no branch
-                for kv in [pair.split(b'=', 1)
-                           for pair in urlencoded.split(b'&') if pair]:
-                    data[urldecode(kv[0])] = urldecode(kv[1]) \
-                        if len(kv) > 1 else b''
+            if not isinstance(urlencoded, str):
+                # form bodies are decoded once, and then parsed as query
+                # strings, so that all the values are strings
+                urlencoded = urlencoded.decode()
+            for pair in urlencoded.split('&'):
+                if pair:
+                    i = pair.find('=')
+                    if i < 0:
+                        data[urldecode(pair)] = ''
+                    else:
+                        data[urldecode(pair[:i])] = urldecode(pair[i + 1:])
         return data
 
+    def __getattr__(self, name):
+        # the query string arguments, the cookies and the ``g`` object are
+        # created when first used
+        if name == 'args':
+            value = {} if self.query_string is None else \
+                self._parse_urlencoded(self.query_string)
+        elif name == 'cookies':
+            value = {}
+            for cookie in self.headers.getlist('Cookie'):
+                for cookie in cookie.split(';'):
+                    c = cookie.strip().split('=', 1)
+                    value[c[0]] = c[1] if len(c) > 1 else ''
+        elif name == 'g':
+            value = Request.G()
+        else:
+            raise AttributeError(name)
+        setattr(self, name, value)
+        return value
+
     @property
     def body(self):
-        """The body of the request, as bytes."""
-        return self._body
+        """The body of the request, as bytes.
+
+        The body is empty when the request has not been routed yet (see
+        :meth:`read_body`), and when it is larger than ``max_body_length``,
+        unless it was stored in a temporary file in ``spool_directory``, in
+        which case it is read from the file the first time this attribute is
+        accessed, and kept in memory after that. Accessing the body of a
+        request that waits for a ``100 Continue`` response before it is
+        received, which can happen in a before request handler (see
+        :attr:`defer_continue`), raises a ``RuntimeError`` exception.
+        """
+        if self._spool is not None and not self._body:
+            self._body = self._spool.getvalue()
+        if self._expect_continue and self.defer_continue:
+            raise RuntimeError('The request body has not been received yet, '
+                               'await read_body() to receive it')
+        return self._body if self._body is not None else b''
 
     @property
     def stream(self):
-        """The body of the request, as a bytes stream."""
+        """The body of the request, as a bytes stream.
+
+        When the body is stored in a temporary file in ``spool_directory``,
+        the stream is a
+        :class:`SpooledBody <microdot.spooled_body.SpooledBody>` object,
+        which also supports ``seek()`` and ``tell()``. The temporary file is
+        deleted once the request is dispatched.
+        """
         if self._stream is None:
             self._stream = AsyncBytesIO(self._body)
         return self._stream
@@ -470,7 +774,7 @@ class Request:
             mime_type = self.content_type.split(';')[0]
             if mime_type != 'application/json':
                 return None
-            self._json = json.loads(self.body.decode())
+            self._json = (json or import_json()).loads(self.body)
         return self._json
 
     @property
@@ -526,9 +830,40 @@ class Request:
         Note that the function is not called if the request handler raises an
         exception and an error response is returned instead.
         """
+        if not self.after_request_handlers:
+            self.after_request_handlers = []
         self.after_request_handlers.append(f)
         return f
 
+    def after_response(self, f, *args, **kwargs):
+        """Register a function to run in the background after the response
+        to this request is sent to the client.
+
+        :param f: The function to run. It can be a regular function or a
+                  coroutine function.
+        :param args: Positional arguments for the function.
+        :param kwargs: Keyword arguments for the function.
+
+        The function is submitted to the application's
+        :class:`BackgroundTasks <microdot.background_tasks.BackgroundTasks>`
+        pool once the response is written, so that
+        work such as sending a webhook or writing an audit record does not
+        delay the response. Example::
+
+            @app.post('/orders')
+            async def create_order(request):
+                order = await save_order(request.json)
+                request.after_response(notify_warehouse, order['id'])
+                return order, 201
+
+        This method can also be used as a decorator, for functions that do
+        not take arguments.
+        """
+        if self._after_response is None:
+            self._after_response = []
+        self._after_response.append((f, args, kwargs))
+        return f
+
     @staticmethod
     async def _safe_readline(stream):
         line = (await stream.readline())
@@ -564,7 +899,57 @@ class Response:
         'svg': 'image/svg+xml',
     }
 
-    send_file_buffer_size = 1024
+    #: The size of the chunks in which files are read and sent. The default
+    #: of ``None`` uses a size that is adapted to the runtime, as returned by
+    #: :func:`default_buffer_size() <microdot.microdot.default_buffer_size>`.
+    #: This attribute can also be set on a response, or given in the
+    #: ``buffer_size`` argument of :meth:`send_file`, to override the size for
+    #: a single response.
+    #:
+    #: On MicroPython the file is read with ``readinto()`` into a single
+    #: buffer that is reused for all the chunks of the response.
+    send_file_buffer_size = None
+
+    #: Whether :meth:`send_file` reads files in a thread pool, using an
+    #: :class:`AsyncFile <microdot.async_file.AsyncFile>` object. This only
+    #: applies to CPython, and to files that are opened by ``send_file``, not
+    #: to streams given by the application.
+    async_file_io = True
+
+    #: The minimum size of the files that :meth:`send_file` sends from a
+    #: memory map, using a
+    #: :class:`MappedFile <microdot.mapped_file.MappedFile>` object. The
+    #: default of ``None`` disables memory mapped files. Memory maps are not
+    #: available on MicroPython, where files are always read normally.
+    send_file_mmap_size = None
+
+    #: A :class:`BufferPool <microdot.buffer_pool.BufferPool>` used to stream
+    #: file responses. When set, the
+    #: file is read into a buffer from the pool that is reused for all the
+    #: chunks, instead of allocating a new buffer for each response. Only use
+    #: this option with web servers that copy the data they are given to
+    #: write, such as the Microdot server running on MicroPython.
+    buffer_pool = None
+
+    #: The size of the buffer used to combine small chunks of the response
+    #: into larger writes. The status line and the headers are combined with
+    #: the start of the body, and the chunks returned by a generator, such as
+    #: those rendered by templates, are combined until they add up to this
+    #: size. Set to 0 to send each chunk in its own write.
+    #:
+    #: The chunks of a response with an asynchronous iterator as body, such
+    #: as an SSE or video stream, are sent as soon as they are available. An
+    #: asynchronous iterator that produces its chunks without waiting, such
+    #: as the one used to render a template asynchronously, can have a
+    #: ``buffered`` attribute set to ``True`` to have its chunks combined as
+    #: well.
+    write_buffer_size = 1024
+
+    #: The time in milliseconds that a generator can take to produce a chunk
+    #: before it is considered a stream. When this time is exceeded, the
+    #: buffered data is sent, and the remaining chunks of the response are
+    #: sent as soon as they are available. Set to 0 to always combine chunks.
+    write_buffer_timeout = 100
 
     #: The content type to use for responses that do not explicitly define a
     #: ``Content-Type`` header.
@@ -578,15 +963,18 @@ class Response:
     #: written to the client. Used to exit WebSocket connections cleanly.
     already_handled = None
 
+    __slots__ = ('status_code', 'headers', 'reason', 'body', 'is_head',
+                 '__dict__')
+
     def __init__(self, body=b'', status_code=200, headers=None, reason=None):
         if body is None and status_code == 200:
             body = ''
             status_code = 204
         self.status_code = status_code
-        self.headers = NoCaseDict(headers or {})
+        self.headers = Headers(headers)
         self.reason = reason
         if isinstance(body, (dict, list)):
-            body = json.dumps(body)
+            body = (json or import_json()).dumps(body)
             self.headers['Content-Type'] = 'application/json; charset=UTF-8'
         if isinstance(body, str):
             self.body = body.encode()
@@ -634,10 +1022,7 @@ class Response:
             http_cookie += '; Partitioned'
         if '\r' in http_cookie or '\n' in http_cookie:
             raise ValueError('invalid cookie')
-        if 'Set-Cookie' in self.headers:
-            self.headers['Set-Cookie'].append(http_cookie)
-        else:
-            self.headers['Set-Cookie'] = [http_cookie]
+        self.headers.add('Set-Cookie', http_cookie)
 
     def delete_cookie(self, cookie, **kwargs):
         """Delete a cookie.
@@ -662,23 +1047,37 @@ class Response:
             if 'charset=' not in self.headers['Content-Type']:
                 self.headers['Content-Type'] += '; charset=UTF-8'
 
+    def _serialize_headers(self):
+        reason = self.reason if self.reason is not None else \
+            ('OK' if self.status_code == 200 else 'N/A')
+        result = ['HTTP/1.0 {status_code} {reason}\r\n'.format(
+            status_code=self.status_code, reason=reason)]
+        for header, value in self.headers.items():
+            if isinstance(value, list):
+                for v in value:
+                    result.append('{header}: {value}\r\n'.format(
+                        header=header, value=v))
+            else:
+                result.append('{header}: {value}\r\n'.format(
+                    header=header, value=value))
+        result.append('\r\n')
+        return ''.join(result).encode()
+
     async def write(self, stream):
         self.complete()
+        writer = _BufferedWriter(stream, self.write_buffer_size,
+                                 self.write_buffer_timeout)
+
+        # async iterators are streams that may produce their chunks at any
+        # time, so each chunk is sent as soon as it is available
+        flush = hasattr(self.body, '__anext__') and \
+            not getattr(self.body, 'buffered', False)
 
         try:
-            # status code
-            reason = self.reason if self.reason is not None else \
-                ('OK' if self.status_code == 200 else 'N/A')
-            await stream.awrite('HTTP/1.0 {status_code} {reason}\r\n'.format(
-                status_code=self.status_code, reason=reason).encode())
-
-            # headers
-            for header, value in self.headers.items():
-                values = value if isinstance(value, list) else [value]
-                for value in values:
-                    await stream.awrite('{header}: {value}\r\n'.format(
-                        header=header, value=value).encode())
-            await stream.awrite(b'\r\n')
+            # status code and headers
+            await writer.write(self._serialize_headers())
+            if flush:
+                await writer.flush()
 
             # body
             if not self.is_head:
@@ -687,7 +1086,9 @@ class Response:
                     if isinstance(body, str):  # pragma: no cover
                         body = body.encode()
                     try:
-                        await stream.awrite(body)
+                        await writer.write(body)
+                        if flush:
+                            await writer.flush()
                     except OSError as exc:  # pragma: no cover
                         if exc.errno in MUTED_SOCKET_ERRORS or \
                                 exc.args[0] == 'Connection lost':
@@ -696,6 +1097,7 @@ class Response:
                         raise
                 if hasattr(iter, 'aclose'):  # pragma: no branch
                     await iter.aclose()
+            await writer.flush()
 
         except OSError as exc:  # pragma: no cover
             if exc.errno in MUTED_SOCKET_ERRORS or \
@@ -709,54 +1111,7 @@ class Response:
             # response body is an async generator
             return self.body
 
-        response = self
-
-        class iter:
-            ITER_UNKNOWN = 0
-            ITER_SYNC_GEN = 1
-            ITER_FILE_OBJ = 2
-            ITER_NO_BODY = -1
-
-            def __aiter__(self):
-                if response.body:
-                    self.i = self.ITER_UNKNOWN  # need to determine type
-                else:
-                    self.i = self.ITER_NO_BODY
-                return self
-
-            async def __anext__(self):
-                if self.i == self.ITER_NO_BODY:
-                    await self.aclose()
-                    raise StopAsyncIteration
-                if self.i == self.ITER_UNKNOWN:
-                    if hasattr(response.body, 'read'):
-                        self.i = self.ITER_FILE_OBJ
-                    elif hasattr(response.body, '__next__'):
-                        self.i = self.ITER_SYNC_GEN
-                        return next(response.body)
-                    else:
-                        self.i = self.ITER_NO_BODY
-                        return response.body
-                elif self.i == self.ITER_SYNC_GEN:
-                    try:
-                        return next(response.body)
-                    except StopIteration:
-                        await self.aclose()
-                        raise StopAsyncIteration
-                buf = response.body.read(response.send_file_buffer_size)
-                if iscoroutine(buf):  # pragma: no cover
-                    buf = await buf
-                if len(buf) < response.send_file_buffer_size:
-                    self.i = self.ITER_NO_BODY
-                return buf
-
-            async def aclose(self):
-                if hasattr(response.body, 'close'):
-                    result = response.body.close()
-                    if iscoroutine(result):  # pragma: no cover
-                        await result
-
-        return iter()
+        return _BodyIter(self)
 
     @classmethod
     def redirect(cls, location, status_code=302):
@@ -773,7 +1128,7 @@ class Response:
     @classmethod
     def send_file(cls, filename, status_code=200, content_type=None,
                   stream=None, max_age=None, compressed=False,
-                  file_extension=''):
+                  file_extension='', buffer_size=None):
         """Send file contents in a response.
 
         :param filename: The filename of the file.
@@ -800,6 +1155,10 @@ class Response:
                                parameter when opening the file, including the
                                dot. The extension given here is not considered
                                when generating the ``Content-Type`` header.
+        :param buffer_size: The size of the chunks in which the file is read
+                            and sent. If omitted, the value of the
+                            :attr:`Response.send_file_buffer_size` attribute
+                            is used.
 
         Security note: The filename is assumed to be trusted. Never pass
         filenames provided by the user without validating and sanitizing them
@@ -825,8 +1184,136 @@ class Response:
             headers['Content-Encoding'] = compressed \
                 if isinstance(compressed, str) else 'gzip'
 
-        f = stream or open(filename + file_extension, 'rb')
-        return cls(body=f, status_code=status_code, headers=headers)
+        f = stream
+        if f is None and cls.send_file_mmap_size is not None:
+            from microdot.mapped_file import MappedFile
+            f = MappedFile.open(filename + file_extension,
+                                min_size=cls.send_file_mmap_size)
+            if f is not None:
+                headers['Content-Length'] = str(len(f))
+        if f is None:
+            f = open(filename + file_extension, 'rb')
+            if cls.async_file_io:
+                from microdot.async_file import AsyncFile
+                if AsyncFile.threaded():
+                    f = AsyncFile(f)
+        res = cls(body=f, status_code=status_code, headers=headers)
+        if buffer_size is not None:
+            res.send_file_buffer_size = buffer_size
+        return res
+
+
+class _BufferedWriter:
+    """Combine small writes to a stream into larger ones."""
+    def __init__(self, stream, size, timeout=0):
+        self.stream = stream
+        self.size = size
+        self.timeout = timeout * 1000
+        self.buffer = []
+        self.length = 0
+        self.start = ticks_us()
+
+    async def write(self, data):
+        if self.timeout and ticks_diff(ticks_us(), self.start) > \
+                self.timeout:
+            # a chunk that took this long to produce is part of a stream, so
+            # from now on every chunk is sent as soon as it is available
+            self.size = 0
+        if len(data) >= self.size or not isinstance(data, bytes):
+            # large chunks are written directly, and so are mutable buffers,
+            # which may be reused for the next chunk
+            await self.flush()
+            await self.stream.awrite(data)
+        else:
+            self.buffer.append(data)
+            self.length += len(data)
+            if self.length >= self.size:
+                await self.flush()
+        # the time spent writing to the stream is not counted
+        self.start = ticks_us()
+
+    async def flush(self):
+        if self.buffer:
+            data = self.buffer[0] if len(self.buffer) == 1 \
+                else b''.join(self.buffer)
+            self.buffer = []
+            self.length = 0
+            await self.stream.awrite(data)
+
+
+class _BodyIter:
+    ITER_UNKNOWN = 0
+    ITER_SYNC_GEN = 1
+    ITER_FILE_OBJ = 2
+    ITER_NO_BODY = -1
+
+    def __init__(self, response):
+        self.response = response
+        self.buf = None
+
+    def __aiter__(self):
+        if self.response.body:
+            self.i = self.ITER_UNKNOWN  # need to determine type
+        else:
+            self.i = self.ITER_NO_BODY
+        return self
+
+    async def __anext__(self):
+        response = self.response
+        if self.i == self.ITER_NO_BODY:
+            await self.aclose()
+            raise StopAsyncIteration
+        if self.i == self.ITER_UNKNOWN:
+            if hasattr(response.body, 'read'):
+                self.i = self.ITER_FILE_OBJ
+                self.size = response.send_file_buffer_size or \
+                    default_buffer_size()
+                if hasattr(response.body, 'readinto'):
+                    if response.buffer_pool is not None:
+                        self.buf = response.buffer_pool.acquire()
+                    elif mem_free is not None:  # pragma: no cover
+                        # the MicroPython server copies the data it writes,
+                        # so a single buffer can be used for all the chunks
+                        self.buf = bytearray(self.size)
+            elif hasattr(response.body, '__next__'):
+                self.i = self.ITER_SYNC_GEN
+                return next(response.body)
+            else:
+                self.i = self.ITER_NO_BODY
+                return response.body
+        elif self.i == self.ITER_SYNC_GEN:
+            try:
+                return next(response.body)
+            except StopIteration:
+                await self.aclose()
+                raise StopAsyncIteration
+        if self.buf is not None:
+            # read into the buffer, which is returned as is when it is full,
+            # so that no memory is allocated for each chunk
+            n = response.body.readinto(self.buf)
+            if iscoroutine(n):  # pragma: no cover
+                n = await n
+            if n is None or n < len(self.buf):
+                self.i = self.ITER_NO_BODY
+                return memoryview(self.buf)[:n or 0]
+            return self.buf
+        buf = response.body.read(self.size)
+        if iscoroutine(buf):
+            buf = await buf
+        if len(buf) < self.size:
+            self.i = self.ITER_NO_BODY
+        return buf
+
+    async def aclose(self):
+        response = self.response
+        if self.buf is not None:
+            if response.buffer_pool is not None:
+                response.buffer_pool.release(self.buf)
+            self.buf = None
+        if hasattr(response.body, 'close'):
+            result = response.body.close()
+            if iscoroutine(result):
+                await result
 
 
 class URLPattern():
@@ -869,6 +1356,11 @@ class URLPattern():
         self.url_pattern = url_pattern
         self.segments = []
         self.regex = None
+        #: The path matched by the pattern, if the pattern does not have any
+        #: dynamic segments, or else ``None``.
+        self.static_path = None
+        #: The first segment of the path, if it is static, or else ``None``.
+        self.prefix = None
 
     def compile(self):
         """Generate a regular expression for the URL pattern.
@@ -876,8 +1368,17 @@ class URLPattern():
         This method is automatically invoked the first time the URL pattern is
         matched against a path.
         """
+        import re
         pattern = ''
+        static = True
         for segment in self.url_pattern.lstrip('/').split('/'):
+            if segment[:1] == '<' or \
+                    any(c in segment for c in '.^$*+?{}[]\\|()'):
+                # this segment is dynamic or uses regular expression syntax,
+                # so it cannot be matched with a string comparison
+                static = False
+            elif static and not self.segments:
+                self.prefix = segment
             if segment and segment[0] == '<':
                 if segment[-1] != '>':
                     raise ValueError('invalid URL pattern')
@@ -900,6 +1401,8 @@ class URLPattern():
             else:
                 pattern += '/' + segment
                 self.segments.append({'parser': None})
+        if static:
+            self.static_path = pattern
         self.regex = re.compile('^' + pattern + '$')
         return self.regex
 
@@ -909,8 +1412,12 @@ class URLPattern():
         Returns a dictionary with the values of all dynamic path segments if a
         matche is found, or ``None`` if the path does not match this pattern.
         """
+        if self.regex is None:
+            self.compile()
+        if self.static_path is not None:
+            return {} if path == self.static_path else None
         args = {}
-        g = (self.regex or self.compile()).match(path)
+        g = self.regex.match(path)
         if not g:
             return
         i = 1
@@ -959,7 +1466,12 @@ class Microdot:
         self.after_request_handlers = []
         self.after_error_request_handlers = []
         self.error_handlers = {}
+        self.profile_handlers = []
+        self.shutdown_handlers = []
+        self.route_index = None
         self.options_handler = self.default_options_handler
+        self.static_responses = {}
+        self.background_tasks = None
         self.ssl = False
         self.debug = False
         self.server = None
@@ -998,6 +1510,7 @@ class Microdot:
             self.url_map.append(
                 ([m.upper() for m in (methods or ['GET'])],
                  URLPattern(url_pattern), f, '', None))
+            self.route_index = None
             return f
         return decorated
 
@@ -1091,6 +1604,35 @@ class Microdot:
         """
         return self.route(url_pattern, methods=['DELETE'])
 
+    def static_response(self, url, body='', headers=None, status_code=200):
+        """Register a response that never changes for a URL.
+
+        :param url: The URL of the response. Dynamic path components are not
+                    allowed.
+        :param body: The body of the response, which can be given as bytes, a
+                     string, or a dictionary or list that is encoded as JSON.
+        :param headers: A dictionary with headers to include in the response.
+        :param status_code: The status code of the response. The default is
+                            200.
+
+        The response is serialized once, when it is registered, and the
+        Microdot web server sends it for ``GET`` and ``HEAD`` requests
+        without invoking any handlers, in a single write. This is useful for
+        endpoints that receive a large number of requests, such as health
+        checks, ``robots.txt`` or a fixed configuration. Note that the before
+        and after request handlers of the application do not run for these
+        requests. Example::
+
+            app.static_response('/healthz', 'OK')
+            app.static_response('/robots.txt', 'User-agent: *\nDisallow: /',
+                                {'Content-Type': 'text/plain'})
+
+        When the application runs under an ASGI or WSGI web server, a route
+        that returns the same response is used.
+        """
+        from microdot.static_response import add_static_response
+        add_static_response(self, url, body, headers, status_code)
+
     def before_request(self, f):
         """Decorator to register a function to run before each request is
         handled. The decorated function must take a single argument, the
@@ -1139,6 +1681,50 @@ class Microdot:
         self.after_error_request_handlers.append(f)
         return f
 
+    def on_shutdown(self, f):
+        """Decorator to register a function to run when the web server shuts
+        down, after the remaining requests and background tasks end. The
+        decorated function does not take any arguments, and can be a regular
+        or a coroutine function.
+
+        Example::
+
+            @app.on_shutdown
+            async def func():
+                # ...
+        """
+        self.shutdown_handlers.append(f)
+        return f
+
+    def profile(self, f):
+        """Decorator to register a function that receives timestamps for
+        the different phases of the request lifecycle. The decorated function
+        must take three arguments, the request object, the name of the phase
+        that just completed, and a timestamp in microseconds.
+
+        The phases that are reported are ``'start'`` (the connection was
+        accepted), ``'parse'`` (the request line and headers were parsed),
+        ``'before_request'`` (the before request handlers ran),
+        ``'handler'`` (the route handler returned a response),
+        ``'after_request'`` (the after request handlers ran) and ``'write'``
+        (the response was sent to the client). Phases that do not apply to a
+        request, or that are not handled by the web server in use, are not
+        reported. Timestamps should only be compared against each other, using
+        ``time.ticks_diff()`` on MicroPython.
+
+        Profiling functions are invoked synchronously during the handling of
+        the request, so they must be short. When no profiling functions are
+        registered, timestamps are not collected.
+
+        Example::
+
+            @app.profile
+            def func(request, phase, ticks):
+                # ...
+        """
+        self.profile_handlers.append(f)
+        return f
+
     def errorhandler(self, status_code_or_exception_class):
         """Decorator to register a function as an error handler. Error handler
         functions for numeric HTTP status codes must accept a single argument,
@@ -1179,6 +1765,11 @@ class Microdot:
             self.url_map.append(
                 (methods, URLPattern(url_prefix + pattern.url_pattern),
                  handler, url_prefix + _prefix, _subapp or subapp))
+        self.route_index = None
+        for url, static in subapp.static_responses.items():
+            self.static_responses[url_prefix + url] = static
+        for handler in subapp.shutdown_handlers:
+            self.shutdown_handlers.append(handler)
         if not local:
             for handler in subapp.before_request_handlers:
                 self.before_request_handlers.append(handler)
@@ -1189,10 +1780,44 @@ class Microdot:
             for handler in subapp.after_error_request_handlers:
                 self.after_error_request_handlers.append(handler)
             subapp.after_error_request_handlers = []
+            for handler in subapp.profile_handlers:
+                self.profile_handlers.append(handler)
+            subapp.profile_handlers = []
             for status_code, handler in subapp.error_handlers.items():
                 self.error_handlers[status_code] = handler
             subapp.error_handlers = {}
 
+    def compile(self, template_class=None, templates=None):
+        """Prepare the application to handle requests.
+
+        :param template_class: The template class to use when preloading
+                               templates, such as
+                               :class:`microdot.jinja.Template` or
+                               :class:`microdot.utemplate.Template`.
+        :param templates: A list of template names to load in advance.
+
+        This method compiles the URL patterns of all the routes and builds the
+        index that is used to find the route for each request. A
+        ``ValueError`` exception is raised if a route has an invalid URL
+        pattern. The return value is the time the compilation took, in
+        milliseconds.
+
+        On CPython this method is invoked automatically when the server
+        starts, so it only needs to be called directly to preload templates,
+        or to validate the routes of the application without starting a
+        server. On MicroPython the route index is only built when this method
+        is called. Adding a route discards the index, and the routes are then
+        tried in order until this method is called again. Example::
+
+            from microdot.jinja import Template
+
+            app.compile(template_class=Template,
+                        templates=['index.html', 'page.html'])
+            app.run()
+        """
+        from microdot.route_index import compile_app
+        return compile_app(self, template_class, templates)
+
     @staticmethod
     def abort(status_code, reason=None):
         """Abort the current request and return an error response with the
@@ -1263,6 +1888,11 @@ class Microdot:
         """
         self.ssl = ssl
         self.debug = debug
+        if self.route_index is None and mem_free is None:
+            # on MicroPython the routes are only compiled when the application
+            # calls compile(), so that the index does not use memory when the
+            # application has just a few routes
+            self.compile()
 
         async def serve(reader, writer):
             if not hasattr(writer, 'awrite'):  # pragma: no cover
@@ -1312,6 +1942,13 @@ class Microdot:
                 # the task hasn't been initialized in the server object yet
                 # wait a bit and try again
                 await asyncio.sleep(0.1)
+        if self.background_tasks is not None:
+            await self.background_tasks.shutdown()
+        for handler in self.shutdown_handlers:
+            try:
+                await invoke_handler(handler)
+            except Exception as exc:  # pragma: no cover
+                print_exception(exc)
 
     def run(self, host='0.0.0.0', port=5000, debug=False, ssl=None):
         """Start the web server. This function does not normally return, as
@@ -1371,8 +2008,13 @@ class Microdot:
         f = 404
         p = ''
         s = None
+        routes = self.url_map
+        if self.route_index is not None:
+            routes = self.route_index.get(req.path[1:].split('/', 1)[0])
+            if routes is None:
+                routes = self.route_index[None]
         for route_methods, route_pattern, route_handler, url_prefix, subapp \
-                in self.url_map:
+                in routes:
             req.url_args = route_pattern.match(req.path)
             if req.url_args is not None:
                 p = url_prefix
@@ -1396,9 +2038,14 @@ class Microdot:
 
     async def handle_request(self, reader, writer):
         req = None
+        if self.profile_handlers:
+            start = ticks_us()
         try:
             req = await Request.create(self, reader, writer,
                                        writer.get_extra_info('peername'))
+            if req and self.profile_handlers:
+                self.profile_request(req, 'start', start)
+                self.profile_request(req, 'parse')
         except OSError as exc:  # pragma: no cover
             if exc.errno in MUTED_SOCKET_ERRORS:
                 pass
@@ -1407,9 +2054,18 @@ class Microdot:
         except Exception as exc:  # pragma: no cover
             print_exception(exc)
 
-        res = await self.dispatch_request(req)
+        static = None
+        if req and self.static_responses and req.method in ('GET', 'HEAD'):
+            static = self.static_responses.get(req.path)
+        if static:
+            # constant responses are sent as is, without a dispatch
+            res = None
+        else:
+            res = await self.dispatch_request(req)
         try:
-            if res != Response.already_handled:  # pragma: no branch
+            if static:
+                await writer.awrite(static[1 if req.method == 'HEAD' else 0])
+            elif res != Response.already_handled:  # pragma: no branch
                 await res.write(writer)
             await writer.aclose()
         except OSError as exc:  # pragma: no cover
@@ -1417,10 +2073,35 @@ class Microdot:
                 pass
             else:
                 raise
+        if req and self.profile_handlers:
+            self.profile_request(req, 'write')
+        self.submit_background_tasks(req)
         if self.debug and req:  # pragma: no cover
             print('{method} {path} {status_code}'.format(
                 method=req.method, path=req.path,
-                status_code=res.status_code))
+                status_code=static[2] if static else res.status_code))
+
+    def profile_request(self, req, phase, ticks=None):
+        if ticks is None:
+            ticks = ticks_us()
+        for handler in self.profile_handlers:
+            handler(req, phase, ticks)
+
+    def submit_background_tasks(self, req):
+        """Submit the functions registered with
+        :meth:`Request.after_response` to the background tasks pool.
+
+        :param req: The request object.
+
+        This method is called by the web server after the response is sent.
+        """
+        if req and req._after_response:
+            if self.background_tasks is None:
+                from microdot.background_tasks import BackgroundTasks
+                self.background_tasks = BackgroundTasks()
+            for f, args, kwargs in req._after_response:
+                self.background_tasks.submit(f, *args, **kwargs)
+            req._after_response = None
 
     def get_request_handlers(self, req, attr, local_first=True):
         handlers = getattr(self, attr + '_handlers')
@@ -1451,6 +2132,11 @@ class Microdot:
                     res = None
                     if callable(f):
                         req.route = f
+                        if not req._expect_continue or \
+                                not req.defer_continue:
+                            await req.read_body()
+                        # else the client does not send the body until the
+                        # before request handlers accept the request
 
                         # invoke the before request handlers
                         for handler in self.get_request_handlers(
@@ -1458,9 +2144,12 @@ class Microdot:
                             res = await invoke_handler(handler, req)
                             if res:
                                 break
+                        if self.profile_handlers:
+                            self.profile_request(req, 'before_request')
 
                         # invoke the endpoint handler
                         if res is None:
+                            await req.read_body()
                             res = await invoke_handler(f, req, **req.url_args)
 
                         # process the response
@@ -1490,6 +2179,8 @@ class Microdot:
                             # any other response types are wrapped in a
                             # Response object
                             res = Response(res)
+                        if self.profile_handlers:
+                            self.profile_request(req, 'handler')
 
                         # invoke the after request handlers
                         for handler in self.get_request_handlers(
@@ -1500,6 +2191,8 @@ class Microdot:
                             res = await invoke_handler(
                                 handler, req, res) or res
                         after_request_handled = True
+                        if self.profile_handlers:
+                            self.profile_request(req, 'after_request')
                     elif isinstance(f, dict):
                         # the response from an OPTIONS request is a dict with
                         # headers
@@ -1559,6 +2252,9 @@ class Microdot:
                     req, 'after_error_request', True):
                 res = await invoke_handler(
                     handler, req, res) or res
+        if req and req._spool is not None:
+            # delete the temporary file with the request body
+            await req._spool.aclose()
         res.is_head = (req and req.method == 'HEAD')
         return res
 
@@ -1,6 +1,8 @@
 import os
 from random import choice
 from microdot import abort, iscoroutine, AsyncBytesIO
+from microdot.microdot import default_buffer_size
+from microdot.async_file import AsyncFile
 from microdot.helpers import wraps
 
 
@@ -123,20 +125,30 @@ class FormDataIter:
             self.buffer_size + self.extra_size - len(self.buffer))
 
     async def _read_buffer(self, n=-1):
-        data = b''
-        while n == -1 or len(data) < n:
+        # the chunks are collected in a list and joined at the end, so that
+        # large reads do not copy the data read so far on each iteration
+        chunks = []
+        size = 0
+        while n == -1 or size < n:
             await self._fill_buffer()
             s = self.buffer.split(self.boundary, 1)
-            data += s[0][:n] if n != -1 else s[0]
-            self.buffer = s[0][n:] if n != -1 else b''
+            if n == -1:
+                chunk = s[0]
+                self.buffer = b''
+            else:
+                chunk = s[0][:n - size]
+                self.buffer = s[0][n - size:]
+            chunks.append(chunk)
+            size += len(chunk)
             if len(s) == 2:  # pragma: no branch
                 # the end of this part is in the buffer
+                data = b''.join(chunks)
                 if len(self.buffer) < 2:
                     # we have read all the way to the end of this part
                     data = data[:-(2 - len(self.buffer))]  # remove last "\r\n"
                 self.buffer += self.boundary + s[1]
                 return data
-        return data
+        return b''.join(chunks)
 
 
 class FileUpload:
@@ -168,26 +180,35 @@ class FileUpload:
         """
         return await self._read(n)
 
-    async def save(self, path_or_file):
+    async def save(self, path_or_file, buffer_size=None):
         """Save the uploaded file to the given path or file object.
 
         :param path_or_file: the path to save the file to, or a file object
                              to which the file is to be written.
-
-        The file is read and written in chunks of size
-        :attr:`FormDataIter.buffer_size`.
+        :param buffer_size: the size of the chunks in which the file is read
+                            and written. If not given, the size returned by
+                            :func:`default_buffer_size()
+                            <microdot.microdot.default_buffer_size>` is used,
+                            which is 64KB on CPython and at most 4KB on
+                            MicroPython.
+
+        On CPython, large writes run in the thread pool of
+        :class:`AsyncFile <microdot.async_file.AsyncFile>`.
         """
         if isinstance(path_or_file, str):
-            f = open(path_or_file, 'wb')
-        else:
+            f = AsyncFile(open(path_or_file, 'wb'))
+        elif isinstance(path_or_file, AsyncFile):
             f = path_or_file
+        else:
+            f = AsyncFile(path_or_file)
+        buffer_size = buffer_size or default_buffer_size()
         while True:
-            data = await self.read(FormDataIter.buffer_size)
+            data = await self.read(buffer_size)
             if not data:
                 break
-            f.write(data)
-        if f != path_or_file:
-            f.close()
+            await f.write(data)
+        if isinstance(path_or_file, str):
+            await f.close()
 
     async def copy(self, max_memory_size=None):
         """Copy the uploaded file to a temporary file, to allow the parsing of
@@ -226,18 +247,17 @@ class FileUpload:
                 else:
                     raise
             break
-        f.write(buffer)
+        f = AsyncFile(f)
+        await f.write(buffer)
         await self.save(f)
-        f.seek(0)
-
-        async def read(n=-1):
-            return f.read(n)
+        await f.seek(0)
 
         async def close():
-            f.close()
+            await f.close()
             os.remove(tmpname)
 
-        self._read = read
+        self._read = f.read
+
         self._close = close
         return self
 
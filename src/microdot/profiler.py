@@ -0,0 +1,86 @@
+from microdot.microdot import ticks_us, ticks_diff
+
+
+class Profiler:
+    """Request lifecycle profiler.
+
+    :param app: The application instance.
+    :param server_timing: If ``True``, a ``Server-Timing`` header with the
+                          duration of each phase of the request is added to
+                          responses. If ``False``, the header is never added.
+                          The default is ``None``, which adds the header only
+                          when the application runs in debug mode.
+    :param callback: An optional function that is invoked after the response
+                     is sent to the client, with the request object and a
+                     dictionary with the duration of each phase in
+                     milliseconds as arguments.
+
+    The durations reported for each phase are measured from the end of the
+    previous phase. See :meth:`Microdot.profile() <microdot.Microdot.profile>`
+    for the list of phases.
+    """
+    def __init__(self, app=None, server_timing=None, callback=None):
+        self.server_timing = server_timing
+        self.callback = callback
+        if app is not None:
+            self.initialize(app)
+
+    def initialize(self, app, server_timing=None, callback=None):
+        """Initialize the profiler.
+
+        :param app: The application instance.
+        :param server_timing: If given, it overrides the value passed in the
+                              constructor.
+        :param callback: If given, it overrides the value passed in the
+                         constructor.
+        """
+        if server_timing is not None:
+            self.server_timing = server_timing
+        if callback is not None:
+            self.callback = callback
+        app.profile(self.record)
+
+    def record(self, request, phase, ticks):
+        """Record the timestamp of a request phase.
+
+        :param request: The request object.
+        :param phase: The name of the phase that completed.
+        :param ticks: The timestamp of the end of the phase.
+
+        This method is registered as a profiling function with the
+        application, so it does not need to be called directly.
+        """
+        try:
+            timings = request.g._profile
+        except AttributeError:
+            timings = request.g._profile = []
+            server_timing = request.app.debug \
+                if self.server_timing is None else self.server_timing
+            if server_timing:
+                request.after_request(self._add_server_timing)
+        timings.append((phase, ticks))
+        if phase == 'write' and self.callback:
+            self.callback(request, self.durations(request))
+
+    def durations(self, request):
+        """Return the durations of the phases of a request that have been
+        recorded so far, as a dictionary with values in milliseconds.
+
+        :param request: The request object.
+        """
+        timings = getattr(request.g, '_profile', [])
+        durations = {}
+        for i in range(1, len(timings)):
+            durations[timings[i][0]] = ticks_diff(
+                timings[i][1], timings[i - 1][1]) / 1000
+        return durations
+
+    def _add_server_timing(self, request, response):
+        timings = request.g._profile + [('after_request', ticks_us())]
+        metrics = []
+        for i in range(1, len(timings)):
+            metrics.append('{};dur={:.3f}'.format(
+                timings[i][0],
+                ticks_diff(timings[i][1], timings[i - 1][1]) / 1000))
+        response.headers['Server-Timing'] = ', '.join(metrics)
+        return response
@@ -0,0 +1,49 @@
+from microdot.microdot import ticks_us, ticks_diff
+
+
+def build_route_index(url_map):
+    """Compile the URL patterns of a list of routes, and return an index to
+    find the routes that can match a path.
+
+    :param url_map: The list of routes of the application.
+
+    The keys of the index are the first segments of the routes with a static
+    start, and ``None`` for the routes that can match any path. The value for
+    each key is the list of routes to try, in the original order.
+    """
+    index = {None: []}
+    for route in url_map:
+        pattern = route[1]
+        if pattern.regex is None:
+            try:
+                pattern.compile()
+            except ValueError as exc:
+                raise ValueError('{}: {}'.format(pattern.url_pattern, exc))
+        if pattern.prefix is None:
+            # routes that do not start with a static segment can match any
+            # path, so they are added to all the index entries
+            for routes in index.values():
+                routes.append(route)
+        else:
+            if pattern.prefix not in index:
+                index[pattern.prefix] = index[None][:]
+            index[pattern.prefix].append(route)
+    return index
+
+
+def compile_app(app, template_class=None, templates=None):
+    """Build the route index of an application and preload its templates.
+
+    This function implements :meth:`Microdot.compile()
+    <microdot.Microdot.compile>`, and returns the time it took, in
+    milliseconds.
+    """
+    start = ticks_us()
+    app.route_index = build_route_index(app.url_map)
+    for template in templates or []:
+        template_class(template)
+    elapsed = ticks_diff(ticks_us(), start) / 1000
+    if app.debug:  # pragma: no cover
+        print('Compiled {count} routes in {elapsed:.2f}ms'.format(
+            count=len(app.url_map), elapsed=elapsed))
+    return elapsed
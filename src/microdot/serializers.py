@@ -0,0 +1,211 @@
+from microdot import microdot, abort
+from microdot.microdot import invoke_handler
+from microdot.helpers import wraps
+
+
+class Serializer:
+    """A serializer for a content type.
+
+    :param mime_type: the content type handled by the serializer.
+    :param dumps: a function that encodes an object. The function can return
+                  bytes or a string.
+    :param loads: a function that decodes an object from bytes.
+    """
+    def __init__(self, mime_type, dumps, loads):
+        self.mime_type = mime_type
+        self.dumps = dumps
+        self.loads = loads
+
+    def encode(self, data):
+        """Encode an object to bytes."""
+        data = self.dumps(data)
+        if isinstance(data, str):
+            data = data.encode()
+        return data
+
+    def decode(self, data):
+        """Decode an object from bytes."""
+        return self.loads(data)
+
+
+class Serializers:
+    """A registry of serializers, used to decode request bodies according to
+    their content type and to encode responses according to the content types
+    accepted by the client.
+
+    :param defaults: when ``True``, a JSON serializer is registered, followed
+                     by MessagePack and CBOR serializers when the ``msgpack``
+                     and ``cbor2`` packages are installed.
+
+    Example usage::
+
+        from microdot.serializers import Serializers
+
+        serializers = Serializers()
+
+        @app.post('/readings')
+        @serializers.negotiate
+        async def add_reading(request):
+            reading = serializers.loads(request)
+            ...
+            return {'id': reading_id}, 201
+
+    JSON is encoded and decoded with ``orjson`` when it is installed. The
+    first serializer that is registered is used when the client accepts any
+    content type.
+    """
+    def __init__(self, defaults=True):
+        self.serializers = []
+        if defaults:
+            json = microdot.json or microdot.import_json()
+            self.register('application/json', json.dumps, json.loads)
+            try:
+                import msgpack  # type: ignore[import-not-found]
+            except ImportError:
+                pass
+            else:  # pragma: no cover
+                self.register('application/msgpack', msgpack.packb,
+                              msgpack.unpackb)
+                self.register('application/x-msgpack', msgpack.packb,
+                              msgpack.unpackb)
+            try:
+                import cbor2  # type: ignore[import-not-found]
+            except ImportError:
+                pass
+            else:  # pragma: no cover
+                self.register('application/cbor', cbor2.dumps, cbor2.loads)
+
+    def register(self, mime_type, dumps, loads):
+        """Register a serializer.
+
+        :param mime_type: the content type handled by the serializer.
+        :param dumps: a function that encodes an object to bytes or a string.
+        :param loads: a function that decodes an object from bytes.
+
+        A serializer that was previously registered for the same content type
+        is replaced.
+        """
+        serializer = Serializer(mime_type, dumps, loads)
+        for i, s in enumerate(self.serializers):
+            if s.mime_type == mime_type:
+                self.serializers[i] = serializer
+                return
+        self.serializers.append(serializer)
+
+    def get(self, mime_type):
+        """Return the serializer for a content type, or ``None`` if the
+        content type does not have a serializer.
+
+        :param mime_type: the content type. Any parameters included after the
+                          type, such as ``charset``, are ignored.
+        """
+        mime_type = mime_type.split(';', 1)[0].strip().lower()
+        for s in self.serializers:
+            if s.mime_type == mime_type:
+                return s
+
+    def select(self, accept):
+        """Return the serializer that best matches an ``Accept`` header, or
+        ``None`` if none of the accepted content types have a serializer.
+
+        :param accept: the value of the ``Accept`` header, or ``None`` if the
+                       request does not have one.
+        """
+        if not accept:
+            return self.serializers[0] if self.serializers else None
+        choices = []
+        for i, item in enumerate(accept.split(',')):
+            parts = item.split(';')
+            q = 1.0
+            for param in parts[1:]:
+                param = param.strip()
+                if param.startswith('q='):
+                    try:
+                        q = float(param[2:])
+                    except ValueError:
+                        q = 0
+            if q > 0:
+                choices.append((-q, i, parts[0].strip().lower()))
+        choices.sort()
+        for _, _, mime_type in choices:
+            if mime_type == '*/*':
+                return self.serializers[0] if self.serializers else None
+            elif mime_type.endswith('/*'):
+                for s in self.serializers:
+                    if s.mime_type.startswith(mime_type[:-1]):
+                        return s
+            else:
+                s = self.get(mime_type)
+                if s:
+                    return s
+
+    def loads(self, request):
+        """Decode the body of a request according to its content type.
+
+        :param request: the request object.
+
+        Returns ``None`` if the request does not have a body. The request is
+        aborted with a 415 status code if its content type does not have a
+        serializer, or with a 400 status code if the body cannot be decoded.
+        """
+        body = request.body
+        if not body:
+            return None
+        s = self.get(request.content_type or '')
+        if s is None:
+            abort(415)
+        try:
+            return s.decode(body)
+        except Exception:
+            abort(400)
+
+    def dumps(self, request, data):
+        """Encode an object according to the content types accepted by the
+        client.
+
+        :param request: the request object.
+        :param data: the object to encode.
+
+        Returns a tuple with the encoded data and its content type. The
+        request is aborted with a 406 status code if none of the content
+        types accepted by the client have a serializer.
+        """
+        s = self.select(request.headers.get('Accept'))
+        if s is None:
+            abort(406)
+        return s.encode(data), s.mime_type
+
+    def negotiate(self, f):
+        """Decorator that encodes the dictionaries and lists returned by a
+        route according to the ``Accept`` header of the request.
+
+        The encoded response has a ``Content-Type`` header with the selected
+        content type and a ``Vary: Accept`` header, so that caches store a
+        separate response for each content type. Other responses returned by
+        the route are not modified.
+        """
+        @wraps(f)
+        async def wrapper(request, *args, **kwargs):
+            ret = await invoke_handler(f, request, *args, **kwargs)
+            if isinstance(ret, tuple):
+                body = ret[0]
+                rest = ret[1:]
+            else:
+                body = ret
+                rest = ()
+            if not isinstance(body, (dict, list)):
+                return ret
+            status_code = 200
+            headers = {}
+            for value in rest:
+                if isinstance(value, int):
+                    status_code = value
+                else:
+                    headers = value
+            body, content_type = self.dumps(request, body)
+            res = microdot.Response(body, status_code, headers)
+            if 'Content-Type' not in res.headers:
+                res.headers['Content-Type'] = content_type
+            res.headers['Vary'] = 'Accept'
+            return res
+        return wrapper
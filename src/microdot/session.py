@@ -1,4 +1,3 @@
-import jwt
 from microdot.microdot import invoke_handler
 from microdot.helpers import wraps
 
@@ -125,10 +124,12 @@ class Session:
             return response
 
     def encode(self, payload, secret_key=None):
+        import jwt
         return jwt.encode(payload, secret_key or self.secret_key,
                           algorithm='HS256')
 
     def decode(self, session, secret_key=None):
+        import jwt
         try:
             payload = jwt.decode(session, secret_key or self.secret_key,
                                  algorithms=['HS256'])
@@ -0,0 +1,93 @@
+import os
+from microdot.microdot import abort, default_buffer_size, ticks_us
+from microdot.async_file import AsyncFile
+
+
+class SpooledBody(AsyncFile):
+    """A request body stored in a temporary file.
+
+    :param file: The temporary file, open for reading.
+    :param filename: The path of the temporary file, which is deleted when
+                     the body is closed.
+
+    This is a seekable async stream, with the same reading methods as the
+    stream of a request that is read from the network. As with
+    :class:`AsyncFile <microdot.async_file.AsyncFile>`, the file is read in
+    a thread pool on CPython, so that the event loop is not blocked by the
+    disk.
+    """
+    def __init__(self, file, filename):
+        super().__init__(file)
+        self.filename = filename
+
+    @classmethod
+    async def receive(cls, stream, length, directory):
+        """Write a request body to a new temporary file, and return a
+        spooled body for it.
+
+        :param stream: The stream from which the body is read.
+        :param length: The length of the body, in bytes.
+        :param directory: The directory in which the temporary file is
+                          created.
+
+        If the stream ends before ``length`` bytes are received, the
+        temporary file is deleted and a 400 error is returned to the client.
+        """
+        try:
+            import tempfile
+            fd, filename = tempfile.mkstemp(prefix='microdot-', dir=directory)
+            os.close(fd)
+        except ImportError:  # pragma: no cover
+            filename = '{}/microdot-{:x}-{:x}.tmp'.format(
+                directory, id(stream), ticks_us())
+        spool = cls(open(filename, 'w+b'), filename)
+        size = default_buffer_size()
+        try:
+            remaining = length
+            while remaining > 0:
+                data = await stream.read(min(remaining, size))
+                if not data:
+                    # the client sent less than the declared length
+                    abort(400)
+                await spool.write(data)
+                remaining -= len(data)
+            await spool.seek(0)
+        except BaseException:
+            await spool.aclose()
+            raise
+        return spool
+
+    async def read(self, n=-1):
+        # there is no read-ahead, so that tell() and readline() see the
+        # actual position of the file
+        return await self._run(self.file.read, n)
+
+    async def readline(self):
+        return await self._run(self.file.readline)
+
+    async def readexactly(self, n):
+        return await self._run(self.file.read, n)
+
+    async def tell(self):
+        return self.file.tell()
+
+    def getvalue(self):
+        """Return the entire body as bytes, without changing the current
+        position of the stream.
+
+        This method reads the file directly, without the thread pool.
+        """
+        pos = self.file.tell()
+        self.file.seek(0)
+        data = self.file.read()
+        self.file.seek(pos)
+        return data
+
+    async def aclose(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            try:
+                os.remove(self.filename)
+            except OSError:  # pragma: no cover
+                pass
@@ -1,10 +1,6 @@
 import asyncio
 from microdot.helpers import wraps
-
-try:
-    import orjson as json  # type: ignore[import-not-found]
-except ImportError:
-    import json
+from microdot import microdot
 
 
 class SSE:
@@ -36,7 +32,7 @@ class SSE:
                         connection alive.
         """
         if isinstance(data, (dict, list)):
-            data = json.dumps(data)
+            data = (microdot.json or microdot.import_json()).dumps(data)
         if isinstance(data, str):
             data = data.encode()
         elif not isinstance(data, bytes):
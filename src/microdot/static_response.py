@@ -0,0 +1,26 @@
+from microdot.microdot import Response
+
+
+def add_static_response(app, url, body, headers, status_code):
+    """Serialize a constant response and register it with an application.
+
+    This function implements :meth:`Microdot.static_response()
+    <microdot.Microdot.static_response>`, and is kept out of the core module
+    so that applications that do not use static responses do not load it.
+    """
+    if '<' in url:
+        raise ValueError('static responses cannot have dynamic URLs')
+    res = Response(body, status_code, headers)
+    if not isinstance(res.body, bytes):
+        raise ValueError('static responses must have a bytes, str, dict '
+                         'or list body')
+    res.complete()
+    head = res._serialize_headers()
+    app.static_responses[url] = (head + res.body, head, status_code)
+    body = res.body
+    headers = res.headers
+
+    async def static(request):
+        return Response(body, status_code, headers)
+
+    app.route(url)(static)
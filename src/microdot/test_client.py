@@ -1,19 +1,19 @@
 import asyncio
-from microdot.microdot import Request, Response, AsyncBytesIO
+from microdot import microdot
+from microdot.microdot import Request, Response, AsyncBytesIO, ticks_us
 
 try:
     from microdot.websocket import WebSocket
 except:  # pragma: no cover  # noqa: E722
     WebSocket = None  # type: ignore[assignment, misc]
 
-try:
-    import orjson as json  # type: ignore[import-not-found]
-except ImportError:
-    import json
-
 __all__ = ['TestClient', 'TestResponse']
 
 
+def _json():
+    return microdot.json or microdot.import_json()
+
+
 class TestResponse:
     """A response object issued by the Microdot test client."""
     def __init__(self):
@@ -67,7 +67,7 @@ class TestResponse:
         if 'Content-Type' in self.headers:  # pragma: no branch
             content_type = self.headers['Content-Type']
             if content_type.split(';')[0] == 'application/json':
-                self.json = json.loads(self.text)
+                self.json = _json().loads(self.body)
 
     def _process_sse_body(self):
         if 'Content-Type' in self.headers:  # pragma: no branch
@@ -91,7 +91,7 @@ class TestResponse:
                     if data:
                         data_json = None
                         try:
-                            data_json = json.loads(data)
+                            data_json = _json().loads(data)
                         except ValueError:
                             pass
                         self.events.append({
@@ -149,7 +149,7 @@ class TestClient:
         if body is None:
             body = b''
         elif isinstance(body, (dict, list)):
-            body = json.dumps(body)
+            body = _json().dumps(body)
             if 'Content-Type' not in headers:  # pragma: no cover
                 headers['Content-Type'] = 'application/json'
         if isinstance(body, str):
@@ -187,7 +187,7 @@ class TestClient:
         return request_bytes
 
     def _update_cookies(self, res):
-        cookies = res.headers.get('Set-Cookie', [])
+        cookies = res.headers.getlist('Set-Cookie')
         for cookie in cookies:
             cookie_name, cookie_value = cookie.split('=', 1)
             cookie_options = cookie_value.split(';')
@@ -239,15 +239,24 @@ class TestClient:
             reader = AsyncBytesIO(request_bytes)
             writer = AsyncBytesIO(b'')
 
+        if self.app.profile_handlers:
+            start = ticks_us()
         req = await Request.create(self.app, reader, writer,
                                    ('127.0.0.1', 1234), scheme=self.scheme)
+        if self.app.profile_handlers:
+            self.app.profile_request(req, 'start', start)
+            self.app.profile_request(req, 'parse')
         res = await self.app.dispatch_request(req)
         if res == Response.already_handled:
-            return TestResponse()
-        res.complete()
-
-        self._update_cookies(res)
-        return await TestResponse.create(res)
+            test_res = TestResponse()
+        else:
+            res.complete()
+            self._update_cookies(res)
+            test_res = await TestResponse.create(res)
+        if self.app.profile_handlers:
+            self.app.profile_request(req, 'write')
+        self.app.submit_background_tasks(req)
+        return test_res
 
     async def get(self, path, headers=None):
         """Send a GET request to the application.
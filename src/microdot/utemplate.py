@@ -47,6 +47,10 @@ class Template:
         """Return an asynchronous generator that renders the template in
         chunks, using the given arguments."""
         class sync_to_async_iter():
+            # the chunks are generated without waiting, so they can be
+            # combined into larger writes
+            buffered = True
+
             def __init__(self, iter):
                 self.iter = iter
 
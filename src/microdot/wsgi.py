@@ -2,10 +2,8 @@ import asyncio
 import os
 import signal
 from microdot import *  # noqa: F401, F403
-from microdot.microdot import Microdot as BaseMicrodot, Request, NoCaseDict, \
-    MUTED_SOCKET_ERRORS
-from microdot.websocket import WebSocket, websocket_upgrade, \
-    with_websocket  # noqa: F401
+from microdot.microdot import Microdot as BaseMicrodot, Request, Headers, \
+    MUTED_SOCKET_ERRORS, ticks_us
 
 
 class Microdot(BaseMicrodot):  # type: ignore[no-redef]
@@ -22,10 +20,12 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
 
     def wsgi_app(self, environ, start_response):
         """A WSGI application callable."""
+        if self.profile_handlers:
+            start = ticks_us()
         path = environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', '')
         if 'QUERY_STRING' in environ and environ['QUERY_STRING']:
             path += '?' + environ['QUERY_STRING']
-        headers = NoCaseDict()
+        headers = Headers()
         content_length = 0
         for k, value in environ.items():
             if k.startswith('HTTP_'):
@@ -51,41 +51,36 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
                 return self.wsgi_input.read(n)
 
         wsgi_input = environ.get('wsgi.input')
-        if content_length and content_length <= Request.max_body_length:
-            # the request came with a body that is within the allowed size
-            body = wsgi_input.read(content_length)
-            stream = None
+        if content_length:
+            # the request came with a body, which is read once the request is
+            # routed, or streamed if it is too large to fit in memory
+            body = None
+            stream = sync_to_async_body_stream(wsgi_input)
             sock = (None, None)
         else:
             body = b''
-            if content_length:
-                # the request came with a body that is too large to fit in
-                # memory, so we stream it
-                stream = sync_to_async_body_stream(wsgi_input)
-                sock = (None, None)
+            # the request did not declare a body size, so we connect the
+            # raw socket if available
+            stream = None
+            if 'gunicorn.socket' in environ:  # pragma: no cover
+                reader, writer = self.loop.run_until_complete(
+                    asyncio.open_connection(
+                        sock=environ['gunicorn.socket'].dup()))
+                if not hasattr(writer, 'awrite'):  # pragma: no cover
+                    async def awrite(self, data):
+                        self.write(data)
+                        await self.drain()
+
+                    async def aclose(self):
+                        self.close()
+                        await self.wait_closed()
+
+                    from types import MethodType
+                    writer.awrite = MethodType(awrite, writer)
+                    writer.aclose = MethodType(aclose, writer)
+                sock = (reader, writer)
             else:
-                # the request did not declare a body size, so we connect the
-                # raw socket if available
-                stream = None
-                if 'gunicorn.socket' in environ:  # pragma: no cover
-                    reader, writer = self.loop.run_until_complete(
-                        asyncio.open_connection(
-                            sock=environ['gunicorn.socket'].dup()))
-                    if not hasattr(writer, 'awrite'):  # pragma: no cover
-                        async def awrite(self, data):
-                            self.write(data)
-                            await self.drain()
-
-                        async def aclose(self):
-                            self.close()
-                            await self.wait_closed()
-
-                        from types import MethodType
-                        writer.awrite = MethodType(awrite, writer)
-                        writer.aclose = MethodType(aclose, writer)
-                    sock = (reader, writer)
-                else:
-                    sock = (None, None)
+                sock = (None, None)
 
         req = Request(
             self,
@@ -99,6 +94,9 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
             sock=sock,
             scheme=environ.get('wsgi.url_scheme'))
         req.environ = environ
+        if self.profile_handlers:
+            self.profile_request(req, 'start', start)
+            self.profile_request(req, 'parse')
 
         res = self.loop.run_until_complete(self.dispatch_request(req))
         res.complete()
@@ -121,6 +119,8 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
                     header_list.append((name, v))
         start_response(str(res.status_code) + ' ' + reason, header_list)
 
+        app = self
+
         class async_to_sync_iter():
             def __init__(self, iter, loop):
                 self.iter = iter.__aiter__()
@@ -131,13 +131,30 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
 
             def __next__(self):
                 try:
-                    return self.loop.run_until_complete(self.iter.__anext__())
+                    chunk = self.loop.run_until_complete(
+                        self.iter.__anext__())
                 except StopAsyncIteration:
                     raise StopIteration
+                if isinstance(chunk, (memoryview, bytearray)):
+                    # WSGI servers only accept bytes, but memory mapped
+                    # files and buffer pools return views and bytearrays
+                    chunk = bytes(chunk)
+                return chunk
 
             def close(self):  # pragma: no cover
                 if hasattr(self.iter, 'aclose'):
                     self.loop.run_until_complete(self.iter.aclose())
+                if app.profile_handlers:
+                    app.profile_request(req, 'write')
+                if req._after_response:
+                    # the event loop only runs while requests are handled,
+                    # so the background tasks are completed before the
+                    # next request
+                    async def run_background_tasks():
+                        app.submit_background_tasks(req)
+                        await app.background_tasks.drain()
+
+                    self.loop.run_until_complete(run_background_tasks())
 
         return async_to_sync_iter(res.body_iter(), self.loop)
 
@@ -159,3 +176,13 @@ class Microdot(BaseMicrodot):  # type: ignore[no-redef]
         """
         self.embedded_server = True
         super().run(host=host, port=port, debug=debug, **options)
+
+
+def __getattr__(name):
+    # the WebSocket support is imported when it is first used, so that
+    # applications that do not need it start faster
+    if name in ['WebSocket', 'websocket_upgrade', 'with_websocket']:
+        from microdot import websocket
+        return getattr(websocket, name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(
+        __name__, name))
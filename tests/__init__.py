@@ -5,11 +5,17 @@ from tests.test_response import *  # noqa: F401, F403
 from tests.test_urlencode import *  # noqa: F401, F403
 from tests.test_url_pattern import *  # noqa: F401, F403
 from tests.test_multipart import *  # noqa: F401, F403
+from tests.test_json_stream import *  # noqa: F401, F403
+from tests.test_serializers import *  # noqa: F401, F403
 from tests.test_websocket import *  # noqa: F401, F403
 from tests.test_sse import *  # noqa: F401, F403
 from tests.test_cors import *  # noqa: F401, F403
+from tests.test_etag import *  # noqa: F401, F403
+from tests.test_background_tasks import *  # noqa: F401, F403
 from tests.test_utemplate import *  # noqa: F401, F403
 from tests.test_session import *  # noqa: F401, F403
 from tests.test_auth import *  # noqa: F401, F403
 from tests.test_login import *  # noqa: F401, F403
 from tests.test_csrf import *  # noqa: F401, F403
+from tests.test_profiler import *  # noqa: F401, F403
+from tests.test_access_log import *  # noqa: F401, F403
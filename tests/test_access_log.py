@@ -0,0 +1,145 @@
+import asyncio
+import io
+import unittest
+from microdot import Microdot
+from microdot.access_log import AccessLog
+from microdot.test_client import TestClient
+from tests.mock_socket import get_async_request_fd
+
+
+class TestAccessLog(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def setUp(self):
+        self.logs = []
+
+    def tearDown(self):
+        # cancel the flush tasks that are still waiting for their interval
+        for log in self.logs:
+            if log.task is not None:
+                log.task.cancel()
+                try:
+                    self._run(log.task)
+                except asyncio.CancelledError:
+                    pass
+
+    def _app(self, **kwargs):
+        app = Microdot()
+        stream = io.StringIO()
+        log = AccessLog(app, stream=stream, use_thread=False, **kwargs)
+        self.logs.append(log)
+
+        @app.route('/')
+        async def index(req):
+            return 'foo'
+
+        return app, log, stream
+
+    def _requests(self, client, *requests):
+        async def run():
+            for path, headers in requests:
+                await client.get(path, headers=headers)
+
+        self._run(run())
+
+    def test_common(self):
+        app, log, stream = self._app()
+        client = TestClient(app)
+        self._requests(client, ('/?x=y', None), ('/bar', None))
+        self.assertEqual(log.count, 2)
+        self._run(log.flush())
+        self.assertEqual(log.count, 0)
+        self.assertEqual(log.written, 2)
+        lines = stream.getvalue().split('\n')
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('127.0.0.1 - - ['))
+        self.assertIn(' +0000] "GET /?x=y HTTP/1.0" 200 3 ', lines[0])
+        self.assertIn(' +0000] "GET /bar HTTP/1.0" 404 9 ', lines[1])
+        self.assertTrue(int(lines[0].split(' ')[-1]) >= 0)
+        self.assertEqual(lines[2], '')
+
+    def test_static_response(self):
+        app, log, stream = self._app()
+        app.static_response('/healthz', 'healthy')
+
+        async def run():
+            for method in ('GET', 'HEAD'):
+                fd = get_async_request_fd(method, '/healthz')
+                await app.handle_request(fd, fd)
+                body = fd.response.split(b'\r\n\r\n', 1)[1]
+                self.assertEqual(body, b'healthy' if method == 'GET' else b'')
+
+        self._run(run())
+        self._run(log.flush())
+        lines = stream.getvalue().split('\n')
+        self.assertIn('"GET /healthz HTTP/1.0" 200 7 ', lines[0])
+        self.assertIn('"HEAD /healthz HTTP/1.0" 200 7 ', lines[1])
+
+    def test_combined(self):
+        app, log, stream = self._app(format='combined')
+        client = TestClient(app)
+        self._requests(client, ('/', {'User-Agent': 'test/1.0'}))
+        self._run(log.flush())
+        line = stream.getvalue()
+        self.assertIn('"GET / HTTP/1.0" 200 3 "-" "test/1.0" ', line)
+
+    def test_json(self):
+        app, log, stream = self._app(format='json')
+        client = TestClient(app)
+        self._requests(client, ('/', {'Referer': 'http://x.com'}))
+        self._run(log.flush())
+        line = stream.getvalue()
+        self.assertIn('"method":', line)
+        self.assertIn('"referer":', line)
+        self.assertIn('http://x.com', line)
+        self.assertTrue(line.endswith('}\n'))
+
+    def test_background_flush(self):
+        app, log, stream = self._app(flush_interval=0.01)
+        client = TestClient(app)
+
+        async def run():
+            await client.get('/')
+            self.assertIsNotNone(log.task)
+            await asyncio.sleep(0.1)
+
+        self._run(run())
+        self.assertIsNone(log.task)
+        self.assertEqual(log.written, 1)
+        self.assertIn('"GET / HTTP/1.0" 200 3 ', stream.getvalue())
+
+    def test_close(self):
+        app, log, stream = self._app(flush_interval=10)
+        client = TestClient(app)
+        self.assertEqual(app.shutdown_handlers, [log.close])
+
+        async def run():
+            await client.get('/')
+            await client.get('/')
+            self.assertIsNotNone(log.task)
+            await log.close()
+            self.assertIsNone(log.task)
+
+        self._run(run())
+        self.assertEqual(log.count, 0)
+        self.assertEqual(log.written, 2)
+        self.assertEqual(len(stream.getvalue().split('\n')), 3)
+
+    def test_dropped_records(self):
+        app, log, stream = self._app(buffer_size=2)
+        client = TestClient(app)
+        self._requests(client, *[('/', None)] * 5)
+        self.assertEqual(log.count, 2)
+        self.assertEqual(log.dropped, 3)
+        self._run(log.flush())
+        self.assertEqual(log.written, 2)
+        self.assertEqual(len(stream.getvalue().split('\n')), 3)
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            AccessLog(format='foo')
@@ -4,6 +4,7 @@ import unittest
 from unittest import mock
 
 from microdot.asgi import Microdot, Response
+from microdot.mapped_file import MappedFile
 
 
 @unittest.skipIf(sys.implementation.name == 'micropython',
@@ -28,7 +29,7 @@ class TestASGI(unittest.TestCase):
             self.assertEqual(req.method, 'POST')
             self.assertEqual(req.http_version, 'HTTP/1.1')
             self.assertEqual(req.path, '/foo/bar')
-            self.assertEqual(req.args, {'baz': ['1']})
+            self.assertEqual(req.args, {'baz': '1'})
             self.assertEqual(req.cookies, {'session': 'xyz'})
             self.assertEqual(req.body, b'body')
 
@@ -145,6 +146,83 @@ class TestASGI(unittest.TestCase):
 
         self._run(app(scope, receive, send))
 
+    def test_asgi_repeated_headers(self):
+        app = Microdot()
+
+        @app.post('/')
+        async def index(req):
+            self.assertEqual(req.headers['X-Foo'], 'a, b')
+            self.assertEqual(req.cookies, {'a': '1', 'b': '2'})
+            self.assertEqual(req.content_type, 'application/json')
+            return req.json
+
+        scope = {
+            'type': 'http',
+            'path': '/',
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-type', b'application/json'),
+                        (b'x-foo', b'a'), (b'x-foo', b'b'),
+                        (b'cookie', b'a=1'), (b'cookie', b'b=2'),
+                        (b'content-length', b'10')],
+            'client': ['1.2.3.4', 1234],
+            'method': 'POST',
+            'http_version': '1.1',
+        }
+
+        events = [{'type': 'http.request', 'body': b'{"foo": 1}',
+                   'more_body': False}]
+
+        async def receive():
+            if events:
+                return events.pop()
+            await asyncio.sleep(0.1)
+            return {'type': 'http.disconnect'}
+
+        packets = []
+
+        async def send(packet):
+            packets.append(packet)
+
+        self._run(app(scope, receive, send))
+        self.assertEqual(packets[0]['status'], 200)
+        self.assertEqual(packets[1]['body'], b'{"foo":1}')
+
+    def test_send_file_mmap(self):
+        saved_send_file_mmap_size = Response.send_file_mmap_size
+        Response.send_file_mmap_size = 1
+        app = Microdot()
+
+        @app.route('/')
+        async def index(req):
+            return Response.send_file('tests/files/test.gz', buffer_size=8)
+
+        scope = {
+            'type': 'http',
+            'path': '/',
+            'headers': [],
+            'client': ['1.2.3.4', 1234],
+            'method': 'GET',
+            'http_version': '1.1',
+        }
+
+        async def receive():
+            await asyncio.sleep(0.1)
+            return {'type': 'http.disconnect'}
+
+        chunks = []
+
+        async def send(packet):
+            if packet['type'] == 'http.response.body':
+                chunks.append(packet['body'])
+
+        self._run(app(scope, receive, send))
+        with open('tests/files/test.gz', 'rb') as f:
+            self.assertEqual(b''.join(chunks), f.read())
+        for chunk in chunks:
+            self.assertEqual(type(chunk), bytes)
+        Response.send_file_mmap_size = saved_send_file_mmap_size
+        MappedFile.purge(idle_timeout=0)
+
     def test_shutdown(self):
         app = Microdot()
 
@@ -208,6 +286,11 @@ class TestASGI(unittest.TestCase):
             scope['state']['foo'] = 'baz'
 
         app = Microdot(lifespan_startup=startup, lifespan_shutdown=shutdown)
+        shutdown_calls = []
+
+        @app.on_shutdown
+        def on_shutdown():
+            shutdown_calls.append(True)
 
         scope = {
             'type': 'lifespan',
@@ -230,6 +313,7 @@ class TestASGI(unittest.TestCase):
 
         self._run(app(scope, receive, send))
         self.assertEqual(scope['state']['foo'], 'baz')
+        self.assertEqual(shutdown_calls, [True])
         self.assertEqual(sends, [
             {'type': 'lifespan.startup.complete'},
             {'type': 'lifespan.shutdown.complete'},
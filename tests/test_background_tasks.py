@@ -0,0 +1,39 @@
+import asyncio
+import unittest
+from microdot.background_tasks import BackgroundTasks
+
+
+class TestBackgroundTasks(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if hasattr(asyncio, 'set_event_loop'):
+            asyncio.set_event_loop(asyncio.new_event_loop())
+        cls.loop = asyncio.get_event_loop()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_background_tasks(self):
+        tasks = BackgroundTasks(max_workers=1, max_queue=2)
+        results = []
+
+        async def task(value, delay=0):
+            await asyncio.sleep(delay)
+            results.append(value)
+
+        async def submit():
+            self.assertTrue(tasks.submit(task, 1))
+            self.assertTrue(tasks.submit(task, 2, delay=0.2))
+            self.assertFalse(tasks.submit(task, 3))
+            self.assertEqual((tasks.queued, tasks.running), (2, 1))
+            await asyncio.sleep(0.05)
+            self.assertEqual((tasks.queued, tasks.running), (0, 1))
+            self.assertTrue(tasks.submit(task, 4))
+            self.assertFalse(await tasks.drain(timeout=0.05))
+            tasks.shutdown_timeout = 1
+            self.assertTrue(await tasks.shutdown())
+
+        self._run(submit())
+        self.assertEqual(results, [1, 2, 4])
+        self.assertEqual((tasks.completed, tasks.failed, tasks.dropped),
+                         (3, 0, 1))
@@ -39,6 +39,12 @@ class TestEnd2End(unittest.TestCase):
             app.shutdown()
             return ''
 
+        shutdown_calls = []
+
+        @app.on_shutdown
+        async def on_shutdown():
+            shutdown_calls.append(True)
+
         async def run():
             server_task = asyncio.create_task(
                 app.start_server(host='127.0.0.1', port=5678))
@@ -46,8 +52,10 @@ class TestEnd2End(unittest.TestCase):
             response = await self.request('/')
             self.assertEqual(response[0], 'HTTP/1.0 200 OK')
             self.assertEqual(response[-1], 'Hello, World!')
+            self.assertEqual(shutdown_calls, [])
             await self.request('/shutdown')
             await server_task
+            self.assertEqual(shutdown_calls, [True])
 
         asyncio.run(run())
 
@@ -0,0 +1,144 @@
+import asyncio
+import unittest
+from microdot import Microdot
+from microdot.etag import ETag
+from microdot.test_client import TestClient
+
+
+class TestETag(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_body_hash(self):
+        app = Microdot()
+        ETag(app)
+        body = {'foo': 'bar'}
+
+        @app.route('/', methods=['GET', 'POST'])
+        def index(req):
+            return body['foo'], {'Set-Cookie': 'a=b', 'Content-Length': '3'}
+
+        @app.get('/custom')
+        def custom(req):
+            return 'foo', {'ETag': '"v1"'}
+
+        @app.get('/error')
+        def error(req):
+            return 'error', 500
+
+        @app.get('/stream')
+        def stream(req):
+            return iter(['foo'])
+
+        client = TestClient(app)
+        res = self._run(client.get('/'))
+        self.assertEqual(res.status_code, 200)
+        etag = res.headers['ETag']
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+        self.assertEqual(res.text, 'bar')
+
+        res = self._run(client.get('/', headers={'If-None-Match': etag}))
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.headers['ETag'], etag)
+        self.assertEqual(res.headers['Set-Cookie'], 'a=b')
+        self.assertFalse('Content-Length' in res.headers)
+        self.assertEqual(res.body, b'')
+
+        res = self._run(client.get('/', headers={
+            'If-None-Match': '"x", W/' + etag}))
+        self.assertEqual(res.status_code, 304)
+        res = self._run(client.get('/', headers={'If-None-Match': '*'}))
+        self.assertEqual(res.status_code, 304)
+        res = self._run(client.get('/', headers={'If-None-Match': '"x"'}))
+        self.assertEqual(res.status_code, 200)
+
+        body['foo'] = 'baz'
+        res = self._run(client.get('/', headers={'If-None-Match': etag}))
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers['ETag'], etag)
+
+        res = self._run(client.post('/', headers={'If-None-Match': '*'}))
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse('ETag' in res.headers)
+
+        res = self._run(client.get('/custom', headers={
+            'If-None-Match': '"v1"'}))
+        self.assertEqual(res.status_code, 304)
+        res = self._run(client.get('/error', headers={'If-None-Match': '*'}))
+        self.assertEqual(res.status_code, 500)
+        self.assertFalse('ETag' in res.headers)
+        res = self._run(client.get('/stream', headers={'If-None-Match': '*'}))
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse('ETag' in res.headers)
+
+    def test_weak(self):
+        app = Microdot()
+        etag = ETag(weak=True)
+        etag.initialize(app)
+
+        @app.get('/')
+        def index(req):
+            return 'foo'
+
+        client = TestClient(app)
+        res = self._run(client.get('/'))
+        self.assertTrue(res.headers['ETag'].startswith('W/"'))
+        res = self._run(client.get('/', headers={
+            'If-None-Match': res.headers['ETag'][2:]}))
+        self.assertEqual(res.status_code, 304)
+
+    def test_version(self):
+        app = Microdot()
+        etag = ETag(app)
+        versions = {1: 5, 2: None}
+        calls = []
+
+        async def version(req, id):
+            return versions[id]
+
+        @app.get('/items/<int:id>')
+        @etag.version(version)
+        def item(req, id):
+            calls.append(id)
+            return {'id': id}
+
+        @app.get('/sync/<int:id>')
+        @etag.version(lambda req, id: versions[id])
+        def sync_item(req, id):
+            calls.append(id)
+            if id == 1:
+                return 202
+            return 'foo', 201
+
+        client = TestClient(app)
+        res = self._run(client.get('/items/1'))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers['ETag'], '"5"')
+        self.assertEqual(res.json, {'id': 1})
+        res = self._run(client.get('/items/1', headers={
+            'If-None-Match': '"5"'}))
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.headers['ETag'], '"5"')
+        self.assertEqual(calls, [1])
+
+        versions[1] = 6
+        res = self._run(client.get('/items/1', headers={
+            'If-None-Match': '"5"'}))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers['ETag'], '"6"')
+        self.assertEqual(calls, [1, 1])
+
+        res = self._run(client.get('/items/2'))
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers['ETag'], '"None"')
+
+        res = self._run(client.get('/sync/1'))
+        self.assertEqual(res.status_code, 202)
+        self.assertFalse('ETag' in res.headers)
+        res = self._run(client.get('/sync/2'))
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.text, 'foo')
@@ -1,7 +1,7 @@
 import asyncio
 import sys
 import unittest
-from microdot import Microdot
+from microdot import Microdot, Response
 from microdot.jinja import Template
 from microdot.test_client import TestClient
 
@@ -79,3 +79,22 @@ class TestJinja(unittest.TestCase):
         self.assertEqual(res.body, b'Hello, foo!')
 
         Template.initialize('tests/templates')
+
+    def test_generate_async_template_buffered(self):
+        Template.initialize('tests/templates', enable_async=True)
+
+        class Stream:
+            def __init__(self):
+                self.writes = []
+
+            async def awrite(self, data):
+                self.writes.append(bytes(data))
+
+        body = Template('hello.jinja.txt').generate_async(name='foo')
+        self.assertTrue(body.buffered)
+        fd = Stream()
+        self._run(Response(body).write(fd))
+        self.assertEqual(len(fd.writes), 1)
+        self.assertTrue(fd.writes[0].endswith(b'\r\n\r\nHello, foo!'))
+
+        Template.initialize('tests/templates')
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import unittest
+from microdot import Microdot, Request
+from microdot.json_stream import JSONStreamIter, JSONStreamEncoder, \
+    json_stream_response
+from microdot.test_client import TestClient
+
+
+class TestJSONStream(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if hasattr(asyncio, 'set_event_loop'):
+            asyncio.set_event_loop(asyncio.new_event_loop())
+        cls.loop = asyncio.get_event_loop()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def setUp(self):
+        self.app = Microdot()
+
+        @self.app.post('/')
+        async def index(req):
+            records = []
+            async for record in JSONStreamIter(req):
+                records.append(record)
+            return {'records': records}
+
+        @self.app.post('/ndjson')
+        async def ndjson(req):
+            records = []
+            async for record in JSONStreamIter(req, ndjson=True):
+                records.append(record)
+            return {'records': records}
+
+        @self.app.post('/count')
+        async def count(req):
+            # the records are not kept, so the body is parsed in constant
+            # memory regardless of its size
+            n = 0
+            record = None
+            async for record in JSONStreamIter(req):
+                n += 1
+            return {'count': n, 'last': record}
+
+        self.client = TestClient(self.app)
+
+    def post(self, url, body, content_type='application/json'):
+        return self._run(self.client.post(url, headers={
+            'Content-Type': content_type}, body=body))
+
+    def test_json_array(self):
+        records = [
+            {'a': 'b', 'c': [1, 2, {'d': None}]},
+            'string with , and ] and } and \\" and "quotes"',
+            'backslash \\',
+            12.5,
+            True,
+            [],
+            {},
+            [[1], [2, [3]]],
+        ]
+        body = ' [\n ' + ' ,\n'.join(json.dumps(r) for r in records) + \
+            '\n] '
+        saved_buffer_size = JSONStreamIter.buffer_size
+        for buffer_size in [1, 2, 3, 7, 1024]:
+            JSONStreamIter.buffer_size = buffer_size
+            res = self.post('/', body)
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.json, {'records': records})
+        JSONStreamIter.buffer_size = saved_buffer_size
+
+        res = self.post('/', '[]')
+        self.assertEqual(res.json, {'records': []})
+
+    def test_ndjson(self):
+        body = '{"a": 1}\n\n[1, 2]\n"x\\ny"\n{"b": {"c": 2}}'
+        records = [{'a': 1}, [1, 2], 'x\ny', {'b': {'c': 2}}]
+        saved_buffer_size = JSONStreamIter.buffer_size
+        for buffer_size in [1, 5, 1024]:
+            JSONStreamIter.buffer_size = buffer_size
+            res = self.post('/', body, 'application/x-ndjson')
+            self.assertEqual(res.json, {'records': records})
+            res = self.post('/ndjson', body + '\n', 'text/plain')
+            self.assertEqual(res.json, {'records': records})
+        JSONStreamIter.buffer_size = saved_buffer_size
+
+    def test_large_body(self):
+        saved_max_content_length = Request.max_content_length
+        saved_max_body_length = Request.max_body_length
+        Request.max_content_length = 1024 * 1024
+        Request.max_body_length = 1024
+
+        body = '[' + ','.join(['{"id": %d}' % i for i in range(5000)]) + ']'
+        res = self.post('/count', body)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json, {'count': 5000, 'last': {'id': 4999}})
+
+        Request.max_content_length = saved_max_content_length
+        Request.max_body_length = saved_max_body_length
+
+    def test_errors(self):
+        self.assertEqual(self.post('/', '{"a": 1}').status_code, 400)
+        self.assertEqual(self.post('/', '[1, 2').status_code, 400)
+        self.assertEqual(self.post('/', '[1, , 2]').status_code, 400)
+        self.assertEqual(self.post('/', '[1, {]').status_code, 400)
+        self.assertEqual(self.post('/', '[1,]').status_code, 400)
+        self.assertEqual(self.post('/', '[1, 2, ]').status_code, 400)
+        self.assertEqual(self.post('/', '[,]').status_code, 400)
+        self.assertEqual(self.post('/', '[1] x').status_code, 400)
+        self.assertEqual(self.post('/', '[1][2]').status_code, 400)
+        self.assertEqual(self.post('/', '[] {}').status_code, 400)
+        self.assertEqual(self.post('/', '').status_code, 400)
+        self.assertEqual(self.post('/ndjson', '{"a":\n1}').status_code, 400)
+
+        saved_max_record_size = JSONStreamIter.max_record_size
+        saved_buffer_size = JSONStreamIter.buffer_size
+        JSONStreamIter.max_record_size = 16
+        JSONStreamIter.buffer_size = 8
+        res = self.post('/', '["short", "' + 'x' * 32 + '"]')
+        self.assertEqual(res.status_code, 413)
+        res = self.post('/ndjson', '"short"\n"' + 'x' * 32 + '"\n')
+        self.assertEqual(res.status_code, 413)
+        res = self.post('/ndjson', '"short"\n"' + 'x' * 10 + '"\n')
+        self.assertEqual(res.status_code, 200)
+        res = self.post('/', '["a", "b"]' + ' ' * 32 + '\n')
+        self.assertEqual(res.status_code, 200)
+        res = self.post('/', '["a", "b"]' + ' ' * 32 + 'x')
+        self.assertEqual(res.status_code, 400)
+        JSONStreamIter.max_record_size = saved_max_record_size
+        JSONStreamIter.buffer_size = saved_buffer_size
+
+    def test_json_stream_response(self):
+        class AsyncItems:
+            def __init__(self, n):
+                self.i = 0
+                self.n = n
+                self.closed = False
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                if self.i == self.n:
+                    raise StopAsyncIteration
+                self.i += 1
+                return {'id': self.i}
+
+            async def aclose(self):
+                self.closed = True
+
+        def sync_items():
+            yield 'a'
+            yield [1, 2]
+
+        items = AsyncItems(3)
+
+        @self.app.get('/async')
+        async def async_items(req):
+            return json_stream_response(items)
+
+        @self.app.get('/sync')
+        async def sync(req):
+            return json_stream_response(sync_items(), ndjson=True)
+
+        @self.app.get('/empty')
+        async def empty(req):
+            return json_stream_response([], 201, {'X-Foo': 'bar'})
+
+        res = self._run(self.client.get('/async'))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers['Content-Type'],
+                         'application/json; charset=UTF-8')
+        self.assertEqual(res.json, [{'id': 1}, {'id': 2}, {'id': 3}])
+        self.assertTrue(items.closed)
+
+        res = self._run(self.client.get('/sync'))
+        self.assertEqual(res.headers['Content-Type'], 'application/x-ndjson')
+        lines = res.text.split('\n')
+        self.assertEqual(lines[-1], '')
+        self.assertEqual([json.loads(line) for line in lines[:-1]],
+                         ['a', [1, 2]])
+
+        res = self._run(self.client.get('/empty'))
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.headers['X-Foo'], 'bar')
+        self.assertEqual(res.json, [])
+
+    def test_json_stream_encoder(self):
+        async def chunks(encoder):
+            result = []
+            async for chunk in encoder:
+                result.append(chunk)
+            return result
+
+        saved_buffer_size = JSONStreamEncoder.buffer_size
+        JSONStreamEncoder.buffer_size = 10
+        result = self._run(chunks(JSONStreamEncoder(range(10))))
+        self.assertEqual(result, [b'[0,1,2,3,4', b',5,6,7,8,9', b']'])
+        result = self._run(chunks(JSONStreamEncoder(range(10), ndjson=True)))
+        self.assertEqual(result, [b'0\n1\n2\n3\n4\n', b'5\n6\n7\n8\n9\n'])
+        JSONStreamEncoder.buffer_size = saved_buffer_size
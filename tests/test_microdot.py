@@ -1,7 +1,8 @@
 import asyncio
 import unittest
-from microdot import Microdot, Response, abort
+from microdot import Microdot, Request, Response, abort
 from microdot.test_client import TestClient
+from tests.mock_socket import get_async_request_fd
 
 
 class TestMicrodot(unittest.TestCase):
@@ -429,6 +430,181 @@ class TestMicrodot(unittest.TestCase):
         self.assertEqual(res.headers['X-One'], '1')
         self.assertEqual(client.cookies['foo'], 'bar')
 
+    def test_profile(self):
+        app = Microdot()
+        phases = []
+
+        @app.profile
+        def profile(req, phase, ticks):
+            phases.append((req.path, phase, ticks))
+
+        @app.route('/foo')
+        def foo(req):
+            return 'foo'
+
+        client = TestClient(app)
+        self._run(client.get('/foo'))
+        self.assertEqual([p[1] for p in phases],
+                         ['start', 'parse', 'before_request', 'handler',
+                          'after_request', 'write'])
+        self.assertTrue(all(p[0] == '/foo' for p in phases))
+
+        phases.clear()
+        fd = get_async_request_fd('GET', '/foo')
+        self._run(app.handle_request(fd, fd))
+        self.assertTrue(fd.response.endswith(b'\r\n\r\nfoo'))
+        self.assertEqual([p[1] for p in phases],
+                         ['start', 'parse', 'before_request', 'handler',
+                          'after_request', 'write'])
+
+        phases.clear()
+        self._run(client.get('/bar'))
+        self.assertEqual([p[1] for p in phases], ['start', 'parse', 'write'])
+
+    def test_expect_continue(self):
+        app = Microdot()
+
+        @app.before_request
+        async def before_request(req):
+            if req.headers.get('Authorization') == 'body':
+                if req.body != b'foo':
+                    return 'Unauthorized', 401
+            elif req.headers.get('Authorization') == 'read':
+                await req.read_body()
+                if req.body != b'foo':
+                    return 'Unauthorized', 401
+            elif req.headers.get('Authorization') != 'yes':
+                return 'Unauthorized', 401
+
+        @app.post('/upload')
+        def upload(req):
+            return req.body
+
+        def upload_request(path, body, headers=None):
+            headers = headers or {}
+            headers['Expect'] = '100-continue'
+            fd = get_async_request_fd('POST', path, headers=headers,
+                                      body=body)
+            self._run(app.handle_request(fd, fd))
+            return fd.response
+
+        # the 100 Continue response is deferred by default
+        response = upload_request('/upload', 'foo')
+        self.assertTrue(response.startswith(b'HTTP/1.0 401 N/A\r\n'))
+        response = upload_request('/upload', 'foo', {'Authorization': 'yes'})
+        self.assertTrue(response.startswith(
+            b'HTTP/1.1 100 Continue\r\n\r\nHTTP/1.0 200 OK\r\n'))
+        self.assertTrue(response.endswith(b'\r\n\r\nfoo'))
+        response = upload_request('/upload', 'foo', {'Authorization': 'body'})
+        self.assertTrue(response.startswith(b'HTTP/1.0 500 N/A\r\n'))
+        response = upload_request('/upload', 'foo', {'Authorization': 'read'})
+        self.assertTrue(response.startswith(
+            b'HTTP/1.1 100 Continue\r\n\r\nHTTP/1.0 200 OK\r\n'))
+        self.assertTrue(response.endswith(b'\r\n\r\nfoo'))
+        response = upload_request('/foo', 'foo', {'Authorization': 'yes'})
+        self.assertTrue(response.startswith(b'HTTP/1.0 404 N/A\r\n'))
+        response = upload_request('/upload', 'x' * 17000,
+                                  {'Authorization': 'yes'})
+        self.assertTrue(response.startswith(b'HTTP/1.0 413 N/A\r\n'))
+
+        Request.defer_continue = False
+        try:
+            response = upload_request('/upload', 'foo',
+                                      {'Authorization': 'yes'})
+            self.assertTrue(response.startswith(
+                b'HTTP/1.1 100 Continue\r\n\r\nHTTP/1.0 200 OK\r\n'))
+            self.assertTrue(response.endswith(b'\r\n\r\nfoo'))
+            response = upload_request('/upload', 'foo')
+            self.assertTrue(response.startswith(
+                b'HTTP/1.1 100 Continue\r\n\r\nHTTP/1.0 401 N/A\r\n'))
+            response = upload_request('/upload', 'foo',
+                                      {'Authorization': 'body'})
+            self.assertTrue(response.startswith(
+                b'HTTP/1.1 100 Continue\r\n\r\nHTTP/1.0 200 OK\r\n'))
+        finally:
+            Request.defer_continue = True
+
+    def test_spooled_body(self):
+        saved_max_body_length = Request.max_body_length
+        Request.max_body_length = 16
+        Request.spool_directory = 'tests'
+        app = Microdot()
+        filenames = []
+
+        @app.post('/upload')
+        async def upload(req):
+            filenames.append(req.stream.filename)
+            data = await req.stream.read(4)
+            return {'first': data.decode(), 'form': req.form['foo']}
+
+        client = TestClient(app)
+        res = self._run(client.post('/upload', headers={
+            'Content-Type': 'application/x-www-form-urlencoded'},
+            body='foo=' + 'x' * 20))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json, {'first': 'foo=', 'form': 'x' * 20})
+        with self.assertRaises(OSError):
+            open(filenames[0])
+
+        Request.spool_directory = None
+        Request.max_body_length = saved_max_body_length
+
+    def test_compile(self):
+        app = Microdot()
+
+        @app.route('/foo')
+        def foo(req):
+            return 'foo'
+
+        @app.route('/baz/<int:id>')
+        def baz(req, id):
+            return 'baz' + str(id)
+
+        @app.route('/<path:path>')
+        def catch_all(req, path):
+            return 'catch all'
+
+        @app.route('/bar')
+        def bar(req):
+            return 'bar'
+
+        self.assertIsInstance(app.compile(), float)
+        self.assertEqual(len(app.route_index), 4)
+
+        client = TestClient(app)
+        res = self._run(client.get('/foo'))
+        self.assertEqual(res.text, 'foo')
+        res = self._run(client.get('/bar'))
+        self.assertEqual(res.text, 'catch all')
+        res = self._run(client.get('/baz/42'))
+        self.assertEqual(res.text, 'baz42')
+        res = self._run(client.get('/baz/x'))
+        self.assertEqual(res.text, 'catch all')
+
+        @app.route('/')
+        def index(req):
+            return 'index'
+
+        # new routes are found without the index until it is rebuilt
+        self.assertIsNone(app.route_index)
+        res = self._run(client.get('/'))
+        self.assertEqual(res.text, 'index')
+        res = self._run(client.get('/bar'))
+        self.assertEqual(res.text, 'catch all')
+        app.compile()
+        res = self._run(client.get('/'))
+        self.assertEqual(res.text, 'index')
+
+    def test_compile_invalid_route(self):
+        app = Microdot()
+
+        @app.route('/foo/<bar')
+        def foo(req):
+            return 'foo'
+
+        with self.assertRaises(ValueError):
+            app.compile()
+
     def test_400(self):
         app = Microdot()
 
@@ -1036,3 +1212,97 @@ class TestMicrodot(unittest.TestCase):
         res = self._run(client.get('/'))
         self.assertEqual(res.status_code, 200)
         self.assertEqual(res.text, 'app:True:')
+
+    def test_static_response(self):
+        app = Microdot()
+        calls = []
+
+        @app.before_request
+        def before_request(req):
+            calls.append(req.path)
+
+        app.static_response('/healthz', 'OK')
+        app.static_response('/config', {'foo': 'bar'}, {'X-Foo': 'baz'}, 201)
+        subapp = Microdot()
+        subapp.static_response('/robots.txt', b'User-agent: *',
+                               {'Content-Type': 'text/plain'})
+        app.mount(subapp, url_prefix='/sub')
+
+        with self.assertRaises(ValueError):
+            app.static_response('/users/<id>', 'foo')
+        with self.assertRaises(ValueError):
+            app.static_response('/stream', iter(['foo']))
+
+        fd = get_async_request_fd('GET', '/healthz?x=1')
+        self._run(app.handle_request(fd, fd))
+        self.assertTrue(fd.response.startswith(b'HTTP/1.0 200 OK\r\n'))
+        self.assertTrue(b'Content-Length: 2\r\n' in fd.response)
+        self.assertTrue(fd.response.endswith(b'\r\n\r\nOK'))
+
+        fd = get_async_request_fd('HEAD', '/config')
+        self._run(app.handle_request(fd, fd))
+        self.assertTrue(fd.response.startswith(b'HTTP/1.0 201 N/A\r\n'))
+        self.assertTrue(b'X-Foo: baz\r\n' in fd.response)
+        self.assertTrue(fd.response.endswith(b'\r\n\r\n'))
+
+        fd = get_async_request_fd('GET', '/sub/robots.txt')
+        self._run(app.handle_request(fd, fd))
+        self.assertTrue(b'Content-Type: text/plain\r\n' in fd.response)
+        self.assertTrue(fd.response.endswith(b'\r\n\r\nUser-agent: *'))
+        self.assertEqual(calls, [])
+
+        fd = get_async_request_fd('POST', '/healthz')
+        self._run(app.handle_request(fd, fd))
+        self.assertTrue(fd.response.startswith(b'HTTP/1.0 405 N/A\r\n'))
+
+        client = TestClient(app)
+        res = self._run(client.get('/config'))
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.headers['X-Foo'], 'baz')
+        self.assertEqual(res.json, {'foo': 'bar'})
+        res = self._run(client.get('/sub/robots.txt'))
+        self.assertEqual(res.text, 'User-agent: *')
+        self.assertEqual(calls, ['/config', '/sub/robots.txt'])
+
+    def test_after_response(self):
+        app = Microdot()
+        results = []
+
+        async def async_task(value):
+            results.append(value)
+
+        def sync_task(value, suffix=''):
+            results.append(value + suffix)
+
+        def failing_task():
+            raise RuntimeError('foo')
+
+        @app.route('/')
+        def index(req):
+            req.after_response(async_task, 'async')
+            req.after_response(sync_task, 'sync', suffix='!')
+            req.after_response(failing_task)
+
+            @req.after_response
+            def decorated_task():
+                results.append('decorated')
+
+            self.assertEqual(results, [])
+            return 'foo'
+
+        client = TestClient(app)
+        self.assertIsNone(app.background_tasks)
+        res = self._run(client.get('/'))
+        self.assertEqual(res.text, 'foo')
+        self.assertTrue(self._run(app.background_tasks.drain()))
+        self.assertEqual(sorted(results), ['async', 'decorated', 'sync!'])
+        tasks = app.background_tasks
+        self.assertEqual((tasks.queued, tasks.running, tasks.completed,
+                          tasks.failed, tasks.dropped), (0, 0, 3, 1, 0))
+
+        results.clear()
+        fd = get_async_request_fd('GET', '/')
+        self._run(app.handle_request(fd, fd))
+        self.assertTrue(fd.response.endswith(b'\r\n\r\nfoo'))
+        self._run(app.background_tasks.drain())
+        self.assertEqual(sorted(results), ['async', 'decorated', 'sync!'])
@@ -1,5 +1,5 @@
 import unittest
-from microdot.microdot import MultiDict, NoCaseDict
+from microdot.microdot import MultiDict, NoCaseDict, Headers
 
 
 class TestMultiDict(unittest.TestCase):
@@ -66,3 +66,97 @@ class TestMultiDict(unittest.TestCase):
         self.assertEqual(d['TWO'], 2)
         self.assertEqual(d['three'], 3)
         self.assertEqual(d['THREE'], 3)
+
+    def test_headers(self):
+        h = Headers({'Content-Type': 'text/html'})
+        h['content-type'] = 'text/plain'
+        h['X-Foo'] = 'foo'
+        h['x-FOO'] = 'bar'
+        self.assertEqual(h, {'Content-Type': 'text/plain', 'X-Foo': 'bar'})
+        self.assertEqual(h['CONTENT-TYPE'], 'text/plain')
+        self.assertEqual(h['x-foo'], 'bar')
+        self.assertEqual(h.get('X-FOO'), 'bar')
+        self.assertEqual(h.get('X-Bar'), None)
+        self.assertEqual(h.get('X-Bar', 'baz'), 'baz')
+        self.assertIn('content-type', h)
+        self.assertFalse('X-Bar' in h)
+        with self.assertRaises(KeyError):
+            h['X-Bar']
+
+        del h['X-FOO']
+        self.assertEqual(h, {'Content-Type': 'text/plain'})
+        self.assertFalse('x-foo' in h)
+        self.assertFalse('X-Foo' in h)
+        self.assertFalse('x-FOO' in h)
+        with self.assertRaises(KeyError):
+            del h['X-Foo']
+        h['x-foo'] = 'baz'
+        self.assertEqual(h, {'Content-Type': 'text/plain', 'x-foo': 'baz'})
+
+    def test_headers_multiple_values(self):
+        h = Headers()
+        self.assertEqual(h.getlist('Set-Cookie'), [])
+        h.add('Set-Cookie', 'foo=1')
+        self.assertEqual(h['set-cookie'], ['foo=1'])
+        h.add('set-cookie', 'bar=2')
+        self.assertEqual(h.getlist('SET-COOKIE'), ['foo=1', 'bar=2'])
+        h['Vary'] = 'Origin'
+        self.assertEqual(h.getlist('Vary'), ['Origin'])
+        h.add('Vary', 'Cookie')
+        self.assertEqual(h['Vary'], ['Origin', 'Cookie'])
+
+    def test_headers_lowercase(self):
+        h = Headers()
+        h['content-type'] = 'text/plain'
+        h['Authorization'] = 'Bearer 123'
+        h['x-bar'] = '1'
+        self.assertEqual(h['Content-Type'], 'text/plain')
+        self.assertEqual(h['authorization'], 'Bearer 123')
+        self.assertTrue('X-Bar' in h)
+        h['Content-Type'] = 'text/html'
+        self.assertEqual(h, {'content-type': 'text/html',
+                             'Authorization': 'Bearer 123', 'x-bar': '1'})
+        del h['X-BAR']
+        self.assertFalse('x-bar' in h)
+        self.assertEqual(len(h), 2)
+
+    def test_headers_dict_methods(self):
+        h = Headers({'Content-Type': 'text/html', 'Content-Length': '3'})
+        self.assertEqual(h.pop('content-length'), '3')
+        self.assertFalse('Content-Length' in h)
+        self.assertFalse('content-length' in h)
+        self.assertEqual(h.pop('Content-Length', None), None)
+        with self.assertRaises(KeyError):
+            h.pop('Content-Length')
+        h['content-LENGTH'] = '4'
+        self.assertEqual(h, {'Content-Type': 'text/html',
+                             'content-LENGTH': '4'})
+
+        self.assertEqual(h.setdefault('content-type', 'text/plain'),
+                         'text/html')
+        self.assertEqual(h.setdefault('X-Foo', 'foo'), 'foo')
+        self.assertEqual(h['x-foo'], 'foo')
+
+        key, value = h.popitem()
+        self.assertFalse(key in h)
+        self.assertFalse(key.lower() in h)
+        self.assertEqual(len(h), 2)
+
+        h.clear()
+        self.assertEqual(h, {})
+        self.assertFalse('Content-Type' in h)
+        self.assertEqual(h.keymap, {})
+
+    def test_multidict_storage(self):
+        d = MultiDict()
+        d['one'] = 'a'
+        d['two'] = 'b'
+        d['two'] = 'c'
+        d['list'] = ['x', 'y']
+        self.assertIn(('one', 'a'), list(d.items()))
+        self.assertEqual(d['list'], ['x', 'y'])
+        self.assertEqual(d.getlist('list'), [['x', 'y']])
+        d['list'] = ['z']
+        self.assertEqual(d['list'], ['x', 'y'])
+        self.assertEqual(d.getlist('list'), [['x', 'y'], ['z']])
+        self.assertEqual(d.getlist('two'), ['b', 'c'])
@@ -158,6 +158,50 @@ class TestMultipart(unittest.TestCase):
             self.assertEqual(f.read(), b'baz')
         os.unlink('_x.txt')
 
+    def test_large_file_save(self):
+        app = Microdot()
+        data = b''.join(bytes([i % 256]) for i in range(5000))
+
+        class Writer:
+            def __init__(self):
+                self.writes = []
+
+            def write(self, data):
+                self.writes.append(data)
+                return len(data)
+
+        writer = Writer()
+
+        @app.post('/async')
+        async def async_route(req):
+            async for name, value in FormDataIter(req):
+                if name == 'f':
+                    await value.save('_x.bin', buffer_size=4096)
+                else:
+                    await value.save(writer)
+
+        client = TestClient(app)
+        part = (b'Content-Type: application/octet-stream\r\n\r\n'
+                + data + b'\r\n--boundary')
+        res = self._run(client.post(
+            '/async', headers={
+                'Content-Type': 'multipart/form-data; boundary=boundary',
+            },
+            body=(
+                b'--boundary\r\n'
+                b'Content-Disposition: form-data; name="f"; filename="f"\r\n'
+                + part + b'\r\n'
+                b'Content-Disposition: form-data; name="g"; filename="g"\r\n'
+                + part + b'--\r\n')
+        ))
+        self.assertEqual(res.status_code, 204)
+        with open('_x.bin', 'rb') as f:
+            self.assertEqual(f.read(), data)
+        os.unlink('_x.bin')
+        # files are saved in chunks that are larger than the parser buffer
+        self.assertEqual(b''.join(writer.writes), data)
+        self.assertTrue(len(writer.writes[0]) > FormDataIter.buffer_size)
+
     def test_no_form(self):
         app = Microdot()
 
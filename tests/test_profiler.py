@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+from microdot import Microdot
+from microdot.profiler import Profiler
+from microdot.test_client import TestClient
+from tests.mock_socket import get_async_request_fd
+
+
+class TestProfiler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_server_timing(self):
+        app = Microdot()
+        profiler = Profiler(app)
+
+        @app.route('/')
+        def index(req):
+            return 'foo'
+
+        client = TestClient(app)
+        res = self._run(client.get('/'))
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse('Server-Timing' in res.headers)
+
+        app.debug = True
+        res = self._run(client.get('/'))
+        self.assertEqual(res.status_code, 200)
+        metrics = res.headers['Server-Timing'].split(', ')
+        self.assertEqual([m.split(';')[0] for m in metrics],
+                         ['parse', 'before_request', 'handler',
+                          'after_request'])
+        self.assertTrue(metrics[0].split(';')[1].startswith('dur='))
+
+        app.debug = False
+        profiler.server_timing = True
+        res = self._run(client.get('/'))
+        self.assertTrue('Server-Timing' in res.headers)
+
+    def test_callback(self):
+        app = Microdot()
+        results = []
+        Profiler(app, server_timing=True, callback=lambda req, durations:
+                 results.append((req.path, durations)))
+
+        @app.route('/')
+        def index(req):
+            return 'foo'
+
+        fd = get_async_request_fd('GET', '/')
+        self._run(app.handle_request(fd, fd))
+        self.assertIn(b'Server-Timing: parse;dur=', fd.response)
+        self.assertIn(b', before_request;dur=', fd.response)
+        self.assertTrue(fd.response.endswith(b'\r\n\r\nfoo'))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][0], '/')
+        self.assertEqual(sorted(results[0][1].keys()),
+                         ['after_request', 'before_request', 'handler',
+                          'parse', 'write'])
+        for duration in results[0][1].values():
+            self.assertTrue(duration >= 0)
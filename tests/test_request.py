@@ -1,7 +1,9 @@
 import asyncio
+import os
 import unittest
-from microdot.microdot import MultiDict, Request
-from tests.mock_socket import get_async_request_fd
+from microdot.microdot import HTTPException, MultiDict, Request
+from tests.mock_socket import FakeStream, FakeStreamAsync, \
+    get_async_request_fd
 
 
 class TestRequest(unittest.TestCase):
@@ -38,6 +40,7 @@ class TestRequest(unittest.TestCase):
             'Cookie': 'foo=bar;nothing;abc=def;',
             'Content-Length': '3'}, body='aaa')
         req = self._run(Request.create('app', fd, 'writer', 'addr'))
+        self._run(req.read_body())
         self.assertEqual(req.headers, {
             'Host': 'example.com:1234',
             'Content-Type': 'application/json',
@@ -49,6 +52,11 @@ class TestRequest(unittest.TestCase):
         self.assertEqual(req.content_length, 3)
         self.assertEqual(req.body, b'aaa')
 
+        req.headers.add('Cookie', 'x=y')
+        del req.cookies
+        self.assertEqual(req.cookies['x'], 'y')
+        self.assertEqual(req.cookies['abc'], 'def')
+
     def test_args(self):
         fd = get_async_request_fd('GET', '/?foo=bar&abc=def&foo&x=%2f%%')
         req = self._run(Request.create('app', fd, 'writer', 'addr'))
@@ -57,10 +65,38 @@ class TestRequest(unittest.TestCase):
         md['foo'] = ''
         self.assertEqual(req.args, md)
 
+    def test_lazy_attributes(self):
+        fd = get_async_request_fd('GET', '/?foo=bar', headers={
+            'Cookie': 'foo=bar'})
+        req = self._run(Request.create('app', fd, 'writer', 'addr'))
+
+        # the attributes are built when they are first accessed
+        req.query_string = 'foo=baz'
+        req.headers['Cookie'] = 'foo=baz'
+        self.assertEqual(req.args['foo'], 'baz')
+        self.assertTrue(req.args is req.args)
+        self.assertEqual(req.cookies, {'foo': 'baz'})
+        req.g.foo = 'bar'
+        self.assertEqual(req.g.foo, 'bar')
+        self.assertTrue(req.g is req.g)
+        self.assertEqual(req.after_request_handlers, ())
+
+        req.args = {'a': 'b'}
+        req.cookies = {'c': 'd'}
+        self.assertEqual(req.args, {'a': 'b'})
+        self.assertEqual(req.cookies, {'c': 'd'})
+        with self.assertRaises(AttributeError):
+            req.foo
+
+        # attributes not defined by the request can still be added
+        req.custom = 'value'
+        self.assertEqual(req.custom, 'value')
+
     def test_json(self):
         fd = get_async_request_fd('GET', '/foo', headers={
             'Content-Type': 'application/json'}, body='{"foo":"bar"}')
         req = self._run(Request.create('app', fd, 'writer', 'addr'))
+        self._run(req.read_body())
         json = req.json
         self.assertEqual(json, {'foo': 'bar'})
         self.assertTrue(req.json is json)
@@ -68,18 +104,33 @@ class TestRequest(unittest.TestCase):
         fd = get_async_request_fd('GET', '/foo', headers={
             'Content-Type': 'application/json'}, body='[1, "2"]')
         req = self._run(Request.create('app', fd, 'writer', 'addr'))
+        self._run(req.read_body())
         self.assertEqual(req.json, [1, '2'])
 
         fd = get_async_request_fd('GET', '/foo', headers={
             'Content-Type': 'application/xml'}, body='[1, "2"]')
         req = self._run(Request.create('app', fd, 'writer', 'addr'))
+        self._run(req.read_body())
         self.assertIsNone(req.json)
 
+    def test_repeated_headers(self):
+        fd = FakeStreamAsync(FakeStream(
+            b'POST /foo HTTP/1.0\r\nContent-Type: application/json\r\n'
+            b'Content-Type: application/json\r\nX-Foo: a\r\nX-Foo: b\r\n'
+            b'Cookie: a=1\r\nCookie: b=2\r\nContent-Length: 2\r\n\r\n{}'))
+        req = self._run(Request.create('app', fd, 'writer', 'addr'))
+        self._run(req.read_body())
+        self.assertEqual(req.headers['X-Foo'], 'a, b')
+        self.assertEqual(req.cookies, {'a': '1', 'b': '2'})
+        self.assertEqual(req.content_type, 'application/json')
+        self.assertEqual(req.json, {})
+
     def test_form(self):
         fd = get_async_request_fd('GET', '/foo', headers={
             'Content-Type': 'application/x-www-form-urlencoded'},
             body='foo=bar&abc=def&x=%2f%%')
         req = self._run(Request.create('app', fd, 'writer', 'addr'))
+        self._run(req.read_body())
         form = req.form
         self.assertEqual(form, MultiDict(
             {'foo': 'bar', 'abc': 'def', 'x': '/%%'}))
@@ -89,6 +140,7 @@ class TestRequest(unittest.TestCase):
             'Content-Type': 'application/json'},
             body='foo=bar&abc=def&x=%2f%%')
         req = self._run(Request.create('app', fd, 'writer', 'addr'))
+        self._run(req.read_body())
         self.assertIsNone(req.form)
 
     def test_large_line(self):
@@ -109,10 +161,26 @@ class TestRequest(unittest.TestCase):
             'Content-Length': '19'},
             body='foo=bar&abc=def&x=y')
         req = self._run(Request.create('app', fd, 'writer', 'addr'))
+        self._run(req.read_body())
         self.assertEqual(req.body, b'foo=bar&abc=def&x=y')
         data = self._run(req.stream.read())
         self.assertEqual(data, b'foo=bar&abc=def&x=y')
 
+    def test_lazy_body(self):
+        fd = get_async_request_fd('POST', '/foo', headers={
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Content-Length': '19'},
+            body='foo=bar&abc=def&x=y')
+        req = self._run(Request.create('app', fd, 'writer', 'addr'))
+        self.assertIsNone(req._body)
+        self.assertEqual(req.body, b'')
+        self.assertTrue(req.stream is fd)
+        self.assertEqual(self._run(req.read_body()), b'foo=bar&abc=def&x=y')
+        self.assertEqual(self._run(req.read_body()), b'foo=bar&abc=def&x=y')
+        self.assertEqual(req.body, b'foo=bar&abc=def&x=y')
+        self.assertEqual(req.form['abc'], 'def')
+        self.assertEqual(self._run(req.stream.read()), b'foo=bar&abc=def&x=y')
+
     def test_large_payload(self):
         saved_max_content_length = Request.max_content_length
         saved_max_body_length = Request.max_body_length
@@ -130,3 +198,57 @@ class TestRequest(unittest.TestCase):
 
         Request.max_content_length = saved_max_content_length
         Request.max_body_length = saved_max_body_length
+
+    def test_spooled_body(self):
+        saved_max_body_length = Request.max_body_length
+        Request.max_body_length = 16
+        Request.spool_directory = 'tests'
+
+        fd = get_async_request_fd('POST', '/foo', headers={
+            'Content-Type': 'application/json',
+            'Content-Length': '24'},
+            body='{"foo": "bar", "x": "y"}')
+        req = self._run(Request.create('app', fd, 'writer', 'addr'))
+        self._run(req.read_body())
+        spool = req.stream
+        self.assertTrue(spool is req._spool)
+        self.assertEqual(self._run(spool.read(8)), b'{"foo": ')
+        self.assertEqual(req.body, b'{"foo": "bar", "x": "y"}')
+        self.assertEqual(self._run(spool.tell()), 8)
+        self.assertEqual(req.json, {'foo': 'bar', 'x': 'y'})
+        self.assertEqual(self._run(spool.read()), b'"bar", "x": "y"}')
+        self._run(spool.seek(0))
+        self.assertEqual(self._run(spool.readline()),
+                         b'{"foo": "bar", "x": "y"}')
+
+        filename = spool.filename
+        open(filename).close()
+        self._run(spool.aclose())
+        with self.assertRaises(OSError):
+            open(filename)
+        self._run(spool.aclose())
+
+        # the body is read from the file only once
+        self.assertTrue(req.body is req.body)
+
+        # a body that is shorter than the declared length is rejected
+        fd = get_async_request_fd('POST', '/foo', headers={
+            'Content-Length': '24'}, body='x' * 20)
+        req = self._run(Request.create('app', fd, 'writer', 'addr'))
+        with self.assertRaises(HTTPException) as cm:
+            self._run(req.read_body())
+        self.assertEqual(cm.exception.status_code, 400)
+        self.assertIsNone(req._spool)
+        self.assertEqual([f for f in os.listdir('tests')
+                          if f.startswith('microdot-')], [])
+
+        # small bodies are not spooled
+        fd = get_async_request_fd('POST', '/foo', headers={
+            'Content-Length': '3'}, body='foo')
+        req = self._run(Request.create('app', fd, 'writer', 'addr'))
+        self._run(req.read_body())
+        self.assertIsNone(req._spool)
+        self.assertEqual(req.body, b'foo')
+
+        Request.spool_directory = None
+        Request.max_body_length = saved_max_body_length
@@ -1,6 +1,13 @@
 import asyncio
+import os
+import time
 import unittest
+from _thread import get_ident
 from microdot import Response
+from microdot.buffer_pool import BufferPool
+from microdot.async_file import AsyncFile
+from microdot.mapped_file import MappedFile
+from microdot.microdot import default_buffer_size
 from tests.mock_socket import FakeStreamAsync
 
 
@@ -40,6 +47,13 @@ class TestResponse(unittest.TestCase):
                       fd.response)
         self.assertTrue(fd.response.endswith(b'\r\n\r\nfoo'))
 
+    def test_remove_content_length(self):
+        res = Response('foo', headers={'Content-Length': '2'})
+        res.headers.pop('content-length')
+        fd = FakeStreamAsync()
+        self._run(res.write(fd))
+        self.assertIn(b'Content-Length: 3\r\n', fd.response)
+
     def test_create_from_bytes(self):
         res = Response(b'foo')
         self.assertEqual(res.status_code, 200)
@@ -256,6 +270,299 @@ class TestResponse(unittest.TestCase):
             b'HTTP/1.0 200 OK\r\nContent-Type: text/html\r\n\r\nfoo\n')
         Response.send_file_buffer_size = original_buffer_size
 
+    def test_send_file_buffer_size(self):
+        class File:
+            def __init__(self, data):
+                self.data = data
+                self.reads = []
+
+            def read(self, n):
+                self.reads.append(n)
+                data, self.data = self.data[:n], self.data[n:]
+                return data
+
+        self.assertTrue(default_buffer_size() >= 512)
+        self.assertIsNone(Response.send_file_buffer_size)
+        f = File(b'x' * 40)
+        res = Response.send_file('foo.bin', stream=f, buffer_size=16)
+        self.assertEqual(res.send_file_buffer_size, 16)
+        fd = FakeStreamAsync()
+        self._run(res.write(fd))
+        self.assertTrue(fd.response.endswith(b'\r\n\r\n' + b'x' * 40))
+        self.assertEqual(f.reads, [16, 16, 16])
+
+        f = File(b'x' * 40)
+        res = Response.send_file('foo.bin', stream=f)
+        self._run(res.write(FakeStreamAsync()))
+        self.assertEqual(f.reads, [default_buffer_size()])
+
+    def test_send_file_buffer_pool(self):
+        pool = BufferPool(size=2, count=1)
+        buf = pool.free[0]
+        Response.buffer_pool = pool
+        Response.async_file_io = False
+        res = Response.send_file('tests/files/test.txt',
+                                 content_type='text/html')
+        fd = FakeStreamAsync()
+        self._run(res.write(fd))
+        self.assertEqual(
+            fd.response,
+            b'HTTP/1.0 200 OK\r\nContent-Type: text/html\r\n\r\nfoo\n')
+        self.assertEqual(pool.free, [buf])
+        self.assertTrue(pool.free[0] is buf)
+        Response.buffer_pool = None
+        Response.async_file_io = True
+
+    def test_send_file_async_io(self):
+        original_buffer_size = Response.send_file_buffer_size
+        Response.send_file_buffer_size = 4
+        res = Response.send_file('tests/files/test.html')
+        if AsyncFile.threaded():
+            self.assertTrue(isinstance(res.body, AsyncFile))
+        fd = FakeStreamAsync()
+        self._run(res.write(fd))
+        with open('tests/files/test.html', 'rb') as f:
+            self.assertTrue(fd.response.endswith(b'\r\n\r\n' + f.read()))
+        Response.send_file_buffer_size = original_buffer_size
+
+    def test_send_file_mmap(self):
+        with open('tests/files/test.gz', 'rb') as f:
+            data = f.read()
+        Response.send_file_mmap_size = 1
+        res = Response.send_file('tests/files/test.gz')
+        Response.send_file_mmap_size = None
+        fd = FakeStreamAsync()
+        self._run(res.write(fd))
+        self.assertTrue(fd.response.endswith(b'\r\n\r\n' + data))
+        if not isinstance(res.body, MappedFile):
+            # memory maps are not supported on this platform
+            return
+        self.assertEqual(res.headers['Content-Length'], str(len(data)))
+        mapping = MappedFile._mappings['tests/files/test.gz']
+        self.assertEqual(mapping.refs, 0)
+
+        f = MappedFile.open('tests/files/test.gz', offset=2, length=5)
+        self.assertEqual(len(f), 5)
+        self.assertTrue(f.mapping is mapping)
+        self.assertEqual(bytes(f.read(3)), data[2:5])
+        self.assertEqual(bytes(f.read()), data[5:7])
+        self.assertEqual(f.read(), b'')
+        f.close()
+        f = MappedFile.open('tests/files/test.gz', offset=len(data) - 2,
+                            length=10)
+        self.assertEqual(bytes(f.read()), data[-2:])
+        f.close()
+        self.assertIsNone(MappedFile.open('tests/files/test.gz',
+                                          min_size=len(data) + 1))
+
+        MappedFile.purge()
+        self.assertTrue('tests/files/test.gz' in MappedFile._mappings)
+        MappedFile.purge(idle_timeout=0)
+        self.assertFalse('tests/files/test.gz' in MappedFile._mappings)
+
+    def test_mmap_idle_file(self):
+        saved_idle_timeout = MappedFile.idle_timeout
+        MappedFile.idle_timeout = 0
+        Response.send_file_mmap_size = 1
+        try:
+            with open('tests/files/test.gz', 'rb') as f:
+                data = f.read()
+            for _ in range(2):
+                res = Response.send_file('tests/files/test.gz')
+                fd = FakeStreamAsync()
+                self._run(res.write(fd))
+                self.assertTrue(fd.response.endswith(b'\r\n\r\n' + data))
+        finally:
+            Response.send_file_mmap_size = None
+            MappedFile.idle_timeout = saved_idle_timeout
+            MappedFile.purge(idle_timeout=0)
+
+    def test_mmap_modified_file(self):
+        with open('_x.bin', 'wb') as f:
+            f.write(b'foo')
+        f1 = MappedFile.open('_x.bin')
+        if f1 is None:
+            os.remove('_x.bin')
+            return
+        # files that are mapped must be replaced, not rewritten
+        with open('_y.bin', 'wb') as f:
+            f.write(b'barbaz')
+        os.rename('_y.bin', '_x.bin')
+        f2 = MappedFile.open('_x.bin')
+        self.assertFalse(f1.mapping is f2.mapping)
+        self.assertEqual(MappedFile._stale, [f1.mapping])
+        self.assertEqual(bytes(f1.read()), b'foo')
+        self.assertEqual(bytes(f2.read()), b'barbaz')
+        f1.close()
+        self.assertEqual(MappedFile._stale, [])
+        f2.close()
+        MappedFile.purge(idle_timeout=0)
+        self.assertEqual(MappedFile._mappings, {})
+        os.remove('_x.bin')
+
+    def test_async_file(self):
+        class File:
+            def __init__(self, data):
+                self.data = data
+                self.pos = 0
+                self.reads = []
+                self.written = b''
+                self.writers = []
+                self.closed = False
+
+            def read(self, n=-1):
+                self.reads.append(n)
+                if n < 0:
+                    n = len(self.data) - self.pos
+                data = self.data[self.pos:self.pos + n]
+                self.pos += len(data)
+                return data
+
+            def write(self, data):
+                self.written += data
+                self.writers.append(get_ident())
+                return len(data)
+
+            def seek(self, offset, whence=0):
+                self.pos = offset
+                return offset
+
+            def close(self):
+                self.closed = True
+
+        async def run():
+            f = File(b'0123456789')
+            af = AsyncFile(f)
+            result = [await af.read(4), await af.read(2), await af.read(8),
+                      await af.read(4)]
+            await af.seek(1)
+            result.append(await af.read())
+            self.assertEqual(await af.write(b'abc'), 3)
+            self.assertEqual(await af.write(b'x' * AsyncFile.min_thread_size),
+                             AsyncFile.min_thread_size)
+            await af.close()
+            return f, result
+
+        f, result = self._run(run())
+        self.assertEqual(result, [b'0123', b'45', b'6789', b'',
+                                  b'123456789'])
+        if AsyncFile.threaded():
+            # the second chunk was read ahead of time
+            self.assertEqual(f.reads[:2], [4, 4])
+        self.assertEqual(f.written, b'abc' + b'x' * AsyncFile.min_thread_size)
+        # small writes do not go through the thread pool
+        self.assertEqual(f.writers[0], get_ident())
+        if AsyncFile.threaded():
+            self.assertNotEqual(f.writers[1], get_ident())
+        self.assertTrue(f.closed)
+
+    def test_write_buffering(self):
+        class Stream(FakeStreamAsync):
+            def __init__(self):
+                super().__init__()
+                self.writes = []
+
+            async def awrite(self, data):
+                self.writes.append(bytes(data))
+
+        def generate():
+            for i in range(200):
+                yield 'line {}\n'.format(i)
+
+        class AsyncStream:
+            def __init__(self, buffered=False):
+                self.i = 0
+                self.buffered = buffered
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                self.i += 1
+                if self.i > 3:
+                    raise StopAsyncIteration
+                return b'event ' + str(self.i).encode()
+
+        expected = b''.join('line {}\n'.format(i).encode()
+                            for i in range(200))
+        fd = Stream()
+        self._run(Response(generate()).write(fd))
+        self.assertEqual(len(fd.writes), 2)
+        self.assertTrue(len(fd.writes[0]) >= 1024)
+        self.assertTrue(fd.writes[0].startswith(b'HTTP/1.0 200 OK\r\n'))
+        self.assertTrue(b''.join(fd.writes).endswith(b'\r\n\r\n' + expected))
+
+        fd = Stream()
+        self._run(Response(AsyncStream()).write(fd))
+        self.assertEqual(fd.writes[1:], [b'event 1', b'event 2', b'event 3'])
+        self.assertTrue(fd.writes[0].endswith(b'\r\n\r\n'))
+
+        fd = Stream()
+        self._run(Response(AsyncStream(buffered=True)).write(fd))
+        self.assertEqual(len(fd.writes), 1)
+        self.assertTrue(fd.writes[0].endswith(
+            b'\r\n\r\nevent 1event 2event 3'))
+
+        fd = Stream()
+        self._run(Response('x' * 2000).write(fd))
+        self.assertEqual(len(fd.writes), 2)
+        self.assertEqual(fd.writes[1], b'x' * 2000)
+
+        class UnbufferedResponse(Response):
+            write_buffer_size = 0
+
+        fd = Stream()
+        self._run(UnbufferedResponse(generate()).write(fd))
+        self.assertEqual(len(fd.writes), 201)
+
+    def test_write_buffer_timeout(self):
+        class Stream(FakeStreamAsync):
+            def __init__(self):
+                super().__init__()
+                self.writes = []
+
+            async def awrite(self, data):
+                self.writes.append(bytes(data))
+
+        def generate():
+            yield 'a'
+            yield 'b'
+            time.sleep(0.05)
+            yield 'c'
+            yield 'd'
+
+        class StreamResponse(Response):
+            write_buffer_timeout = 20
+
+        fd = Stream()
+        self._run(StreamResponse(generate()).write(fd))
+        self.assertEqual(len(fd.writes), 3)
+        self.assertTrue(fd.writes[0].endswith(b'\r\n\r\nab'))
+        self.assertEqual(fd.writes[1:], [b'c', b'd'])
+
+        class BufferedResponse(Response):
+            write_buffer_timeout = 0
+
+        fd = Stream()
+        self._run(BufferedResponse(generate()).write(fd))
+        self.assertEqual(len(fd.writes), 1)
+        self.assertTrue(fd.writes[0].endswith(b'\r\n\r\nabcd'))
+
+    def test_buffer_pool(self):
+        pool = BufferPool(size=16, count=2)
+        self.assertEqual(len(pool.free), 2)
+        buf1 = pool.acquire()
+        buf2 = pool.acquire()
+        buf3 = pool.acquire()
+        self.assertEqual(len(buf3), 16)
+        self.assertEqual(pool.free, [])
+        pool.release(buf1)
+        pool.release(bytearray(8))
+        pool.release(buf2)
+        pool.release(buf3)
+        self.assertEqual(len(pool.free), 2)
+        self.assertTrue(pool.acquire() is buf2)
+
     def test_send_file_max_age(self):
         res = Response.send_file('tests/files/test.txt', max_age=123)
         self.assertEqual(res.status_code, 200)
@@ -0,0 +1,114 @@
+import asyncio
+import unittest
+from microdot import Microdot
+from microdot.serializers import Serializers
+from microdot.test_client import TestClient
+
+
+def csv_dumps(data):
+    return '\n'.join(','.join(str(v) for v in row) for row in data)
+
+
+def csv_loads(data):
+    return [line.split(',') for line in data.decode().split('\n')]
+
+
+class TestSerializers(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if hasattr(asyncio, 'set_event_loop'):
+            asyncio.set_event_loop(asyncio.new_event_loop())
+        cls.loop = asyncio.get_event_loop()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_registry(self):
+        serializers = Serializers(defaults=False)
+        self.assertIsNone(serializers.select(None))
+        self.assertIsNone(serializers.select('*/*'))
+        serializers.register('text/csv', csv_dumps, csv_loads)
+        serializers.register('text/plain', str, bytes.decode)
+        self.assertEqual(serializers.get('text/csv; charset=UTF-8').mime_type,
+                         'text/csv')
+        self.assertIsNone(serializers.get('application/json'))
+
+        def select(accept):
+            s = serializers.select(accept)
+            return s.mime_type if s else None
+
+        self.assertEqual(select(None), 'text/csv')
+        self.assertEqual(select('*/*'), 'text/csv')
+        self.assertEqual(select('text/plain'), 'text/plain')
+        self.assertEqual(select('text/*'), 'text/csv')
+        self.assertEqual(select('text/html, text/plain;q=0.5, */*;q=0.1'),
+                         'text/plain')
+        self.assertEqual(select('text/csv;q=0.2, text/plain;q=0.8'),
+                         'text/plain')
+        self.assertEqual(select('text/csv;q=x, text/plain;q=0'), None)
+        self.assertEqual(select('application/json'), None)
+
+        serializers.register('text/csv', str, bytes.decode)
+        self.assertEqual(serializers.get('text/csv').encode([1]), b'[1]')
+        self.assertEqual(len(serializers.serializers), 2)
+
+    def test_negotiate(self):
+        app = Microdot()
+        serializers = Serializers()
+        serializers.register('text/csv', csv_dumps, csv_loads)
+
+        @app.post('/')
+        @serializers.negotiate
+        async def index(req):
+            return {'data': serializers.loads(req)}
+
+        @app.get('/table')
+        @serializers.negotiate
+        def table(req):
+            return [[1, 2], [3, 4]], 201, {'X-Foo': 'bar'}
+
+        @app.get('/text')
+        @serializers.negotiate
+        def text(req):
+            return 'hello', 202
+
+        client = TestClient(app)
+
+        res = self._run(client.post('/', body={'foo': 'bar'}))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers['Content-Type'], 'application/json')
+        self.assertEqual(res.headers['Vary'], 'Accept')
+        self.assertEqual(res.json, {'data': {'foo': 'bar'}})
+
+        res = self._run(client.post('/', headers={
+            'Content-Type': 'text/csv'}, body='a,b\nc,d'))
+        self.assertEqual(res.json, {'data': [['a', 'b'], ['c', 'd']]})
+
+        res = self._run(client.post('/'))
+        self.assertEqual(res.json, {'data': None})
+
+        res = self._run(client.post('/', headers={
+            'Content-Type': 'text/xml'}, body='<a/>'))
+        self.assertEqual(res.status_code, 415)
+
+        res = self._run(client.post('/', headers={
+            'Content-Type': 'application/json'}, body='{"a"'))
+        self.assertEqual(res.status_code, 400)
+
+        res = self._run(client.get('/table', headers={'Accept': 'text/csv'}))
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.headers['Content-Type'], 'text/csv')
+        self.assertEqual(res.headers['X-Foo'], 'bar')
+        self.assertEqual(res.text, '1,2\n3,4')
+
+        res = self._run(client.get('/table', headers={
+            'Accept': 'application/json'}))
+        self.assertEqual(res.json, [[1, 2], [3, 4]])
+
+        res = self._run(client.get('/table', headers={'Accept': 'image/*'}))
+        self.assertEqual(res.status_code, 406)
+
+        res = self._run(client.get('/text', headers={'Accept': 'text/csv'}))
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(res.text, 'hello')
+        self.assertFalse('Vary' in res.headers)
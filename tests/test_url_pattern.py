@@ -22,6 +22,33 @@ class TestURLPattern(unittest.TestCase):
         self.assertIsNone(p.match('/foo'))
         self.assertIsNone(p.match('/foo/bar/baz'))
 
+    def test_static_path(self):
+        p = URLPattern('/foo/bar')
+        p.compile()
+        self.assertEqual(p.static_path, '/foo/bar')
+        self.assertEqual(p.prefix, 'foo')
+
+        p = URLPattern('')
+        p.compile()
+        self.assertEqual(p.static_path, '/')
+        self.assertEqual(p.prefix, '')
+
+        p = URLPattern('/foo/<arg>')
+        p.compile()
+        self.assertIsNone(p.static_path)
+        self.assertEqual(p.prefix, 'foo')
+
+        p = URLPattern('/<arg>/foo')
+        p.compile()
+        self.assertIsNone(p.static_path)
+        self.assertIsNone(p.prefix)
+
+        p = URLPattern('/foo.txt')
+        p.compile()
+        self.assertIsNone(p.static_path)
+        self.assertIsNone(p.prefix)
+        self.assertEqual(p.match('/foo.txt'), {})
+
     def test_string_argument(self):
         p = URLPattern('/<arg>')
         self.assertEqual(p.match('/foo'), {'arg': 'foo'})
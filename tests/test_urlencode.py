@@ -11,3 +11,16 @@ class TestURLEncode(unittest.TestCase):
         self.assertEqual(urldecode(b'%3Ffoo%3Dbar%26x'), '?foo=bar&x')
         self.assertEqual(urldecode('dot%e2%80%a2dot'), 'dot•dot')
         self.assertEqual(urldecode(b'dot%e2%80%a2dot'), 'dot•dot')
+        self.assertEqual(urldecode('foo'), 'foo')
+        self.assertEqual(urldecode(b'foo'), 'foo')
+        self.assertEqual(urldecode('foo+bar'), 'foo bar')
+        self.assertEqual(urldecode(b'foo+bar'), 'foo bar')
+        self.assertEqual(urldecode('a+%2B+b'), 'a + b')
+        self.assertEqual(urldecode('%41%42%43'), 'ABC')
+
+    def test_urldecode_malformed(self):
+        self.assertEqual(urldecode('100%'), '100%')
+        self.assertEqual(urldecode('100%%'), '100%%')
+        self.assertEqual(urldecode('%4'), '%4')
+        self.assertEqual(urldecode('%zz%41'), '%zzA')
+        self.assertEqual(urldecode(b'%g1+%%41'), '%g1 %A')
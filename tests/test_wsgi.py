@@ -2,8 +2,11 @@ import io
 import sys
 import unittest
 from unittest import mock
+from wsgiref.validate import validator
 
-from microdot.wsgi import Microdot, Request
+from microdot.wsgi import Microdot, Request, Response
+from microdot.access_log import AccessLog
+from microdot.mapped_file import MappedFile
 
 
 @unittest.skipIf(sys.implementation.name == 'micropython',
@@ -19,7 +22,7 @@ class TestWSGI(unittest.TestCase):
             self.assertEqual(req.method, 'POST')
             self.assertEqual(req.http_version, 'HTTP/1.1')
             self.assertEqual(req.path, '/foo/bar')
-            self.assertEqual(req.args, {'baz': ['1']})
+            self.assertEqual(req.args, {'baz': '1'})
             self.assertEqual(req.cookies, {'session': 'xyz'})
             self.assertEqual(req.headers['Content-Length'], '4')
             self.assertEqual(req.headers['Content-Type'], 'text/plain')
@@ -114,6 +117,49 @@ class TestWSGI(unittest.TestCase):
 
         Request.max_body_length = saved_max_body_length
 
+    def test_send_file_mmap(self):
+        saved_send_file_mmap_size = Response.send_file_mmap_size
+        Response.send_file_mmap_size = 1
+        app = Microdot()
+
+        @app.route('/')
+        def index(req):
+            return Response.send_file('tests/files/test.gz', buffer_size=8)
+
+        environ = {
+            'PATH_INFO': '/',
+            'QUERY_STRING': '',
+            'REMOTE_ADDR': '1.2.3.4',
+            'REMOTE_PORT': '1234',
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.errors': io.StringIO(),
+            'wsgi.input': io.BytesIO(b''),
+            'wsgi.multiprocess': False,
+            'wsgi.multithread': False,
+            'wsgi.run_once': False,
+            'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0),
+        }
+
+        def start_response(status, headers):
+            self.assertEqual(status, '200 OK')
+
+        # the validator rejects chunks that are not bytes
+        r = validator(app)(environ, start_response)
+        chunks = list(r)
+        r.close()
+        with open('tests/files/test.gz', 'rb') as f:
+            self.assertEqual(b''.join(chunks), f.read())
+        self.assertTrue(len(chunks) > 1)
+        for chunk in chunks:
+            self.assertEqual(type(chunk), bytes)
+        Response.send_file_mmap_size = saved_send_file_mmap_size
+        MappedFile.purge(idle_timeout=0)
+
     def test_shutdown(self):
         app = Microdot()
 
@@ -137,3 +183,31 @@ class TestWSGI(unittest.TestCase):
             app(environ, start_response)
 
         kill.assert_called()
+
+    def test_access_log(self):
+        app = Microdot()
+        stream = io.StringIO()
+        log = AccessLog(app, stream=stream)
+
+        @app.route('/')
+        def index(req):
+            return 'foo'
+
+        environ = {
+            'PATH_INFO': '/',
+            'REMOTE_ADDR': '1.2.3.4',
+            'REQUEST_METHOD': 'GET',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.input': io.BytesIO(b''),
+        }
+
+        def start_response(status, headers):
+            self.assertEqual(status, '200 OK')
+
+        r = app(environ, start_response)
+        self.assertEqual(b''.join(r), b'foo')
+        r.close()
+        self.assertIsNone(log.task)
+        self.assertEqual(log.written, 1)
+        self.assertIn('1.2.3.4 - - [', stream.getvalue())
+        self.assertIn('"GET / HTTP/1.1" 200 3 ', stream.getvalue())
@@ -0,0 +1,307 @@
+"""Build a MicroPython bundle with the Microdot modules used by an application.
+
+This script finds the modules that an application imports, directly or
+indirectly, and copies only those to an output directory, optionally
+compiling them to *.mpy* files with ``mpy-cross``. Modules that are not in
+this repository, such as those from the MicroPython standard library, are
+assumed to be provided by the firmware. A MicroPython manifest file that can
+be used to freeze the bundle into a custom firmware is also generated.
+
+Modules that are imported inside functions, which Microdot uses for features
+that are loaded on demand, and modules imported in ``try`` blocks that handle
+``ImportError`` are not followed. They can be added with the ``--include``
+option, or all of them with ``--lazy``.
+
+The script ends with a report of the flash space used by the bundle and the
+RAM used by importing the application's modules, measured with the given
+MicroPython binary, which defaults to the unix port in the *bin* directory.
+
+Examples::
+
+    python tools/bundle.py examples/hello/hello.py
+    python tools/bundle.py --march xtensawin --output build main.py
+    python tools/bundle.py --include microdot.spooled_body main.py
+"""
+import argparse
+import ast
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEARCH_PATH = [
+    os.path.join(ROOT, 'src'),
+    os.path.join(ROOT, 'libs', 'micropython'),
+    os.path.join(ROOT, 'libs', 'common'),
+]
+
+FOOTPRINT_SCRIPT = '''
+import gc
+import time
+gc.collect()
+m0 = gc.mem_alloc()
+gc.disable()
+t0 = time.ticks_us()
+{imports}
+t1 = time.ticks_us()
+m1 = gc.mem_alloc()
+gc.enable()
+gc.collect()
+print(time.ticks_diff(t1, t0), m1 - m0, gc.mem_alloc() - m0)
+'''
+
+
+def find_module(name):
+    """Return the path and the base directory of a module, or ``None`` if the
+    module is not in the search path."""
+    parts = name.split('.')
+    for base in SEARCH_PATH:
+        path = os.path.join(base, *parts)
+        if os.path.isfile(path + '.py'):
+            return path + '.py', base
+        if os.path.isfile(os.path.join(path, '__init__.py')):
+            return os.path.join(path, '__init__.py'), base
+
+
+def catches_import_error(node):
+    """Return ``True`` if a ``try`` statement handles ``ImportError``."""
+    for handler in node.handlers:
+        types = handler.type.elts if isinstance(handler.type, ast.Tuple) \
+            else [handler.type]
+        for exc in types:
+            if isinstance(exc, ast.Name) and \
+                    exc.id in ('ImportError', 'ModuleNotFoundError'):
+                return True
+    return False
+
+
+def find_imports(filename, lazy=False):
+    """Return the names of the modules imported by a source file.
+
+    Imports that are inside functions are loaded on first use, and imports
+    in the body of a ``try`` statement that handles ``ImportError`` are
+    optional, so both are skipped unless ``lazy`` is ``True``. Applications
+    that use a feature implemented in one of these modules can add it to the
+    bundle with the ``--include`` option.
+    """
+    with open(filename) as f:
+        tree = ast.parse(f.read(), filename)
+    nodes = [tree]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and \
+                node.module:
+            yield node.module
+            for alias in node.names:
+                # the imported name could be a submodule
+                yield node.module + '.' + alias.name
+        elif not lazy and isinstance(node, (ast.FunctionDef,
+                                            ast.AsyncFunctionDef,
+                                            ast.Lambda)):
+            continue
+        elif not lazy and isinstance(node, ast.Try) and \
+                catches_import_error(node):
+            # the fallbacks in the handlers are still needed
+            nodes.extend(node.handlers + node.orelse + node.finalbody)
+            continue
+        nodes.extend(ast.iter_child_nodes(node))
+
+
+def resolve(apps, include=(), lazy=False):
+    """Find all the modules needed by the given application files, plus the
+    modules given in ``include``.
+
+    Returns a dictionary with module names as keys, and tuples with the path
+    and base directory of each module as values, and the list of modules
+    that are directly imported by the application.
+    """
+    modules = {}
+    direct = []
+    pending = []
+    for app in apps:
+        for name in find_imports(app, lazy=lazy):
+            if find_module(name) and name not in direct:
+                direct.append(name)
+            pending.append(name)
+    for name in include:
+        if find_module(name) is None:
+            raise ValueError('Module {} not found'.format(name))
+        pending.append(name)
+    while pending:
+        name = pending.pop()
+        if name in modules:
+            continue
+        found = find_module(name)
+        if found is None:
+            continue
+        modules[name] = found
+        if '.' in name:
+            # importing a submodule also imports its parent packages
+            pending.append(name.rsplit('.', 1)[0])
+        pending.extend(find_imports(found[0], lazy=lazy))
+    return modules, direct
+
+
+def find_mpy_cross(command):
+    if command:
+        return command.split()
+    if shutil.which('mpy-cross'):
+        return ['mpy-cross']
+    try:
+        import mpy_cross  # noqa: F401
+    except ImportError:
+        return None
+    return [sys.executable, '-m', 'mpy_cross']
+
+
+def build(modules, output, mpy_cross=None, march=None, opt=None):
+    """Copy or compile the modules into the output directory.
+
+    Returns a list of tuples with the relative path of each module, its source
+    size and its size in the bundle.
+    """
+    files = []
+    for name, (path, base) in sorted(modules.items()):
+        relpath = os.path.relpath(path, base)
+        target = os.path.join(output, relpath)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if mpy_cross:
+            target = target[:-3] + '.mpy'
+            cmd = mpy_cross + ['-o', target, '-s', relpath]
+            if march:
+                cmd.append('-march=' + march)
+            if opt is not None:
+                cmd.append('-O{}'.format(opt))
+            subprocess.run(cmd + [path], check=True)
+        else:
+            shutil.copyfile(path, target)
+        files.append((relpath, os.path.getsize(path),
+                      os.path.getsize(target)))
+    return files
+
+
+def write_manifest(modules, output):
+    """Write a MicroPython manifest that freezes the bundle."""
+    packages = {}
+    lines = ['# MicroPython manifest generated by tools/bundle.py']
+    for name, (path, base) in sorted(modules.items()):
+        relpath = os.path.relpath(path, base)
+        if os.sep not in relpath:
+            lines.append('module({!r}, base_path={!r})'.format(relpath, base))
+        else:
+            package = relpath.split(os.sep, 1)[0]
+            packages.setdefault((package, base), []).append(
+                relpath.split(os.sep, 1)[1].replace(os.sep, '/'))
+    for (package, base), files in sorted(packages.items()):
+        lines.append('package({!r}, files={!r}, base_path={!r})'.format(
+            package, files, base))
+    filename = os.path.join(output, 'manifest.py')
+    with open(filename, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return filename
+
+
+def measure(micropython, path, imports):
+    """Return the time in milliseconds, and the peak and retained RAM in
+    bytes used to import the given modules, when they are loaded from the
+    given path.
+
+    The garbage collector is disabled during the imports, so the peak value
+    is the total amount of memory allocated by them.
+    """
+    script = FOOTPRINT_SCRIPT.format(
+        imports='\n'.join('import ' + name for name in imports))
+    env = dict(os.environ, MICROPYPATH='.frozen:' + path)
+    try:
+        output = subprocess.check_output([micropython, '-c', script], env=env,
+                                         stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        print('Could not measure the RAM footprint: {}'.format(exc))
+        return None
+    us, peak, retained = output.decode().split()[-3:]
+    return int(us) / 1000, int(peak), int(retained)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('apps', nargs='+',
+                        help='the source files of the application')
+    parser.add_argument('--output', '-o', default='bundle',
+                        help='output directory (default: bundle)')
+    parser.add_argument('--include', '-i', action='append', default=[],
+                        metavar='MODULE',
+                        help='a module to add to the bundle, such as '
+                        'microdot.spooled_body (can be given multiple times)')
+    parser.add_argument('--lazy', action='store_true',
+                        help='also bundle the modules that are imported '
+                        'inside functions or are optional')
+    parser.add_argument('--source', action='store_true',
+                        help='copy source files instead of compiling them '
+                        'to .mpy')
+    parser.add_argument('--mpy-cross',
+                        help='the mpy-cross command (default: mpy-cross if '
+                        'found in the path, or else the mpy_cross package)')
+    parser.add_argument('--march',
+                        help='the architecture to emit native code for, '
+                        'passed to mpy-cross')
+    parser.add_argument('--opt', type=int, choices=[0, 1, 2, 3],
+                        help='the optimization level passed to mpy-cross')
+    parser.add_argument('--micropython',
+                        default=os.path.join(ROOT, 'bin', 'micropython'),
+                        help='the MicroPython binary used to measure the RAM '
+                        'footprint (default: bin/micropython)')
+    args = parser.parse_args()
+
+    mpy_cross = None
+    if not args.source:
+        mpy_cross = find_mpy_cross(args.mpy_cross)
+        if mpy_cross is None:
+            parser.error('mpy-cross not found, use --mpy-cross to give its '
+                         'location or --source to bundle source files')
+
+    try:
+        modules, direct = resolve(args.apps, include=args.include,
+                                  lazy=args.lazy)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if os.path.exists(args.output):
+        shutil.rmtree(args.output)
+    os.makedirs(args.output)
+    files = build(modules, args.output, mpy_cross=mpy_cross, march=args.march,
+                  opt=args.opt)
+    manifest = write_manifest(modules, args.output)
+
+    print('{:<32}{:>10}{:>10}'.format('module', 'source', 'bundle'))
+    for relpath, source_size, size in files:
+        print('{:<32}{:>10}{:>10}'.format(relpath, source_size, size))
+    print('{:<32}{:>10}{:>10}'.format(
+        'total', sum(f[1] for f in files), sum(f[2] for f in files)))
+    unused = []
+    for name in sorted(os.listdir(os.path.join(ROOT, 'src', 'microdot'))):
+        if name.endswith('.py') and name != '__init__.py' \
+                and 'microdot.' + name[:-3] not in modules:
+            unused.append(name[:-3])
+    if unused:
+        print('\nMicrodot modules left out: ' + ', '.join(unused))
+        print('Modules that are loaded on demand, such as those needed to '
+              'spool large\nrequest bodies or to serve files, can be added '
+              'with --include or --lazy.')
+    print('Manifest for freezing: ' + manifest)
+
+    if direct and os.path.exists(args.micropython):
+        print('\n{:<32}{:>10}{:>10}{:>10}'.format(
+            'import from', 'time ms', 'peak RAM', 'RAM'))
+        libs = ':'.join(SEARCH_PATH)
+        for label, path in [('source files', libs),
+                            ('bundle', args.output)]:
+            result = measure(args.micropython, path, direct)
+            if result:
+                print('{:<32}{:>10.2f}{:>10}{:>10}'.format(label, *result))
+
+
+if __name__ == '__main__':
+    main()
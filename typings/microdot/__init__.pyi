@@ -2,6 +2,6 @@
 This type stub file was generated by pyright.
 """
 
-from microdot.microdot import AsyncBytesIO as AsyncBytesIO, Microdot as Microdot, Request as Request, Response as Response, URLPattern as URLPattern, abort as abort, redirect as redirect, send_file as send_file
+from microdot.microdot import AsyncBytesIO as AsyncBytesIO, Headers as Headers, Microdot as Microdot, Request as Request, Response as Response, URLPattern as URLPattern, abort as abort, redirect as redirect, send_file as send_file
 
 __version__: str
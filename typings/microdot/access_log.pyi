@@ -0,0 +1,35 @@
+from typing import Any, TextIO, Tuple
+from asyncio import Task
+from microdot import Microdot, Request, Response
+
+MONTHS: list[str]
+
+class AccessLog:
+    formats: list[str]
+    format: str
+    stream: TextIO
+    buffer: list[Tuple[Any, ...] | None]
+    start: int
+    count: int
+    flush_interval: float
+    use_thread: bool | None
+    dropped: int
+    written: int
+    task: Task[None] | None
+    def __init__(self, app: Microdot | None = ..., format: str = ..., stream: TextIO | None = ..., buffer_size: int = ..., flush_interval: float = ..., use_thread: bool | None = ...) -> None:
+        ...
+    
+    def initialize(self, app: Microdot) -> None:
+        ...
+    
+    def log(self, record: Tuple[Any, ...]) -> None:
+        ...
+    
+    def format_record(self, record: Tuple[Any, ...]) -> str:
+        ...
+    
+    async def flush(self) -> None:
+        ...
+    
+    async def close(self) -> None:
+        ...
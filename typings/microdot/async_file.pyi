@@ -0,0 +1,29 @@
+"""
+This type stub file was generated by pyright.
+"""
+
+from typing import Any
+
+class AsyncFile:
+    max_workers: int
+    min_thread_size: int
+    file: Any
+    def __init__(self, file: Any) -> None:
+        ...
+    
+    @classmethod
+    def threaded(cls) -> bool:
+        ...
+    
+    async def read(self, n: int = ...) -> bytes:
+        ...
+    
+    async def write(self, data: bytes) -> int:
+        ...
+    
+    async def seek(self, offset: int, whence: int = ...) -> int:
+        ...
+    
+    async def close(self) -> None:
+        ...
+    
@@ -0,0 +1,35 @@
+"""
+This type stub file was generated by pyright.
+"""
+
+from typing import Any, Callable, Tuple
+from asyncio import Task
+
+class BackgroundTasks:
+    shutdown_timeout: int
+    max_workers: int
+    max_queue: int
+    queue: list[Tuple[Callable[..., Any], tuple[Any, ...], dict[str, Any]]]
+    workers: list[Task[None]]
+    completed: int
+    failed: int
+    dropped: int
+    def __init__(self, max_workers: int = ..., max_queue: int = ...) -> None:
+        ...
+    
+    @property
+    def queued(self) -> int:
+        ...
+    
+    @property
+    def running(self) -> int:
+        ...
+    
+    def submit(self, f: Callable[..., Any], *args: Any, **kwargs: Any) -> bool:
+        ...
+    
+    async def drain(self, timeout: float | None = ...) -> bool:
+        ...
+    
+    async def shutdown(self) -> bool:
+        ...
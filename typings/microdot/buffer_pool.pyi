@@ -0,0 +1,16 @@
+"""
+This type stub file was generated by pyright.
+"""
+
+class BufferPool:
+    size: int
+    count: int
+    free: list[bytearray]
+    def __init__(self, size: int = ..., count: int = ...) -> None:
+        ...
+    
+    def acquire(self) -> bytearray:
+        ...
+    
+    def release(self, buf: bytearray) -> None:
+        ...
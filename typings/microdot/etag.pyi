@@ -0,0 +1,32 @@
+"""
+This type stub file was generated by pyright.
+"""
+
+from typing import Any, Callable
+from microdot import Microdot, Request, Response
+
+class ETag:
+    weak: bool
+    def __init__(self, app: Microdot | None = ..., weak: bool = ...) -> None:
+        ...
+    
+    def initialize(self, app: Microdot) -> None:
+        ...
+    
+    def make_etag(self, value: bytes | str) -> str:
+        ...
+    
+    def hash(self, body: bytes) -> str:
+        ...
+    
+    def matches(self, request: Request, etag: str) -> bool:
+        ...
+    
+    def not_modified(self, etag: str, response: Response | None = ...) -> Response:
+        ...
+    
+    def after_request(self, request: Request, response: Response) -> Response | None:
+        ...
+    
+    def version(self, key: Callable[..., Any]) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        ...
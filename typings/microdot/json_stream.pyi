@@ -0,0 +1,46 @@
+from typing import Any, AsyncIterable, Iterable
+from microdot import Request, Response
+
+NDJSON_TYPES: tuple[str, ...]
+
+class JSONStreamIter:
+    buffer_size: int
+    max_record_size: int
+    stream: Any
+    remaining: int
+    ndjson: bool
+    buffer: bytes
+    def __init__(self, request: Request, ndjson: bool | None = ...) -> None:
+        ...
+    
+    def __aiter__(self) -> JSONStreamIter:
+        ...
+    
+    async def __anext__(self) -> Any:
+        ...
+    
+
+
+class JSONStreamEncoder:
+    buffer_size: int
+    items: Iterable[Any] | AsyncIterable[Any]
+    is_async: bool
+    ndjson: bool
+    first: bool
+    done: bool
+    def __init__(self, items: Iterable[Any] | AsyncIterable[Any], ndjson: bool = ...) -> None:
+        ...
+    
+    def __aiter__(self) -> JSONStreamEncoder:
+        ...
+    
+    async def __anext__(self) -> bytes:
+        ...
+    
+    async def aclose(self) -> None:
+        ...
+    
+
+
+def json_stream_response(items: Iterable[Any] | AsyncIterable[Any], status_code: int = ..., headers: dict[str, str] | None = ..., ndjson: bool = ...) -> Response:
+    ...
@@ -0,0 +1,31 @@
+"""
+This type stub file was generated by pyright.
+"""
+
+from typing import Any
+
+class MappedFile:
+    idle_timeout: int
+    mapping: Any
+    pos: int
+    end: int
+    def __init__(self, mapping: Any, offset: int, length: int) -> None:
+        ...
+    
+    @classmethod
+    def open(cls, filename: str, offset: int = ..., length: int | None = ..., min_size: int = ...) -> MappedFile | None:
+        ...
+    
+    @classmethod
+    def purge(cls, idle_timeout: int | None = ...) -> None:
+        ...
+    
+    def __len__(self) -> int:
+        ...
+    
+    def read(self, n: int = ...) -> memoryview | bytes:
+        ...
+    
+    def close(self) -> None:
+        ...
+    
@@ -5,11 +5,27 @@ from io import BytesIO
 from re import Pattern
 from ssl import SSLContext
 from microdot.multipart import FileUpload
+from microdot.background_tasks import BackgroundTasks
+from microdot.buffer_pool import BufferPool
 
 async def invoke_handler(handler: Callable[..., Any | Awaitable[Any]], *args: Any, **kwargs: Any):
     ...
 
+json: Any
+
+def import_json() -> Any:
+    ...
+
+def ticks_us() -> int:
+    ...
+
+def ticks_diff(ticks1: int, ticks2: int) -> int:
+    ...
+
 MUTED_SOCKET_ERRORS: list[int]
+def default_buffer_size() -> int:
+    ...
+
 def urldecode(s: bytes | str) -> str:
     ...
 
@@ -41,6 +57,18 @@ class NoCaseDict(dict):
     
 
 
+class Headers(NoCaseDict):
+    def __init__(self, initial_dict: dict[str, Any] | None = ...) -> None:
+        ...
+    
+    def add(self, key: str, value: str) -> None:
+        ...
+    
+    def getlist(self, key: str) -> list[str]:
+        ...
+    
+
+
 def mro(cls):
     ...
 
@@ -98,6 +126,8 @@ class Request:
     max_content_length: int
     max_body_length: int
     max_readline: int
+    spool_directory: str | None
+    defer_continue: bool
     app: "Microdot"
     client_addr: Tuple[str, int]
     method: str
@@ -117,7 +147,7 @@ class Request:
     http_version: str
     body_used: bool
     sock: Tuple[StreamReader, StreamWriter]
-    after_request_handlers: list[Callable[[Request, "Response"], "Response" | Awaitable["Response"] | None | Awaitable[None]]]
+    after_request_handlers: list[Callable[[Request, "Response"], "Response" | Awaitable["Response"] | None | Awaitable[None]]] | Tuple[()]
     def __init__(self, app, client_addr: Tuple[str, int], method: str, url: str, http_version: str, headers: dict[str, str], body: bytes | None = ..., stream: StreamReader | None = ..., sock: Tuple[StreamReader, StreamWriter] | None = ..., url_prefix: str = ..., subapp: "Microdot" | None = ..., scheme: str | None = ..., route: Callable[..., Any | Awaitable[Any]] | None = ...) -> None:
         ...
     
@@ -125,8 +155,11 @@ class Request:
     async def create(app, client_reader: StreamReader, client_writer: StreamWriter, client_addr: Tuple[str, int], scheme: str | None = ...) -> Request:
         ...
     
+    async def read_body(self) -> bytes:
+        ...
+    
     @property
-    def body(self) -> bytes | None:
+    def body(self) -> bytes:
         ...
     
     @property
@@ -148,16 +181,24 @@ class Request:
     def after_request(self, f: Callable[[Request, "Response"], "Response" | Awaitable["Response"] | None | Awaitable[None]]):
         ...
     
+    def after_response(self, f: Callable[..., Any], *args: Any, **kwargs: Any) -> Callable[..., Any]:
+        ...
+    
 
 
 class Response:
     types_map: dict[str, str]
-    send_file_buffer_size: int
+    send_file_buffer_size: int | None
+    async_file_io: bool
+    send_file_mmap_size: int | None
+    buffer_pool: BufferPool | None
+    write_buffer_size: int
+    write_buffer_timeout: int
     default_content_type: str
     default_send_file_max_age: int | None
     already_handled: "Response"
     status_code: int
-    headers: NoCaseDict
+    headers: Headers
     reason: str
     body: bytes
     is_head: bool
@@ -185,7 +226,7 @@ class Response:
         ...
     
     @classmethod
-    def send_file(cls, filename: str, status_code: int = ..., content_type: str | None = ..., stream: BinaryIO | None = ..., max_age: int | None = ..., compressed: bool = ..., file_extension: str = ...) -> Response:
+    def send_file(cls, filename: str, status_code: int = ..., content_type: str | None = ..., stream: BinaryIO | None = ..., max_age: int | None = ..., compressed: bool = ..., file_extension: str = ..., buffer_size: int | None = ...) -> Response:
         ...
     
 
@@ -196,6 +237,8 @@ class URLPattern:
     url_pattern: str
     segments: dict[str, Any]
     regex: Pattern | None
+    static_path: str | None
+    prefix: str | None
     @classmethod
     def register_type(cls, type_name: str, pattern: str = ..., parser: Callable[[str], Any] | None=...) -> None:
         ...
@@ -225,7 +268,12 @@ class Microdot:
     after_request_handlers: list[Callable[[Request, Response], Response | None]]
     after_error_request_handlers: list[Callable[[Request, Response], Response | None]]
     error_handlers: dict[int | Exception, Callable[[Request], Any] | Callable[[Request, Exception], Any]]
+    profile_handlers: list[Callable[[Request, str, int], None]]
+    shutdown_handlers: list[Callable[[], Any]]
+    route_index: dict[str | None, list[Tuple[list[str], URLPattern, Callable[..., Any], str, Microdot | None]]] | None
     options_handler: Callable[[Request], dict[str, str]]
+    static_responses: dict[str, Tuple[bytes, bytes, int]]
+    background_tasks: BackgroundTasks | None
     ssl: bool
     debug: bool
     server: Server
@@ -256,15 +304,27 @@ class Microdot:
     def after_request(self, f: Callable[[Request, Response], Any | None]) -> Callable[[Request, Response], Any | None]:
         ...
     
+    def static_response(self, url: str, body: str | bytes | dict[str, Any] | list[Any] = ..., headers: dict[str, str] | None = ..., status_code: int = ...) -> None:
+        ...
+    
     def after_error_request(self, f: Callable[[Request, Response], Any | None]) -> Callable[[Request, Response], Any | None]:
         ...
     
+    def on_shutdown(self, f: Callable[[], Any]) -> Callable[[], Any]:
+        ...
+    
+    def profile(self, f: Callable[[Request, str, int], None]) -> Callable[[Request, str, int], None]:
+        ...
+    
     def errorhandler(self, status_code_or_exception_class: int | type) -> Callable[[Callable[[Request], Any] | Callable[[Request, Exception], Any]], Any]:
         ...
     
     def mount(self, subapp: Microdot, url_prefix: str = ..., local: bool = ...) -> None:
         ...
     
+    def compile(self, template_class: Callable[[str], Any] | None = ..., templates: list[str] | None = ...) -> float:
+        ...
+    
     @staticmethod
     def abort(status_code: int, reason: str | None = ...) -> None:
         ...
@@ -287,6 +347,12 @@ class Microdot:
     async def handle_request(self, reader: StreamReader, writer: StreamWriter) -> None:
         ...
     
+    def submit_background_tasks(self, req: Request | None) -> None:
+        ...
+    
+    def profile_request(self, req: Request, phase: str, ticks: int | None = ...) -> None:
+        ...
+    
     def get_request_handlers(self, req: Request, attr: str, local_first: bool = ...) -> list[Callable[..., Any]]:
         ...
     
@@ -303,5 +369,5 @@ def abort(status_code: int, reason: str | None = ...) -> None:
 def redirect(location: str, status_code: int = ...) -> Response:
     ...
 
-def send_file(filename: str, status_code: int = ..., content_type: str | None = ..., stream: BinaryIO | None = ..., max_age: int | None = ..., compressed: bool = ..., file_extension: str = ...) -> Response:
+def send_file(filename: str, status_code: int = ..., content_type: str | None = ..., stream: BinaryIO | None = ..., max_age: int | None = ..., compressed: bool = ..., file_extension: str = ..., buffer_size: int | None = ...) -> Response:
     ...
@@ -28,7 +28,8 @@ class FileUpload:
     async def read(self, n: int = ...) -> bytes:
         ...
     
-    async def save(self, path_or_file: str) -> None:
+    async def save(self, path_or_file: str,
+                   buffer_size: int | None = None) -> None:
         ...
     
     async def copy(self, max_memory_size: int | None = ...):
@@ -0,0 +1,17 @@
+from typing import Callable
+from microdot import Microdot, Request, Response
+
+class Profiler:
+    server_timing: bool | None
+    callback: Callable[[Request, dict[str, float]], None] | None
+    def __init__(self, app: Microdot | None = ..., server_timing: bool | None = ..., callback: Callable[[Request, dict[str, float]], None] | None = ...) -> None:
+        ...
+    
+    def initialize(self, app: Microdot, server_timing: bool | None = ..., callback: Callable[[Request, dict[str, float]], None] | None = ...) -> None:
+        ...
+    
+    def record(self, request: Request, phase: str, ticks: int) -> None:
+        ...
+    
+    def durations(self, request: Request) -> dict[str, float]:
+        ...
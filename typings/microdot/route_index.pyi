@@ -0,0 +1,12 @@
+"""
+This type stub file was generated by pyright.
+"""
+
+from typing import Any, Callable, Tuple
+from microdot.microdot import Microdot, URLPattern
+
+def build_route_index(url_map: list[Tuple[list[str], URLPattern, Callable[..., Any], str, Microdot | None]]) -> dict[str | None, list[Tuple[list[str], URLPattern, Callable[..., Any], str, Microdot | None]]]:
+    ...
+
+def compile_app(app: Microdot, template_class: Callable[[str], Any] | None = ..., templates: list[str] | None = ...) -> float:
+    ...
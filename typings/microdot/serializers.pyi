@@ -0,0 +1,41 @@
+from typing import Any, Callable, Tuple
+from microdot import Request
+
+class Serializer:
+    mime_type: str
+    dumps: Callable[[Any], bytes | str]
+    loads: Callable[[bytes], Any]
+    def __init__(self, mime_type: str, dumps: Callable[[Any], bytes | str], loads: Callable[[bytes], Any]) -> None:
+        ...
+    
+    def encode(self, data: Any) -> bytes:
+        ...
+    
+    def decode(self, data: bytes) -> Any:
+        ...
+    
+
+
+class Serializers:
+    serializers: list[Serializer]
+    def __init__(self, defaults: bool = ...) -> None:
+        ...
+    
+    def register(self, mime_type: str, dumps: Callable[[Any], bytes | str], loads: Callable[[bytes], Any]) -> None:
+        ...
+    
+    def get(self, mime_type: str) -> Serializer | None:
+        ...
+    
+    def select(self, accept: str | None) -> Serializer | None:
+        ...
+    
+    def loads(self, request: Request) -> Any:
+        ...
+    
+    def dumps(self, request: Request, data: Any) -> Tuple[bytes, str]:
+        ...
+    
+    def negotiate(self, f: Callable[..., Any]) -> Callable[..., Any]:
+        ...
+    
@@ -0,0 +1,37 @@
+"""
+This type stub file was generated by pyright.
+"""
+
+from typing import Any
+from microdot.async_file import AsyncFile
+
+class SpooledBody(AsyncFile):
+    filename: str
+    def __init__(self, file: Any, filename: str) -> None:
+        ...
+    
+    @classmethod
+    async def receive(cls, stream: Any, length: int, directory: str) -> SpooledBody:
+        ...
+    
+    async def read(self, n: int = ...) -> bytes:
+        ...
+    
+    async def readline(self) -> bytes:
+        ...
+    
+    async def readexactly(self, n: int) -> bytes:
+        ...
+    
+    async def seek(self, offset: int, whence: int = ...) -> int:
+        ...
+    
+    async def tell(self) -> int:
+        ...
+    
+    def getvalue(self) -> bytes:
+        ...
+    
+    async def aclose(self) -> None:
+        ...
+    
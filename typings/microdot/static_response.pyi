@@ -0,0 +1,9 @@
+"""
+This type stub file was generated by pyright.
+"""
+
+from typing import Any
+from microdot.microdot import Microdot
+
+def add_static_response(app: Microdot, url: str, body: str | bytes | dict[str, Any] | list[Any], headers: dict[str, str] | None, status_code: int) -> None:
+    ...
@@ -2,6 +2,7 @@ from typing import Any, Callable, Tuple
 import asyncio
 from microdot import *  # type: ignore
 from microdot.microdot import Microdot as BaseMicrodot
+from microdot.websocket import WebSocket as WebSocket, websocket_upgrade as websocket_upgrade, with_websocket as with_websocket
 
 class Microdot(BaseMicrodot):  # type: ignore[no-redef]
     loop: asyncio.EventLoop